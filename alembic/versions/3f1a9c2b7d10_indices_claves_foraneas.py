@@ -0,0 +1,52 @@
+"""indices para claves foraneas y consultas de llaves
+
+Revision ID: 3f1a9c2b7d10
+Revises: 
+Create Date: 2026-10-18 12:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2b7d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas, unique)
+INDICES = [
+    ("ix_jugador_asociacion_id", "jugador", ["asociacion_id"], False),
+    ("ix_partido_torneo_id_categoria_id", "partido", ["torneo_id", "categoria_id"], False),
+    ("ix_partido_categoria_id", "partido", ["categoria_id"], False),
+    ("ix_partido_grupo_id", "partido", ["grupo_id"], False),
+    ("ix_partido_jugador1_id", "partido", ["jugador1_id"], False),
+    ("ix_partido_jugador2_id", "partido", ["jugador2_id"], False),
+    ("ix_partido_equipo1_id", "partido", ["equipo1_id"], False),
+    ("ix_partido_equipo2_id", "partido", ["equipo2_id"], False),
+    ("ix_partido_partido_ganador_id", "partido", ["partido_ganador_id"], False),
+    # si ya hay sets duplicados en la tabla este indice falla, hay que limpiarlos antes
+    ("ix_resultado_set_partido_id_numero_set", "resultado_set", ["partido_id", "numero_set"], True),
+    ("ix_grupo_torneo_id_categoria_id", "grupo", ["torneo_id", "categoria_id"], False),
+    ("ix_grupo_participante_jugador_id", "grupo_participante", ["jugador_id"], False),
+    ("ix_equipo_dobles_jugador1_id", "equipo_dobles", ["jugador1_id"], False),
+    ("ix_equipo_dobles_jugador2_id", "equipo_dobles", ["jugador2_id"], False),
+    ("ix_inscripcion_torneo_id_categoria_id", "inscripcion", ["torneo_id", "categoria_id"], False),
+    ("ix_inscripcion_dobles_torneo_id_categoria_id", "inscripcion_dobles", ["torneo_id", "categoria_id"], False),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, tabla, columnas, unique in INDICES:
+        op.create_index(nombre, tabla, columnas, unique=unique)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, tabla, _, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,113 @@
+"""estado materializado de partidos
+
+Revision ID: 8b2e4d6f1a3c
+Revises: 3f1a9c2b7d10
+Create Date: 2026-10-18 13:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a3c'
+down_revision: Union[str, None] = '3f1a9c2b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# definiciones congeladas: solo las columnas que lee el backfill, tal como estaban en esta revisión.
+# La migración no importa app.crud ni app.models para que cambios futuros no alteren su resultado.
+categoria = sa.table(
+    "categoria",
+    sa.column("id", sa.Integer),
+    sa.column("sets_por_partido", sa.Integer),
+    sa.column("puntos_por_set", sa.Integer),
+)
+partido = sa.table(
+    "partido",
+    sa.column("id", sa.Integer),
+    sa.column("categoria_id", sa.Integer),
+    sa.column("tipo", sa.String),
+    sa.column("jugador1_id", sa.Integer),
+    sa.column("jugador2_id", sa.Integer),
+    sa.column("equipo1_id", sa.Integer),
+    sa.column("equipo2_id", sa.Integer),
+)
+resultado_set = sa.table(
+    "resultado_set",
+    sa.column("partido_id", sa.Integer),
+    sa.column("numero_set", sa.Integer),
+    sa.column("puntos_jugador1", sa.Integer),
+    sa.column("puntos_jugador2", sa.Integer),
+)
+
+
+def _ganador_set(puntos_por_set, puntos1, puntos2):
+    # regla vigente en esta revisión: ganar por 2 alcanzando puntos_por_set (o 12-10, 13-11...)
+    if puntos1 >= puntos_por_set and puntos1 - puntos2 >= 2:
+        return 1
+    if puntos2 >= puntos_por_set and puntos2 - puntos1 >= 2:
+        return 2
+    if puntos1 >= puntos_por_set - 1 and puntos2 >= puntos_por_set - 1 and abs(puntos1 - puntos2) == 2:
+        return 1 if puntos1 > puntos2 else 2
+    return None
+
+
+def _estados(conexion):
+    categorias = {
+        c.id: c for c in conexion.execute(sa.select(categoria.c.id, categoria.c.sets_por_partido, categoria.c.puntos_por_set))
+    }
+    partidos = {
+        p.id: p for p in conexion.execute(
+            sa.select(partido).where(partido.c.id.in_(sa.select(resultado_set.c.partido_id).distinct()))
+        )
+    }
+    sets_ganados = {}
+    for rs in conexion.execute(sa.select(resultado_set).order_by(resultado_set.c.partido_id, resultado_set.c.numero_set)):
+        cat = categorias[partidos[rs.partido_id].categoria_id]
+        conteo = sets_ganados.setdefault(rs.partido_id, [0, 0])
+        ganador = _ganador_set(cat.puntos_por_set, rs.puntos_jugador1, rs.puntos_jugador2)
+        if ganador:
+            conteo[ganador - 1] += 1
+
+    for partido_id, (sets1, sets2) in sets_ganados.items():
+        p = partidos[partido_id]
+        sets_para_ganar = categorias[p.categoria_id].sets_por_partido // 2 + 1
+        individual = p.tipo == "individual"
+        ganador_id = None
+        if sets1 >= sets_para_ganar:
+            ganador_id = p.jugador1_id if individual else p.equipo1_id
+        elif sets2 >= sets_para_ganar:
+            ganador_id = p.jugador2_id if individual else p.equipo2_id
+        yield {
+            "partido_id": partido_id,
+            "sets_ganados1": sets1,
+            "sets_ganados2": sets2,
+            "finalizado": sets1 >= sets_para_ganar or sets2 >= sets_para_ganar,
+            "ganador_id": ganador_id,
+        }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    estado_partido = op.create_table(
+        "estado_partido",
+        sa.Column("partido_id", sa.Integer(), sa.ForeignKey("partido.id"), primary_key=True),
+        sa.Column("sets_ganados1", sa.Integer(), nullable=False),
+        sa.Column("sets_ganados2", sa.Integer(), nullable=False),
+        sa.Column("finalizado", sa.Boolean(), nullable=False),
+        sa.Column("ganador_id", sa.Integer(), nullable=True),
+    )
+
+    # poblar el estado de los partidos que ya tienen sets registrados
+    filas = list(_estados(op.get_bind()))
+    if filas:
+        op.bulk_insert(estado_partido, filas)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("estado_partido")
@@ -0,0 +1,59 @@
+"""indice de trigramas para buscar jugadores por nombre
+
+Revision ID: a9d3f5b7c2e8
+Revises: f7c2a9d4e6b1
+Create Date: 2026-10-18 19:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d3f5b7c2e8'
+down_revision: Union[str, None] = 'f7c2a9d4e6b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # estos objetos no están en models.py (dependen del motor); env.py los excluye del autogenerate
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX ix_jugador_nombre_trgm ON jugador USING gin (lower(nombre) gin_trgm_ops)")
+    elif dialecto == "sqlite":
+        # tabla FTS5 de contenido externo sobre jugador, sincronizada con triggers
+        op.execute("CREATE VIRTUAL TABLE jugador_fts USING fts5(nombre, content='jugador', content_rowid='id', tokenize='trigram')")
+        op.execute("INSERT INTO jugador_fts(jugador_fts) VALUES ('rebuild')")
+        op.execute("""
+            CREATE TRIGGER jugador_fts_ai AFTER INSERT ON jugador BEGIN
+                INSERT INTO jugador_fts(rowid, nombre) VALUES (new.id, new.nombre);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER jugador_fts_ad AFTER DELETE ON jugador BEGIN
+                INSERT INTO jugador_fts(jugador_fts, rowid, nombre) VALUES ('delete', old.id, old.nombre);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER jugador_fts_au AFTER UPDATE OF nombre ON jugador BEGIN
+                INSERT INTO jugador_fts(jugador_fts, rowid, nombre) VALUES ('delete', old.id, old.nombre);
+                INSERT INTO jugador_fts(rowid, nombre) VALUES (new.id, new.nombre);
+            END
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialecto = op.get_bind().dialect.name
+    if dialecto == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_jugador_nombre_trgm")
+    elif dialecto == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS jugador_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS jugador_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS jugador_fts_ai")
+        op.execute("DROP TABLE IF EXISTS jugador_fts")
@@ -0,0 +1,44 @@
+"""indices para los filtros del listado de partidos
+
+Revision ID: b6e1c8d4f2a7
+Revises: a9d3f5b7c2e8
+Create Date: 2026-10-18 20:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1c8d4f2a7'
+down_revision: Union[str, None] = 'a9d3f5b7c2e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, columnas); el de categoria/ronda/mesa reemplaza al de categoria_id sola
+INDICES = [
+    ("ix_partido_categoria_id_ronda_mesa", ["categoria_id", "ronda", "mesa"]),
+    ("ix_partido_torneo_id_horario", ["torneo_id", "horario"]),
+]
+REEMPLAZADOS = [
+    ("ix_partido_categoria_id", ["categoria_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, columnas in INDICES:
+        op.create_index(nombre, "partido", columnas)
+    for nombre, _ in REEMPLAZADOS:
+        op.drop_index(nombre, table_name="partido")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, columnas in REEMPLAZADOS:
+        op.create_index(nombre, "partido", columnas)
+    for nombre, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name="partido")
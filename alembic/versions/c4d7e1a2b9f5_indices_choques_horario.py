@@ -0,0 +1,50 @@
+"""indices para detectar choques de mesa y de participantes por horario
+
+Revision ID: c4d7e1a2b9f5
+Revises: 8b2e4d6f1a3c
+Create Date: 2026-10-18 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d7e1a2b9f5'
+down_revision: Union[str, None] = '8b2e4d6f1a3c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, columnas); los indices por participante reemplazan a los de una sola columna
+INDICES = [
+    ("ix_partido_torneo_id_mesa_horario", ["torneo_id", "mesa", "horario"]),
+    ("ix_partido_jugador1_id_horario", ["jugador1_id", "horario"]),
+    ("ix_partido_jugador2_id_horario", ["jugador2_id", "horario"]),
+    ("ix_partido_equipo1_id_horario", ["equipo1_id", "horario"]),
+    ("ix_partido_equipo2_id_horario", ["equipo2_id", "horario"]),
+]
+REEMPLAZADOS = [
+    ("ix_partido_jugador1_id", ["jugador1_id"]),
+    ("ix_partido_jugador2_id", ["jugador2_id"]),
+    ("ix_partido_equipo1_id", ["equipo1_id"]),
+    ("ix_partido_equipo2_id", ["equipo2_id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, columnas in INDICES:
+        op.create_index(nombre, "partido", columnas)
+    for nombre, _ in REEMPLAZADOS:
+        op.drop_index(nombre, table_name="partido")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, columnas in REEMPLAZADOS:
+        op.create_index(nombre, "partido", columnas)
+    for nombre, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name="partido")
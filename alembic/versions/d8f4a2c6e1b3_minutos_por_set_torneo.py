@@ -0,0 +1,31 @@
+"""duracion de set por torneo
+
+Revision ID: d8f4a2c6e1b3
+Revises: b6e1c8d4f2a7
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f4a2c6e1b3'
+down_revision: Union[str, None] = 'b6e1c8d4f2a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # los torneos existentes quedan con los 10 minutos que antes estaban fijos en el código
+    with op.batch_alter_table("torneo") as batch_op:
+        batch_op.add_column(sa.Column("minutos_por_set", sa.Integer(), nullable=False, server_default="10"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table("torneo") as batch_op:
+        batch_op.drop_column("minutos_por_set")
@@ -0,0 +1,35 @@
+"""version por tabla para ETag y Last-Modified
+
+Revision ID: e5a3b8c1d2f4
+Revises: c4d7e1a2b9f5
+Create Date: 2026-10-18 16:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a3b8c1d2f4'
+down_revision: Union[str, None] = 'c4d7e1a2b9f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # las filas se crean con la primera escritura de cada tabla
+    op.create_table(
+        "version_tabla",
+        sa.Column("tabla", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column("actualizado", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("tabla"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("version_tabla")
@@ -0,0 +1,62 @@
+"""ratings Elo de jugadores y equipos con historial
+
+Revision ID: f7c2a9d4e6b1
+Revises: e5a3b8c1d2f4
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7c2a9d4e6b1'
+down_revision: Union[str, None] = 'e5a3b8c1d2f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # para poblar con los partidos ya jugados: python -m app.ratings reconstruir
+    op.create_table(
+        "rating_jugador",
+        sa.Column("jugador_id", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.Float(), nullable=False),
+        sa.Column("partidos", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["jugador_id"], ["jugador.id"]),
+        sa.PrimaryKeyConstraint("jugador_id"),
+    )
+    op.create_table(
+        "rating_equipo",
+        sa.Column("equipo_id", sa.Integer(), nullable=False),
+        sa.Column("rating", sa.Float(), nullable=False),
+        sa.Column("partidos", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["equipo_id"], ["equipo_dobles.id"]),
+        sa.PrimaryKeyConstraint("equipo_id"),
+    )
+    op.create_table(
+        "historial_rating",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("partido_id", sa.Integer(), nullable=False),
+        sa.Column("tipo", sa.String(), nullable=False),
+        sa.Column("participante_id", sa.Integer(), nullable=False),
+        sa.Column("rating_antes", sa.Float(), nullable=False),
+        sa.Column("rating_despues", sa.Float(), nullable=False),
+        sa.Column("fecha", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["partido_id"], ["partido.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_historial_rating_partido_id", "historial_rating", ["partido_id"])
+    op.create_index("ix_historial_rating_tipo_participante_id", "historial_rating", ["tipo", "participante_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_historial_rating_tipo_participante_id", table_name="historial_rating")
+    op.drop_index("ix_historial_rating_partido_id", table_name="historial_rating")
+    op.drop_table("historial_rating")
+    op.drop_table("rating_equipo")
+    op.drop_table("rating_jugador")
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+
+class CacheLocal:
+    """
+    Caché en memoria del proceso con expiración (TTL) y desalojo LRU al superar max_entradas.
+    """
+
+    def __init__(self, ttl: float, max_entradas: int):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self._datos = OrderedDict()
+        self._generaciones = {} # sin TTL ni LRU: si se desalojara, una entrada vieja volvería a ser válida
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            vence, valor = entrada
+            if vence < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave: str, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def eliminar(self, clave: str):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def generacion(self, clave: str):
+        with self._lock:
+            return self._generaciones.get(clave, 0)
+
+    def incrementar_generacion(self, clave: str):
+        with self._lock:
+            self._generaciones[clave] = self._generaciones.get(clave, 0) + 1
+
+
+class CacheRedis:
+    """
+    Caché compartida entre procesos (varios workers). Los valores se guardan como JSON con TTL;
+    el desalojo lo maneja Redis según su maxmemory-policy. Si Redis no responde se trata como
+    un fallo de caché y se lee de la base de datos.
+    """
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_REFERENCIAS_URL requiere el paquete 'redis' instalado.")
+        self._errores = redis.RedisError
+        self._cliente = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def obtener(self, clave: str):
+        try:
+            valor = self._cliente.get(clave)
+        except self._errores:
+            return None
+        return json.loads(valor) if valor is not None else None
+
+    def guardar(self, clave: str, valor):
+        try:
+            self._cliente.setex(clave, max(1, int(self.ttl)), json.dumps(valor, default=_json_default))
+        except self._errores:
+            pass
+
+    def eliminar(self, clave: str):
+        try:
+            self._cliente.delete(clave)
+        except self._errores:
+            pass
+
+    def generacion(self, clave: str):
+        # None si Redis no responde: quien lee lo trata como fallo de caché
+        try:
+            return int(self._cliente.get("gen:" + clave) or 0)
+        except self._errores:
+            return None
+
+    def incrementar_generacion(self, clave: str):
+        # INCR es atómico entre workers; la llave no expira
+        try:
+            self._cliente.incr("gen:" + clave)
+        except self._errores:
+            pass
+
+
+def _json_default(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+class CacheReferencias:
+    """
+    Caché de lectura para entidades de referencia (Categoria, Torneo, Asociacion), que cambian
+    pocas veces por temporada pero se leen en casi todas las escrituras.
+    Guarda las columnas de la fila; al leer se reconstruye la instancia y se adjunta a la sesión
+    con merge(load=False), sin consultar la base. Las escrituras invalidan después del commit.
+
+    Cada llave tiene una generación que sube al invalidar. Quien va a leer de la base toma la generación
+    antes y la guarda junto con la fila; una entrada de una generación anterior no se usa, así una lectura
+    que se cruzó con una actualización no deja la fila vieja en caché.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.aciertos = {}
+        self.fallos = {}
+        self.invalidaciones = {}
+
+    @staticmethod
+    def _clave(modelo, id_: int):
+        return f"ref:{modelo.__tablename__}:{id_}"
+
+    def _contar(self, contador, modelo):
+        with self._lock:
+            contador[modelo.__tablename__] = contador.get(modelo.__tablename__, 0) + 1
+
+    def obtener(self, db, modelo, id_: int):
+        # retorna la instancia adjunta a db, o None si no estaba en caché
+        clave = self._clave(modelo, id_)
+        datos = self.backend.obtener(clave)
+        if datos is None or datos.get("_generacion") != self.backend.generacion(clave):
+            self._contar(self.fallos, modelo)
+            return None
+        # copia: la caché local entrega el mismo dict que guardó
+        datos = {k: v for k, v in datos.items() if k != "_generacion"}
+        self._contar(self.aciertos, modelo)
+        instancia = modelo(**_restaurar_tipos(modelo, datos))
+        make_transient_to_detached(instancia)
+        return db.merge(instancia, load=False)
+
+    def generacion(self, modelo, id_: int):
+        # se lee antes de consultar la base y se pasa a guardar()
+        return self.backend.generacion(self._clave(modelo, id_))
+
+    def guardar(self, instancia, generacion):
+        if generacion is None:
+            return
+        mapper = inspect(instancia).mapper
+        datos = {atributo.key: getattr(instancia, atributo.key) for atributo in mapper.column_attrs}
+        datos["_generacion"] = generacion
+        self.backend.guardar(self._clave(mapper.class_, mapper.primary_key_from_instance(instancia)[0]), datos)
+
+    def invalidar(self, modelo, id_: int):
+        # primero la generación: un guardar() en curso queda marcado como viejo aunque llegue después
+        self._contar(self.invalidaciones, modelo)
+        clave = self._clave(modelo, id_)
+        self.backend.incrementar_generacion(clave)
+        self.backend.eliminar(clave)
+
+    def resumen(self):
+        with self._lock:
+            tablas = set(self.aciertos) | set(self.fallos) | set(self.invalidaciones)
+            return {
+                "backend": type(self.backend).__name__,
+                "tablas": {
+                    tabla: {
+                        "aciertos": self.aciertos.get(tabla, 0),
+                        "fallos": self.fallos.get(tabla, 0),
+                        "invalidaciones": self.invalidaciones.get(tabla, 0),
+                    }
+                    for tabla in sorted(tablas)
+                },
+            }
+
+
+def _restaurar_tipos(modelo, datos):
+    # el backend JSON devuelve fechas como texto
+    for columna in modelo.__table__.columns:
+        valor = datos.get(columna.key)
+        if isinstance(valor, str):
+            if isinstance(columna.type, DateTime):
+                datos[columna.key] = datetime.fromisoformat(valor)
+            elif isinstance(columna.type, Date):
+                datos[columna.key] = date.fromisoformat(valor)
+    return datos
+
+
+def crear_backend():
+    """
+    CACHE_REFERENCIAS_URL (redis://...) activa la caché compartida; sin ella la caché es local al proceso.
+    CACHE_TTL en segundos (por defecto 300) y CACHE_MAX_ENTRADAS para la caché local (por defecto 1000).
+    """
+    ttl = float(os.getenv("CACHE_TTL", "300"))
+    url = os.getenv("CACHE_REFERENCIAS_URL")
+    if url:
+        return CacheRedis(url, ttl)
+    return CacheLocal(ttl, int(os.getenv("CACHE_MAX_ENTRADAS", "1000")))
+
+
+referencias = CacheReferencias(crear_backend())
@@ -0,0 +1,162 @@
+# clasificación de grupos: consulta agregada, desempates ITTF y caché por grupo
+#
+# los sets ganados salen del estado materializado (estado_partido), que se calcula con la
+# misma regla de set que determinar_ganador_partido; los puntos se suman de resultado_set.
+import os
+from itertools import groupby
+
+from sqlalchemy import case, func, select, union_all
+
+from . import cache, models
+
+PUNTOS_VICTORIA = 2
+PUNTOS_DERROTA = 1
+
+
+# consultas
+def _lados_partidos(grupo_id: int):
+    # una fila por jugador y partido finalizado del grupo, vista desde ese jugador
+    p = models.Partido.__table__
+    e = models.EstadoPartido.__table__
+    rs = models.ResultadoSet.__table__
+    puntos = (
+        select(rs.c.partido_id,
+               func.sum(rs.c.puntos_jugador1).label("puntos1"),
+               func.sum(rs.c.puntos_jugador2).label("puntos2"))
+        .group_by(rs.c.partido_id)
+        .subquery()
+    )
+    base = (
+        p.join(e, e.c.partido_id == p.c.id)
+        .outerjoin(puntos, puntos.c.partido_id == p.c.id)
+    )
+    filtro = (p.c.grupo_id == grupo_id) & (p.c.tipo == "individual") & e.c.finalizado.is_(True)
+
+    def lado(propio, rival, sets_favor, sets_contra, puntos_favor, puntos_contra):
+        return select(
+            propio.label("jugador_id"),
+            rival.label("rival_id"),
+            case((e.c.ganador_id == propio, 1), else_=0).label("ganado"),
+            sets_favor.label("sets_favor"),
+            sets_contra.label("sets_contra"),
+            func.coalesce(puntos_favor, 0).label("puntos_favor"),
+            func.coalesce(puntos_contra, 0).label("puntos_contra"),
+        ).select_from(base).where(filtro)
+
+    return union_all(
+        lado(p.c.jugador1_id, p.c.jugador2_id, e.c.sets_ganados1, e.c.sets_ganados2, puntos.c.puntos1, puntos.c.puntos2),
+        lado(p.c.jugador2_id, p.c.jugador1_id, e.c.sets_ganados2, e.c.sets_ganados1, puntos.c.puntos2, puntos.c.puntos1),
+    ).cte("lados")
+
+def consulta_estadisticas(grupo_id: int):
+    # totales por jugador del grupo; los que no han jugado quedan en cero (LEFT JOIN)
+    gp = models.grupo_participante.c
+    lados = _lados_partidos(grupo_id)
+    return (
+        select(
+            gp.jugador_id,
+            func.count(lados.c.jugador_id).label("partidos_jugados"),
+            func.coalesce(func.sum(lados.c.ganado), 0).label("partidos_ganados"),
+            func.coalesce(func.sum(lados.c.sets_favor), 0).label("sets_ganados"),
+            func.coalesce(func.sum(lados.c.sets_contra), 0).label("sets_perdidos"),
+            func.coalesce(func.sum(lados.c.puntos_favor), 0).label("puntos_favor"),
+            func.coalesce(func.sum(lados.c.puntos_contra), 0).label("puntos_contra"),
+        )
+        .select_from(models.grupo_participante.outerjoin(lados, lados.c.jugador_id == gp.jugador_id))
+        .where(gp.grupo_id == grupo_id)
+        .group_by(gp.jugador_id)
+    )
+
+def consulta_enfrentamientos(grupo_id: int):
+    # partidos uno a uno, solo se pide cuando hay empates que resolver
+    lados = _lados_partidos(grupo_id)
+    return select(lados)
+
+
+# desempates
+def _cociente(favor: int, contra: int):
+    if contra == 0:
+        return float("inf") if favor else 0.0
+    return favor / contra
+
+def _clave(fila):
+    return (
+        PUNTOS_VICTORIA * fila["partidos_ganados"] + PUNTOS_DERROTA * (fila["partidos_jugados"] - fila["partidos_ganados"]),
+        _cociente(fila["sets_ganados"], fila["sets_perdidos"]),
+        _cociente(fila["puntos_favor"], fila["puntos_contra"]),
+    )
+
+def _desempatar(empatados, enfrentamientos):
+    # reglamento ITTF: entre los empatados se cuentan solo los partidos jugados entre ellos
+    # (puntos de partido, luego cociente de sets y de puntos). Si eso separa a una parte,
+    # cada subgrupo que sigue empatado se vuelve a resolver solo con sus propios partidos.
+    ids = set(empatados)
+    mini = {j: {"partidos_jugados": 0, "partidos_ganados": 0, "sets_ganados": 0, "sets_perdidos": 0,
+                "puntos_favor": 0, "puntos_contra": 0} for j in ids}
+    for fila in enfrentamientos:
+        if fila["jugador_id"] in ids and fila["rival_id"] in ids:
+            m = mini[fila["jugador_id"]]
+            m["partidos_jugados"] += 1
+            m["partidos_ganados"] += fila["ganado"]
+            m["sets_ganados"] += fila["sets_favor"]
+            m["sets_perdidos"] += fila["sets_contra"]
+            m["puntos_favor"] += fila["puntos_favor"]
+            m["puntos_contra"] += fila["puntos_contra"]
+
+    ordenados = sorted(empatados, key=lambda j: _clave(mini[j]), reverse=True)
+    subgrupos = [list(g) for _, g in groupby(ordenados, key=lambda j: _clave(mini[j]))]
+    if len(subgrupos) == 1:
+        # no hay como separarlos con los partidos entre ellos: queda el orden por id
+        return sorted(empatados)
+    resultado = []
+    for subgrupo in subgrupos:
+        resultado.extend(subgrupo if len(subgrupo) == 1 else _desempatar(subgrupo, enfrentamientos))
+    return resultado
+
+def hay_empates(estadisticas):
+    puntos = [_clave(fila)[0] for fila in estadisticas]
+    return len(set(puntos)) < len(puntos)
+
+def ordenar(estadisticas, enfrentamientos):
+    # estadisticas: dicts por jugador con los totales del grupo.
+    # enfrentamientos: filas de consulta_enfrentamientos, solo hacen falta si hay_empates()
+    por_jugador = {fila["jugador_id"]: fila for fila in estadisticas}
+    puntos = {j: _clave(fila)[0] for j, fila in por_jugador.items()}
+    ordenados = sorted(por_jugador, key=lambda j: (-puntos[j], j))
+
+    orden = []
+    for _, grupo in groupby(ordenados, key=lambda j: puntos[j]):
+        grupo = list(grupo)
+        orden.extend(grupo if len(grupo) == 1 else _desempatar(grupo, enfrentamientos))
+
+    return [
+        {**por_jugador[j], "posicion": posicion, "puntos": puntos[j],
+         "partidos_perdidos": por_jugador[j]["partidos_jugados"] - por_jugador[j]["partidos_ganados"]}
+        for posicion, j in enumerate(orden, start=1)
+    ]
+
+
+# caché por grupo y firma de versiones. La firma sale de version_tabla (compartida por todos los
+# workers), leída antes que los datos: si otro proceso confirma un cambio la firma cambia y la entrada
+# vieja deja de usarse; TTL y LRU limitan lo que queda en memoria.
+TABLAS = ("grupo", "grupo_participante", "partido", "estado_partido", "resultado_set")
+
+def _crear_cache():
+    return cache.CacheLocal(float(os.getenv("CACHE_TTL", "300")), int(os.getenv("CACHE_MAX_ENTRADAS", "1000")))
+
+_cache = _crear_cache()
+
+def firma(versiones_tablas):
+    # versiones_tablas: resultado de versiones.leer(db, TABLAS)
+    return tuple(versiones_tablas[t][0] for t in TABLAS)
+
+def obtener(grupo_id: int, firma_leida):
+    return _cache.obtener((grupo_id, firma_leida))
+
+def guardar(grupo_id: int, firma_leida, clasificacion):
+    _cache.guardar((grupo_id, firma_leida), clasificacion)
+
+def invalidar():
+    # para cambios hechos fuera de una sesión de la API (p.ej. reconstruir_estados_partido desde un script)
+    global _cache
+    _cache = _crear_cache()
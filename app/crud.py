@@ -1,17 +1,21 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, or_, select, update
 from sqlalchemy.exc import IntegrityError
-from . import models, schemas 
-from datetime import date, datetime
+from pydantic import ValidationError
+from . import models, schemas, sorteos, paginacion, eventos, clasificacion, planificacion, cache, ratings
+from . import versiones # registra el contador de versión por tabla en las sesiones de SessionLocal
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 import random
+import time
 
 # funciones crud para jugador
 def get_jugador(db: Session, jugador_id: int):
     return db.query(models.Jugador).filter(models.Jugador.id == jugador_id).first()
 
-def get_jugadores(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Jugador).offset(skip).limit(limit).all()
+def get_jugadores(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.Jugador), [models.Jugador.id], skip, limit, cursor)
+    return consulta.all()
 
 def create_jugador(db: Session, jugador: schemas.JugadorCreate):
     db_jugador = models.Jugador(**jugador.dict())
@@ -38,12 +42,25 @@ def delete_jugador(db: Session, jugador_id: int):
     db.commit()
     return db_jugador # retorna el objeto eliminado si se encontro
 
+# lectura con caché de entidades de referencia (torneo, categoria, asociacion).
+# Las funciones update_ y delete_ leen directo de la base e invalidan después del commit.
+def _get_referencia(db: Session, modelo, id_: int):
+    instancia = cache.referencias.obtener(db, modelo, id_)
+    if instancia is None:
+        # la generación se toma antes de leer: si se invalida entre medio, lo guardado no se usará
+        generacion = cache.referencias.generacion(modelo, id_)
+        instancia = db.get(modelo, id_)
+        if instancia is not None:
+            cache.referencias.guardar(instancia, generacion)
+    return instancia
+
 # funciones crud para torneo
 def get_torneo(db: Session, torneo_id: int):
-    return db.query(models.Torneo).filter(models.Torneo.id == torneo_id).first()
+    return _get_referencia(db, models.Torneo, torneo_id)
 
-def get_torneos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Torneo).offset(skip).limit(limit).all()
+def get_torneos(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.Torneo), [models.Torneo.id], skip, limit, cursor)
+    return consulta.all()
 
 def create_torneo(db: Session, torneo: schemas.TorneoCreate):
     # validasiones de fechas
@@ -61,7 +78,7 @@ def create_torneo(db: Session, torneo: schemas.TorneoCreate):
     return db_torneo
 
 def update_torneo(db: Session, torneo_id: int, torneo_data: schemas.TorneoUpdate):
-    db_torneo = get_torneo(db, torneo_id)
+    db_torneo = db.get(models.Torneo, torneo_id)
     if not db_torneo:
         return None
     
@@ -97,23 +114,26 @@ def update_torneo(db: Session, torneo_id: int, torneo_data: schemas.TorneoUpdate
     for key, value in update_data.items():
         setattr(db_torneo, key, value)
     db.commit()
+    cache.referencias.invalidar(models.Torneo, torneo_id)
     db.refresh(db_torneo)
     return db_torneo
 
 def delete_torneo(db: Session, torneo_id: int):
-    db_torneo = get_torneo(db, torneo_id)
+    db_torneo = db.get(models.Torneo, torneo_id)
     if not db_torneo:
         return None
     db.delete(db_torneo)
     db.commit()
+    cache.referencias.invalidar(models.Torneo, torneo_id)
     return db_torneo
 
 # funciones crudf para categoria
 def get_categoria(db: Session, categoria_id: int):
-    return db.query(models.Categoria).filter(models.Categoria.id == categoria_id).first()
+    return _get_referencia(db, models.Categoria, categoria_id)
 
-def get_categorias(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Categoria).offset(skip).limit(limit).all()
+def get_categorias(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.Categoria), [models.Categoria.id], skip, limit, cursor)
+    return consulta.all()
 
 def create_categoria(db: Session, categoria: schemas.CategoriaCreate):
     # validaciones de reglas de categoria
@@ -131,7 +151,7 @@ def create_categoria(db: Session, categoria: schemas.CategoriaCreate):
     return db_categoria
 
 def update_categoria(db: Session, categoria_id: int, categoria_data: schemas.CategoriaUpdate):
-    db_categoria = get_categoria(db, categoria_id)
+    db_categoria = db.get(models.Categoria, categoria_id)
     if not db_categoria:
         return None
     
@@ -156,26 +176,29 @@ def update_categoria(db: Session, categoria_id: int, categoria_data: schemas.Cat
     for key, value in update_data.items():
         setattr(db_categoria, key, value)
     db.commit()
+    cache.referencias.invalidar(models.Categoria, categoria_id)
     db.refresh(db_categoria)
     return db_categoria
 
 def delete_categoria(db: Session, categoria_id: int):
-    db_categoria = get_categoria(db, categoria_id)
+    db_categoria = db.get(models.Categoria, categoria_id)
     if not db_categoria:
         return None
     db.delete(db_categoria)
     db.commit()
+    cache.referencias.invalidar(models.Categoria, categoria_id)
     return db_categoria
 
 # funciones crud para asociacion
 def get_asociacion(db: Session, asociacion_id: int):
-    return db.query(models.Asociacion).filter(models.Asociacion.id == asociacion_id).first()
+    return _get_referencia(db, models.Asociacion, asociacion_id)
 
 def get_asociacion_by_nombre(db: Session, nombre: str):
     return db.query(models.Asociacion).filter(models.Asociacion.nombre == nombre).first()
 
-def get_asociaciones(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Asociacion).offset(skip).limit(limit).all()
+def get_asociaciones(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.Asociacion), [models.Asociacion.id], skip, limit, cursor)
+    return consulta.all()
 
 def create_asociacion(db: Session, asociacion: schemas.AsociacionCreate):
     db_asociacion = models.Asociacion(**asociacion.dict())
@@ -189,13 +212,14 @@ def create_asociacion(db: Session, asociacion: schemas.AsociacionCreate):
         raise ValueError("Ya existe una asociación con este nombre.") 
 
 def update_asociacion(db: Session, asociacion_id: int, asociacion_data: schemas.AsociacionUpdate):
-    db_asociacion = get_asociacion(db, asociacion_id)
+    db_asociacion = db.get(models.Asociacion, asociacion_id)
     if not db_asociacion:
         return None
     for key, value in asociacion_data.dict(exclude_unset=True).items():
         setattr(db_asociacion, key, value)
     try:
         db.commit()
+        cache.referencias.invalidar(models.Asociacion, asociacion_id)
         db.refresh(db_asociacion)
         return db_asociacion
     except IntegrityError:
@@ -203,19 +227,48 @@ def update_asociacion(db: Session, asociacion_id: int, asociacion_data: schemas.
         raise ValueError("Ya existe otra asociación con el nombre proporcionado.")
 
 def delete_asociacion(db: Session, asociacion_id: int):
-    db_asociacion = get_asociacion(db, asociacion_id)
+    db_asociacion = db.get(models.Asociacion, asociacion_id)
     if not db_asociacion:
         return None
     db.delete(db_asociacion)
     db.commit()
+    cache.referencias.invalidar(models.Asociacion, asociacion_id)
     return db_asociacion
 
 # funciones crud para partido
 def get_partido(db: Session, partido_id: int):
     return db.query(models.Partido).filter(models.Partido.id == partido_id).first()
 
-def get_partidos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Partido).offset(skip).limit(limit).all()
+def filtros_partidos(filtros: Optional[schemas.FiltrosPartido]):
+    # condiciones del listado de partidos, compartidas con crud_async.
+    # Índices: torneo+categoria, categoria+ronda+mesa, torneo+mesa+horario, torneo+horario,
+    # grupo y jugador/equipo+horario para cada lado del partido
+    if filtros is None:
+        return []
+    condiciones = []
+    for campo in ("torneo_id", "categoria_id", "ronda", "mesa", "grupo_id", "bye"):
+        valor = getattr(filtros, campo)
+        if valor is not None:
+            condiciones.append(getattr(models.Partido, campo) == valor)
+    if filtros.horario_desde is not None:
+        condiciones.append(models.Partido.horario >= filtros.horario_desde)
+    if filtros.horario_hasta is not None:
+        condiciones.append(models.Partido.horario <= filtros.horario_hasta)
+    if filtros.jugador_id is not None:
+        equipos = select(models.EquipoDobles.id).where(
+            or_(models.EquipoDobles.jugador1_id == filtros.jugador_id, models.EquipoDobles.jugador2_id == filtros.jugador_id)
+        )
+        condiciones.append(or_(
+            models.Partido.jugador1_id == filtros.jugador_id,
+            models.Partido.jugador2_id == filtros.jugador_id,
+            models.Partido.equipo1_id.in_(equipos),
+            models.Partido.equipo2_id.in_(equipos),
+        ))
+    return condiciones
+
+def get_partidos(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: Optional[schemas.FiltrosPartido] = None):
+    consulta = db.query(models.Partido).filter(*filtros_partidos(filtros))
+    return paginacion.paginar(consulta, [models.Partido.id], skip, limit, cursor).all()
 
 def create_partido(db: Session, partido: schemas.PartidoCreate):
     # verificaciones de existencia de participantes
@@ -289,6 +342,9 @@ def update_partido(db: Session, partido_id: int, partido_data: schemas.PartidoUp
             raise ValueError(f"Mesa {update_dict['mesa']} no válida para el torneo. Mesas disponibles: 1 a {db_partido.torneo.mesas_disponibles}.")
 
 
+    if 'horario' in update_dict or 'mesa' in update_dict:
+        _choques_horario(db, db_partido, update_dict.get('horario') or db_partido.horario, update_dict.get('mesa') or db_partido.mesa)
+
     for key, value in update_dict.items():
         setattr(db_partido, key, value)
     db.commit()
@@ -299,10 +355,188 @@ def delete_partido(db: Session, partido_id: int):
     db_partido = get_partido(db, partido_id)
     if not db_partido:
         return None
+    _revertir_rating(db, partido_id)
+    # sus sets y su estado se van con él (la relación intentaría dejar partido_id en NULL)
+    db.query(models.ResultadoSet).filter(models.ResultadoSet.partido_id == partido_id).delete()
+    db.query(models.EstadoPartido).filter(models.EstadoPartido.partido_id == partido_id).delete()
+    db.expire(db_partido, ["resultados"])
     db.delete(db_partido)
     db.commit()
     return db_partido
 
+# estado materializado del partido (sets ganados y ganador), se actualiza en cada escritura de sets
+def _ganador_set(categoria: models.Categoria, puntos_jugador1: int, puntos_jugador2: int):
+    # retorna 1 o 2 según quién ganó el set, o None si el set no cuenta como ganado
+    # regla de tenis de mesa: ganar por al menos 2 puntos, y alcanzar el mínimo de puntos_por_set
+    if puntos_jugador1 >= categoria.puntos_por_set and (puntos_jugador1 - puntos_jugador2 >= 2):
+        return 1
+    if puntos_jugador2 >= categoria.puntos_por_set and (puntos_jugador2 - puntos_jugador1 >= 2):
+        return 2
+    # caso para sets con puntuación muy alta (ej. 11-10, 12-11)
+    if puntos_jugador1 >= (categoria.puntos_por_set - 1) and puntos_jugador2 >= (categoria.puntos_por_set - 1) and abs(puntos_jugador1 - puntos_jugador2) == 2:
+        return 1 if puntos_jugador1 > puntos_jugador2 else 2
+    return None
+
+def _calcular_estado_partido(partido: models.Partido, categoria: models.Categoria, resultados_sets):
+    sets_para_ganar = (categoria.sets_por_partido // 2) + 1
+    ganadores = [_ganador_set(categoria, rs.puntos_jugador1, rs.puntos_jugador2) for rs in resultados_sets]
+    sets_ganados1 = ganadores.count(1)
+    sets_ganados2 = ganadores.count(2)
+
+    ganador_id = None
+    if sets_ganados1 >= sets_para_ganar:
+        ganador_id = partido.jugador1_id if partido.tipo == "individual" else partido.equipo1_id
+    elif sets_ganados2 >= sets_para_ganar:
+        ganador_id = partido.jugador2_id if partido.tipo == "individual" else partido.equipo2_id
+
+    return {
+        "sets_ganados1": sets_ganados1,
+        "sets_ganados2": sets_ganados2,
+        "finalizado": sets_ganados1 >= sets_para_ganar or sets_ganados2 >= sets_para_ganar,
+        "ganador_id": ganador_id
+    }
+
+def _guardar_estado_partido(db: Session, partido: models.Partido, categoria: models.Categoria, resultados_sets):
+    # sin commit, queda en la misma transacción que el set que se escribió.
+    # retorna el estado y si el partido terminó con esta escritura
+    valores = _calcular_estado_partido(partido, categoria, resultados_sets)
+    estado = db.get(models.EstadoPartido, partido.id)
+    if estado is None:
+        estado = models.EstadoPartido(partido_id=partido.id)
+        db.add(estado)
+    finalizado_antes = bool(estado.finalizado)
+    ganador_antes = estado.ganador_id if finalizado_antes else None
+    for key, value in valores.items():
+        setattr(estado, key, value)
+
+    # ratings: si cambió el resultado del partido se deshace lo aplicado antes y se aplica el nuevo
+    ganador_nuevo = estado.ganador_id if estado.finalizado else None
+    if ganador_nuevo != ganador_antes:
+        if ganador_antes is not None:
+            _revertir_rating(db, partido.id)
+        if ganador_nuevo is not None:
+            _aplicar_rating(db, partido, ganador_nuevo)
+    return estado, estado.finalizado and not finalizado_antes
+
+def _rating_participante(db: Session, modelo, participante_id: int):
+    rating = db.get(modelo, participante_id)
+    if rating is None:
+        llave = "jugador_id" if modelo is models.RatingJugador else "equipo_id"
+        rating = modelo(**{llave: participante_id}, rating=ratings.RATING_INICIAL, partidos=0)
+        db.add(rating)
+        db.flush() # para que el siguiente db.get lo encuentre en el identity map
+    return rating
+
+def _aplicar_rating(db: Session, partido: models.Partido, ganador_id: int):
+    # actualización Elo incremental de los dos participantes, O(1) por partido
+    if partido.tipo == "individual":
+        modelo, participante1, participante2 = models.RatingJugador, partido.jugador1_id, partido.jugador2_id
+    else:
+        modelo, participante1, participante2 = models.RatingEquipo, partido.equipo1_id, partido.equipo2_id
+    if participante1 is None or participante2 is None:
+        return
+    rating1 = _rating_participante(db, modelo, participante1)
+    rating2 = _rating_participante(db, modelo, participante2)
+    antes1, antes2 = rating1.rating, rating2.rating
+    rating1.rating, rating2.rating = ratings.actualizar_par(antes1, antes2, ganador_id == participante1)
+    rating1.partidos += 1
+    rating2.partidos += 1
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.add_all([
+        models.HistorialRating(partido_id=partido.id, tipo=partido.tipo, participante_id=participante1,
+                               rating_antes=antes1, rating_despues=rating1.rating, fecha=ahora),
+        models.HistorialRating(partido_id=partido.id, tipo=partido.tipo, participante_id=participante2,
+                               rating_antes=antes2, rating_despues=rating2.rating, fecha=ahora)
+    ])
+
+def _revertir_rating(db: Session, partido_id: int):
+    # resta el cambio que dejó el partido (aunque después se hayan jugado otros) y borra su historial.
+    # Deriva conocida: los partidos posteriores ya se calcularon desde el rating que incluía este
+    # cambio y no se recalculan, así que su historial deja de encadenar (rating_antes de uno ya no es
+    # el rating_despues del anterior). La suma total se conserva; `python -m app.ratings reconstruir`
+    # deja los valores exactos.
+    for h in db.query(models.HistorialRating).filter(models.HistorialRating.partido_id == partido_id):
+        modelo = models.RatingJugador if h.tipo == "individual" else models.RatingEquipo
+        rating = db.get(modelo, h.participante_id)
+        if rating is not None:
+            rating.rating -= h.rating_despues - h.rating_antes
+            rating.partidos -= 1
+        db.delete(h)
+
+def _actualizar_estado_partido(db: Session, partido_id: int):
+    # recalcula el estado leyendo los sets ya enviados a la base (requiere flush previo)
+    partido = get_partido(db, partido_id)
+    if not partido:
+        return None, False
+    categoria = get_categoria(db, partido.categoria_id)
+    if not categoria:
+        return None, False
+    return _guardar_estado_partido(db, partido, categoria, get_resultados_set_by_partido(db, partido_id))
+
+def _eventos_resultado_set(partido: models.Partido, resultado: models.ResultadoSet, estado: models.EstadoPartido, recien_finalizado: bool):
+    # eventos en vivo para los marcadores, se arman antes del commit para no recargar los objetos
+    evento_set = {
+        "tipo": "set_registrado",
+        "torneo_id": partido.torneo_id,
+        "mesa": partido.mesa,
+        "partido_id": partido.id,
+        "numero_set": resultado.numero_set,
+        "puntos_jugador1": resultado.puntos_jugador1,
+        "puntos_jugador2": resultado.puntos_jugador2,
+        "sets_ganados1": estado.sets_ganados1,
+        "sets_ganados2": estado.sets_ganados2
+    }
+    eventos_partido = [evento_set]
+    if recien_finalizado:
+        eventos_partido.append({
+            "tipo": "partido_finalizado",
+            "torneo_id": partido.torneo_id,
+            "mesa": partido.mesa,
+            "partido_id": partido.id,
+            "ganador_id": estado.ganador_id,
+            "sets_ganados1": estado.sets_ganados1,
+            "sets_ganados2": estado.sets_ganados2
+        })
+    return eventos_partido
+
+def _publicar_eventos(eventos_partido):
+    for evento in eventos_partido:
+        eventos.difusor.publicar(eventos.canales_partido(evento["torneo_id"], evento["mesa"]), evento)
+
+def get_estado_partido(db: Session, partido_id: int):
+    return db.get(models.EstadoPartido, partido_id)
+
+def get_ganador_partido(db: Session, partido_id: int):
+    # lectura por llave primaria del estado materializado;
+    # un partido sin estado todavía no tiene sets registrados
+    estado = get_estado_partido(db, partido_id)
+    if estado:
+        return estado.ganador_id
+    if not get_partido(db, partido_id):
+        raise ValueError("Partido no encontrado.")
+    return None
+
+def reconstruir_estados_partido(db: Session):
+    # recalcula el estado de todos los partidos con sets (para poblar la tabla o verificarla)
+    categorias = {c.id: c for c in db.query(models.Categoria).all()}
+    sets_por_partido = {}
+    for rs in db.query(models.ResultadoSet).order_by(models.ResultadoSet.partido_id, models.ResultadoSet.numero_set):
+        sets_por_partido.setdefault(rs.partido_id, []).append(rs)
+
+    db.query(models.EstadoPartido).delete()
+    filas = []
+    partidos = db.query(models.Partido).filter(
+        models.Partido.id.in_(select(models.ResultadoSet.partido_id).distinct())
+    )
+    for partido in partidos:
+        valores = _calcular_estado_partido(partido, categorias[partido.categoria_id], sets_por_partido[partido.id])
+        filas.append({"partido_id": partido.id, **valores})
+    if filas:
+        db.execute(models.EstadoPartido.__table__.insert(), filas)
+    db.commit()
+    clasificacion.invalidar()
+    return len(filas)
+
 # funciones crud para ResultadoSet
 def create_resultado_set(db: Session, data: schemas.ResultadoSetCreate):
     # Validaciones adicionales:
@@ -329,6 +563,8 @@ def create_resultado_set(db: Session, data: schemas.ResultadoSetCreate):
     resultado = models.ResultadoSet(**data.dict())
     db.add(resultado)
     try:
+        db.flush()
+        _guardar_estado_partido(db, partido, categoria, sets_existentes + [resultado])
         db.commit()
         db.refresh(resultado)
         return resultado
@@ -340,8 +576,9 @@ def create_resultado_set(db: Session, data: schemas.ResultadoSetCreate):
 def get_resultado_set(db: Session, resultado_id: int):
     return db.query(models.ResultadoSet).filter_by(id=resultado_id).first()
 
-def get_resultados_set(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.ResultadoSet).offset(skip).limit(limit).all()
+def get_resultados_set(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.ResultadoSet), [models.ResultadoSet.id], skip, limit, cursor)
+    return consulta.all()
 
 def get_resultados_set_by_partido(db: Session, partido_id: int):
     return db.query(models.ResultadoSet).filter(models.ResultadoSet.partido_id == partido_id).order_by(models.ResultadoSet.numero_set).all()
@@ -361,17 +598,29 @@ def update_resultado_set(db: Session, resultado_id: int, data: schemas.Resultado
     if 'puntos_jugador2' in update_dict and update_dict['puntos_jugador2'] < 0:
         raise ValueError("Los puntos del jugador 2 no pueden ser negativos.")
 
+    partido_anterior_id = resultado.partido_id
     for key, value in update_dict.items():
         setattr(resultado, key, value)
-    db.commit()
-    db.refresh(resultado)
-    return resultado
+    numero_set, partido_id = resultado.numero_set, resultado.partido_id
+    try:
+        db.flush()
+        _actualizar_estado_partido(db, partido_id)
+        if partido_anterior_id != partido_id:
+            _actualizar_estado_partido(db, partido_anterior_id)
+        db.commit()
+        db.refresh(resultado)
+        return resultado
+    except IntegrityError:
+        db.rollback()
+        raise ValueError(f"El set número {numero_set} ya ha sido registrado para el partido {partido_id}.")
 
 def delete_resultado_set(db: Session, resultado_id: int):
     resultado = get_resultado_set(db, resultado_id)
     if not resultado:
         return None
     db.delete(resultado)
+    db.flush()
+    _actualizar_estado_partido(db, resultado.partido_id)
     db.commit()
     return resultado
 
@@ -399,8 +648,9 @@ def create_grupo(db: Session, grupo: schemas.GrupoCreate):
 def get_grupo(db: Session, grupo_id: int):
     return db.query(models.Grupo).filter_by(id=grupo_id).first()
 
-def get_grupos(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Grupo).offset(skip).limit(limit).all()
+def get_grupos(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.Grupo), [models.Grupo.id], skip, limit, cursor)
+    return consulta.all()
 
 def update_grupo(db: Session, grupo_id: int, update: schemas.GrupoUpdate):
     grupo = get_grupo(db, grupo_id)
@@ -461,8 +711,9 @@ def create_equipo_dobles(db: Session, equipo: schemas.EquipoDoblesCreate):
         db.rollback()
         raise ValueError("Ya existe un equipo con estos jugadores.")
 
-def get_equipos_dobles(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.EquipoDobles).offset(skip).limit(limit).all()
+def get_equipos_dobles(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    consulta = paginacion.paginar(db.query(models.EquipoDobles), [models.EquipoDobles.id], skip, limit, cursor)
+    return consulta.all()
 
 def get_equipo_dobles(db: Session, equipo_id: int):
     return db.query(models.EquipoDobles).filter(models.EquipoDobles.id == equipo_id).first()
@@ -509,6 +760,20 @@ def delete_equipo_dobles(db: Session, equipo_id: int):
     db.commit()
     return equipo
 
+# validaciones compartidas por la inscripción individual, la de dobles y la importación masiva
+def _validar_periodo_inscripcion(torneo: models.Torneo, hoy: date):
+    # Validar que la inscripcion esté dentro de las fechas de inscripción del torneo
+    if not (torneo.fecha_inscripcion_inicio <= hoy <= torneo.fecha_inscripcion_fin):
+        raise ValueError("El torneo no está en período de inscripción.")
+
+def _validar_jugador_categoria(jugador: models.Jugador, categoria: models.Categoria, hoy: date):
+    # Validar que el jugador cumpla con los requisitos de edad y género de la categoría
+    edad_jugador = hoy.year - jugador.fecha_nacimiento.year - ((hoy.month, hoy.day) < (jugador.fecha_nacimiento.month, jugador.fecha_nacimiento.day))
+    if not (categoria.edad_min <= edad_jugador <= categoria.edad_max):
+        raise ValueError(f"El jugador no cumple con el rango de edad ({categoria.edad_min}-{categoria.edad_max}) de la categoría.")
+    if jugador.genero != categoria.genero:
+        raise ValueError(f"El género del jugador ('{jugador.genero}') no coincide con el género de la categoría ('{categoria.genero}').")
+
 # funciones para inscripciones individuales 
 def create_inscripcion(db: Session, inscripcion: schemas.InscripcionCreate):
     # Validar que jugador, torneo y categoría existan
@@ -522,17 +787,10 @@ def create_inscripcion(db: Session, inscripcion: schemas.InscripcionCreate):
     if not categoria:
         raise ValueError(f"Categoría con ID {inscripcion.categoria_id} no encontrada para la inscripción.")
 
-    # Validar que la inscripcion esté dentro de las fechas de inscripción del torneo
+    # Validar fechas de inscripción, edad y género
     hoy = date.today()
-    if not (torneo.fecha_inscripcion_inicio <= hoy <= torneo.fecha_inscripcion_fin):
-        raise ValueError("El torneo no está en período de inscripción.")
-
-    # Validar que el jugador cumpla con los requisitos de edad y género de la categoría
-    edad_jugador = hoy.year - jugador.fecha_nacimiento.year - ((hoy.month, hoy.day) < (jugador.fecha_nacimiento.month, jugador.fecha_nacimiento.day))
-    if not (categoria.edad_min <= edad_jugador <= categoria.edad_max):
-        raise ValueError(f"El jugador no cumple con el rango de edad ({categoria.edad_min}-{categoria.edad_max}) de la categoría.")
-    if jugador.genero != categoria.genero:
-        raise ValueError(f"El género del jugador ('{jugador.genero}') no coincide con el género de la categoría ('{categoria.genero}').")
+    _validar_periodo_inscripcion(torneo, hoy)
+    _validar_jugador_categoria(jugador, categoria, hoy)
 
     # Verificar si ya está inscrito
     existe = db.execute(
@@ -566,9 +824,10 @@ def delete_inscripcion(db: Session, jugador_id: int, torneo_id: int, categoria_i
     db.commit()
     return result.rowcount > 0 # retorna true si se elimino al menos una fila
 
-def get_inscripciones(db: Session, skip: int = 0, limit: int = 100):
-
-    results = db.execute(models.inscripcion.select().offset(skip).limit(limit)).fetchall()
+def get_inscripciones(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.inscripcion.c
+    stmt = paginacion.paginar(models.inscripcion.select(), [c.jugador_id, c.torneo_id, c.categoria_id], skip, limit, cursor)
+    results = db.execute(stmt).fetchall()
     return [schemas.InscripcionOut(**r._asdict()) for r in results]
 
 def get_inscripcion(db: Session, jugador_id: int, torneo_id: int, categoria_id: int):
@@ -597,9 +856,7 @@ def create_inscripcion_dobles(db: Session, inscripcion: schemas.InscripcionDoble
         raise ValueError(f"Categoría con ID {inscripcion.categoria_id} no encontrada para la inscripción.")
 
     # Validar que la inscripción esté dentro de las fechas de inscripción del torneo
-    hoy = date.today()
-    if not (torneo.fecha_inscripcion_inicio <= hoy <= torneo.fecha_inscripcion_fin):
-        raise ValueError("El torneo no está en período de inscripción.")
+    _validar_periodo_inscripcion(torneo, date.today())
 
     # Verificar si ya está inscrito
     existe = db.execute(
@@ -632,8 +889,10 @@ def delete_inscripcion_dobles(db: Session, equipo_id: int, torneo_id: int, categ
     db.commit()
     return result.rowcount > 0
 
-def get_inscripciones_dobles(db: Session, skip: int = 0, limit: int = 100):
-    results = db.execute(models.inscripcion_dobles.select().offset(skip).limit(limit)).fetchall()
+def get_inscripciones_dobles(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.inscripcion_dobles.c
+    stmt = paginacion.paginar(models.inscripcion_dobles.select(), [c.equipo_id, c.torneo_id, c.categoria_id], skip, limit, cursor)
+    results = db.execute(stmt).fetchall()
     return [schemas.InscripcionDoblesOut(**r._asdict()) for r in results]
 
 def get_inscripcion_dobles(db: Session, equipo_id: int, torneo_id: int, categoria_id: int):
@@ -648,6 +907,104 @@ def get_inscripcion_dobles(db: Session, equipo_id: int, torneo_id: int, categori
         return schemas.InscripcionDoblesOut(**result._asdict())
     return None
 
+# importación masiva de inscripciones (individuales y dobles)
+def _insert_ignorando_duplicados(db: Session, tabla):
+    # INSERT ... ON CONFLICT DO NOTHING según el motor
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"La importación masiva no está soportada para el motor '{dialecto}'.")
+    return insert(tabla).on_conflict_do_nothing()
+
+def _en_lotes(filas, tamano_lote: int):
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= tamano_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+def _detalle_validacion(error: ValidationError):
+    return "; ".join(f"{'.'.join(str(c) for c in e['loc'])}: {e['msg']}" for e in error.errors())
+
+def _importar_inscripciones(db: Session, filas, tamano_lote: int, tabla, esquema, campo_participante: str,
+                            modelo_participante, nombre_participante: str, validar_participante):
+    # filas: iterable de (numero_de_fila, dict). Se procesa por lotes: por cada lote se cargan
+    # participantes, torneos y categorías con consultas IN, se valida en memoria y se insertan las
+    # filas válidas en un solo INSERT ... ON CONFLICT DO NOTHING con commit por lote.
+    hoy = date.today()
+    torneos = {}
+    categorias = {}
+    reporte = schemas.ImportacionOut(insertadas=0, duplicadas=0, errores=[])
+
+    for lote in _en_lotes(filas, tamano_lote):
+        inscripciones = []
+        for numero_fila, fila in lote:
+            try:
+                inscripciones.append((numero_fila, esquema(**fila)))
+            except ValidationError as e:
+                reporte.errores.append(schemas.ErrorImportacion(fila=numero_fila, detalle=_detalle_validacion(e)))
+            except TypeError:
+                reporte.errores.append(schemas.ErrorImportacion(fila=numero_fila, detalle="Formato de fila inválido."))
+
+        ids_participantes = {getattr(i, campo_participante) for _, i in inscripciones}
+        participantes = {p.id: p for p in db.query(modelo_participante).filter(modelo_participante.id.in_(ids_participantes))}
+        # torneos y categorías se repiten entre lotes, solo se cargan los que faltan
+        faltan = {i.torneo_id for _, i in inscripciones} - torneos.keys()
+        if faltan:
+            torneos.update({t.id: t for t in db.query(models.Torneo).filter(models.Torneo.id.in_(faltan))})
+        faltan = {i.categoria_id for _, i in inscripciones} - categorias.keys()
+        if faltan:
+            categorias.update({c.id: c for c in db.query(models.Categoria).filter(models.Categoria.id.in_(faltan))})
+
+        validas = []
+        for numero_fila, inscripcion in inscripciones:
+            participante_id = getattr(inscripcion, campo_participante)
+            participante = participantes.get(participante_id)
+            torneo = torneos.get(inscripcion.torneo_id)
+            categoria = categorias.get(inscripcion.categoria_id)
+            try:
+                if not participante:
+                    raise ValueError(f"{nombre_participante} con ID {participante_id} no encontrado para la inscripción.")
+                if not torneo:
+                    raise ValueError(f"Torneo con ID {inscripcion.torneo_id} no encontrado para la inscripción.")
+                if not categoria:
+                    raise ValueError(f"Categoría con ID {inscripcion.categoria_id} no encontrada para la inscripción.")
+                _validar_periodo_inscripcion(torneo, hoy)
+                validar_participante(participante, categoria, hoy)
+            except ValueError as e:
+                reporte.errores.append(schemas.ErrorImportacion(fila=numero_fila, detalle=str(e)))
+                continue
+            validas.append(inscripcion.dict())
+
+        if validas:
+            # RETURNING solo trae las filas que se insertaron, el resto ya existía
+            stmt = _insert_ignorando_duplicados(db, tabla).returning(*tabla.primary_key.columns)
+            try:
+                insertadas = len(db.execute(stmt, validas).fetchall())
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                raise ValueError("Error al insertar un lote de inscripciones.")
+            reporte.insertadas += insertadas
+            reporte.duplicadas += len(validas) - insertadas
+
+    return reporte
+
+def importar_inscripciones(db: Session, filas, tamano_lote: int = 1000):
+    return _importar_inscripciones(db, filas, tamano_lote, models.inscripcion, schemas.InscripcionCreate, "jugador_id",
+                                   models.Jugador, "Jugador", _validar_jugador_categoria)
+
+def importar_inscripciones_dobles(db: Session, filas, tamano_lote: int = 1000):
+    # igual que la inscripción de dobles de a una: solo se valida el período de inscripción
+    return _importar_inscripciones(db, filas, tamano_lote, models.inscripcion_dobles, schemas.InscripcionDoblesCreate, "equipo_id",
+                                   models.EquipoDobles, "Equipo de dobles", lambda equipo, categoria, hoy: None)
+
 # funciones para Grupo Participante
 def create_grupo_participante(db: Session, grupo_participante: schemas.GrupoParticipanteCreate):
     # Validar que grupo y jugador existan
@@ -685,10 +1042,29 @@ def delete_grupo_participante(db: Session, grupo_id: int, jugador_id: int):
     db.commit()
     return result.rowcount > 0
 
-def get_grupo_participantes(db: Session, skip: int = 0, limit: int = 100):
-    results = db.execute(models.grupo_participante.select().offset(skip).limit(limit)).fetchall()
+def get_grupo_participantes(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.grupo_participante.c
+    stmt = paginacion.paginar(models.grupo_participante.select(), [c.grupo_id, c.jugador_id], skip, limit, cursor)
+    results = db.execute(stmt).fetchall()
+    return [schemas.GrupoParticipanteOut(**r._asdict()) for r in results]
+
+def get_participantes_grupo(db: Session, grupo_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    # participantes de un solo grupo, el filtro va en SQL y usa la llave primaria (grupo_id, jugador_id)
+    c = models.grupo_participante.c
+    stmt = paginacion.paginar(models.grupo_participante.select().where(c.grupo_id == grupo_id), [c.jugador_id], skip, limit, cursor)
+    results = db.execute(stmt).fetchall()
     return [schemas.GrupoParticipanteOut(**r._asdict()) for r in results]
 
+def get_participantes_grupo_con_jugador(db: Session, grupo_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    # igual que get_participantes_grupo pero trae los datos del jugador en el mismo join
+    c = models.grupo_participante.c
+    consulta = db.query(models.Jugador).join(models.grupo_participante, c.jugador_id == models.Jugador.id).filter(c.grupo_id == grupo_id)
+    jugadores = paginacion.paginar(consulta, [c.jugador_id], skip, limit, cursor).all()
+    return [
+        schemas.GrupoParticipanteDetalleOut(grupo_id=grupo_id, jugador_id=j.id, jugador=schemas.JugadorOut.model_validate(j))
+        for j in jugadores
+    ]
+
 def get_grupo_participante(db: Session, grupo_id: int, jugador_id: int):
     result = db.execute(
         models.grupo_participante.select().where(
@@ -701,141 +1077,339 @@ def get_grupo_participante(db: Session, grupo_id: int, jugador_id: int):
     return None
 
 
+def _insertar_partidos(db: Session, filas: List[dict]):
+    # insercion masiva de partidos en un solo statement (sin commit),
+    # retorna los partidos creados ordenados por id
+    if not filas:
+        return []
+    tabla = models.Partido.__table__
+    stmt = tabla.insert().returning(*tabla.c)
+    resultados = db.execute(stmt, filas).fetchall()
+    return sorted((schemas.PartidoOut(**r._asdict()) for r in resultados), key=lambda p: p.id)
+
+def _filas_partidos_grupo(grupo_id: int, torneo_id: int, categoria_id: int, cruces, horario: datetime):
+    # filas de partido de fase de grupos para _insertar_partidos
+    return [{
+        "tipo": "individual",
+        "torneo_id": torneo_id,
+        "categoria_id": categoria_id,
+        "horario": horario,
+        "mesa": 1,
+        "ronda": "Fase de Grupos",
+        "bye": False,
+        "posicion_llave": None,
+        "partido_ganador_id": None,
+        "jugador1_id": jugador1_id,
+        "jugador2_id": jugador2_id,
+        "equipo1_id": None, # no aplica para individuales
+        "equipo2_id": None,
+        "grupo_id": grupo_id
+    } for jugador1_id, jugador2_id in cruces]
+
 def generar_partidos_grupo(db: Session, grupo_id: int):
 
     grupo = get_grupo(db, grupo_id)
     if not grupo:
         raise ValueError("Grupo no encontrado")
 
-    # Obtener los jugadores en el grupo
-    jugadores_en_grupo = db.query(models.Jugador).join(models.grupo_participante).filter(
-        models.grupo_participante.c.grupo_id == grupo_id
-    ).all()
+    # Obtener los ids de los jugadores en el grupo
+    jugadores_ids = db.execute(
+        select(models.grupo_participante.c.jugador_id)
+        .where(models.grupo_participante.c.grupo_id == grupo_id)
+        .order_by(models.grupo_participante.c.jugador_id)
+    ).scalars().all()
 
-    if len(jugadores_en_grupo) < 2:
+    if len(jugadores_ids) < 2:
         raise ValueError("Se necesitan al menos dos jugadores para generar partidos en el grupo.")
 
-    partidos_generados = []
+    # cargar en una sola consulta los cruces que ya existen en el grupo (sin importar el orden)
+    existentes = db.query(models.Partido.jugador1_id, models.Partido.jugador2_id).filter(
+        models.Partido.torneo_id == grupo.torneo_id,
+        models.Partido.categoria_id == grupo.categoria_id,
+        models.Partido.grupo_id == grupo.id,
+        models.Partido.tipo == "individual"
+    ).all()
+    cruces_existentes = {frozenset(cruce) for cruce in existentes}
+
     # Generar partidos de todos contra todos
-    for i in range(len(jugadores_en_grupo)):
-        for j in range(i + 1, len(jugadores_en_grupo)):
-            jugador1 = jugadores_en_grupo[i]
-            jugador2 = jugadores_en_grupo[j]
-
-            existing_match = db.query(models.Partido).filter(
-                models.Partido.torneo_id == grupo.torneo_id,
-                models.Partido.categoria_id == grupo.categoria_id,
-                models.Partido.grupo_id == grupo.id,
-                models.Partido.tipo == "individual",
-                # Verificar ambos ordenes de jugadores
-                ((models.Partido.jugador1_id == jugador1.id) & (models.Partido.jugador2_id == jugador2.id)) |
-                ((models.Partido.jugador1_id == jugador2.id) & (models.Partido.jugador2_id == jugador1.id))
-            ).first()
-
-            if existing_match:
-                print(f"Partido entre {jugador1.nombre} y {jugador2.nombre} ya existe en el grupo {grupo.nombre}. Saltando.")
-                continue
+    cruces = [c for c in sorteos.todos_contra_todos(jugadores_ids) if frozenset(c) not in cruces_existentes]
+    nuevos = _filas_partidos_grupo(grupo.id, grupo.torneo_id, grupo.categoria_id, cruces, datetime.now())
 
-            partido_data = schemas.PartidoCreate(
-                tipo="individual",
-                torneo_id=grupo.torneo_id,
-                categoria_id=grupo.categoria_id,
-                horario=datetime.now(), 
-                mesa=1,                 
-                ronda="Fase de Grupos",
-                bye=False,
-                jugador1_id=jugador1.id,
-                jugador2_id=jugador2.id,
-                equipo1_id=None, # no aplica para individuales
-                equipo2_id=None, # No aplica para individuale
-                grupo_id=grupo.id
-            )
-            try:
-                db_partido = create_partido(db, partido_data)
-                partidos_generados.append(db_partido)
-            except ValueError as e:
-                print(f"Error al crear partido en grupo: {e}")
-                db.rollback() 
+    # todos los partidos nuevos se insertan en una sola transaccion
+    try:
+        partidos_generados = _insertar_partidos(db, nuevos)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Error al generar los partidos del grupo.")
 
     return partidos_generados
 
+def _participantes_individuales(db: Session, torneo_id: int, categoria_id: Optional[int] = None):
+    # inscritos individuales como (categoria_id, jugador_id, rating, asociacion_id); sin rating = rating inicial
+    consulta = (
+        select(
+            models.inscripcion.c.categoria_id,
+            models.inscripcion.c.jugador_id,
+            func.coalesce(models.RatingJugador.rating, ratings.RATING_INICIAL),
+            models.Jugador.asociacion_id,
+        )
+        .join(models.Jugador, models.Jugador.id == models.inscripcion.c.jugador_id)
+        .outerjoin(models.RatingJugador, models.RatingJugador.jugador_id == models.inscripcion.c.jugador_id)
+        .where(models.inscripcion.c.torneo_id == torneo_id)
+    )
+    if categoria_id is not None:
+        consulta = consulta.where(models.inscripcion.c.categoria_id == categoria_id)
+    return db.execute(consulta).all()
+
+def _insertar_grupos(db: Session, torneo_id: int, repartos, generar_partidos: bool, horario: datetime):
+    # inserta los grupos sorteados, sus participantes y opcionalmente sus partidos (sin commit).
+    # repartos: lista de (categoria_id, [[jugador_ids] por grupo]).
+    # Retorna {categoria_id: ([GrupoSorteadoOut], partidos creados)}
+    filas_grupo = [
+        {"nombre": sorteos.nombre_grupo(i), "torneo_id": torneo_id, "categoria_id": categoria_id}
+        for categoria_id, reparto in repartos for i in range(len(reparto))
+    ]
+    if not filas_grupo:
+        return {}
+    tabla = models.Grupo.__table__
+    ids = {
+        (categoria_id, nombre): id_ for id_, categoria_id, nombre in
+        db.execute(tabla.insert().returning(tabla.c.id, tabla.c.categoria_id, tabla.c.nombre), filas_grupo)
+    }
+    resultado = {}
+    participantes = []
+    partidos = []
+    for categoria_id, reparto in repartos:
+        grupos = []
+        num_partidos = 0
+        for i, jugadores_ids in enumerate(reparto):
+            nombre = sorteos.nombre_grupo(i)
+            grupo = schemas.GrupoSorteadoOut(id=ids[(categoria_id, nombre)], nombre=nombre, jugadores_ids=jugadores_ids)
+            grupos.append(grupo)
+            participantes += [{"grupo_id": grupo.id, "jugador_id": jugador_id} for jugador_id in jugadores_ids]
+            if generar_partidos:
+                filas = _filas_partidos_grupo(grupo.id, torneo_id, categoria_id, sorteos.todos_contra_todos(jugadores_ids), horario)
+                partidos += filas
+                num_partidos += len(filas)
+        resultado[categoria_id] = (grupos, num_partidos)
+    if participantes:
+        db.execute(models.grupo_participante.insert(), participantes)
+    _insertar_partidos(db, partidos)
+    return resultado
+
+def sortear_grupos(db: Session, torneo_id: int, categoria_id: int, parametros: schemas.SorteoGruposCreate):
+    # sorteo de la fase de grupos desde las inscripciones individuales: siembra en serpiente por rating
+    # separando asociaciones (sorteos.repartir_grupos) y todo insertado en una sola transacción
+    if not get_torneo(db, torneo_id):
+        raise ValueError(f"Torneo con ID {torneo_id} no encontrado.")
+    if not get_categoria(db, categoria_id):
+        raise ValueError(f"Categoría con ID {categoria_id} no encontrada.")
+    ya_sorteado = db.query(models.Grupo.id).filter(
+        models.Grupo.torneo_id == torneo_id, models.Grupo.categoria_id == categoria_id
+    ).first()
+    if ya_sorteado:
+        raise ValueError("La categoría ya tiene grupos en este torneo.")
+
+    participantes = [tuple(p[1:]) for p in _participantes_individuales(db, torneo_id, categoria_id)]
+    if len(participantes) < 2 * parametros.num_grupos:
+        raise ValueError(f"Se necesitan al menos {2 * parametros.num_grupos} inscritos para {parametros.num_grupos} grupos (hay {len(participantes)}).")
+
+    reparto = sorteos.repartir_grupos(participantes, parametros.num_grupos)
+    try:
+        grupos, num_partidos = _insertar_grupos(db, torneo_id, [(categoria_id, reparto)], parametros.generar_partidos, datetime.now())[categoria_id]
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Error al guardar el sorteo de grupos.")
+    return schemas.SorteoGruposOut(grupos=grupos, partidos_creados=num_partidos)
+
+CAMPOS_PARTICIPANTE = {"individual": ("jugador1_id", "jugador2_id"), "dobles": ("equipo1_id", "equipo2_id")}
+
+def _insertar_llaves(db: Session, torneo_id: int, llaves, horario: datetime):
+    # inserta llaves de eliminación (sin commit). llaves: lista de (categoria_id, tipo_partido, rondas)
+    # con las rondas de sorteos.construir_llave.
+    # Se inserta desde la final hacia la primera ronda para poder enlazar partido_ganador_id,
+    # con un insert masivo por nivel de ronda que incluye a todas las llaves.
+    # Retorna {(categoria_id, tipo_partido): partidos de la primera ronda a la final, por posición}
+    generados = {(categoria_id, tipo): [] for categoria_id, tipo, _ in llaves}
+    ids_ronda_siguiente = {(categoria_id, tipo): {} for categoria_id, tipo, _ in llaves}
+    for nivel in range(max((len(rondas) for _, _, rondas in llaves), default=0)):
+        filas = []
+        for categoria_id, tipo_partido, rondas in llaves:
+            if nivel >= len(rondas):
+                continue
+            numero_ronda = len(rondas) - nivel
+            campo1, campo2 = CAMPOS_PARTICIPANTE[tipo_partido]
+            siguientes = ids_ronda_siguiente[(categoria_id, tipo_partido)]
+            for posicion, cruce in enumerate(rondas[numero_ronda - 1], start=1):
+                fila = {
+                    "tipo": tipo_partido,
+                    "torneo_id": torneo_id,
+                    "categoria_id": categoria_id,
+                    "horario": horario,
+                    "mesa": 1,
+                    "ronda": f"Ronda {numero_ronda}",
+                    "bye": cruce["bye"],
+                    "posicion_llave": posicion,
+                    "partido_ganador_id": siguientes.get((posicion + 1) // 2),
+                    "jugador1_id": None,
+                    "jugador2_id": None,
+                    "equipo1_id": None,
+                    "equipo2_id": None,
+                    "grupo_id": None    # no aplica para eliminación directa
+                }
+                fila[campo1] = cruce["participante1"]
+                fila[campo2] = cruce["participante2"]
+                filas.append(fila)
+
+        creados = {}
+        for partido in _insertar_partidos(db, filas):
+            creados.setdefault((partido.categoria_id, partido.tipo), []).append(partido)
+        for llave, partidos in creados.items():
+            partidos.sort(key=lambda p: p.posicion_llave)
+            ids_ronda_siguiente[llave] = {p.posicion_llave: p.id for p in partidos}
+            generados[llave] = partidos + generados[llave]
+    return generados
+
 def generar_llave_eliminacion(db: Session, torneo_id: int, categoria_id: int, participantes_ids: List[int], tipo_partido: str):
 
     if not participantes_ids:
         return []
 
-    num_participantes = len(participantes_ids)
-    
-    # Determinar la potencia de 2 más cercana y mayor o igual al número de participantes
-    llave_size = 2
-    while llave_size < num_participantes:
-        llave_size *= 2
-    
-    num_byes = llave_size - num_participantes
+    if tipo_partido not in CAMPOS_PARTICIPANTE:
+        raise ValueError("Tipo de partido inválido para generación de llave. Debe ser 'individual' o 'dobles'.")
+
+    # los partidos se insertan sin pasar por create_partido: se validan aquí los participantes,
+    # repetidos y existencia (una sola consulta IN)
+    vistos, repetidos = set(), set()
+    for participante_id in participantes_ids:
+        (repetidos if participante_id in vistos else vistos).add(participante_id)
+    if repetidos:
+        raise ValueError(f"Participantes repetidos en la llave: {sorted(repetidos)}.")
+    modelo = models.Jugador if tipo_partido == "individual" else models.EquipoDobles
+    existentes = set(db.execute(select(modelo.id).where(modelo.id.in_(participantes_ids))).scalars())
+    faltantes = sorted(set(participantes_ids) - existentes)
+    if faltantes:
+        entidad = "Jugadores" if tipo_partido == "individual" else "Equipos de dobles"
+        raise ValueError(f"{entidad} no encontrados: {faltantes}.")
 
     # Mezcla participantes para una distribución aleatoria
     random.shuffle(participantes_ids)
-    
-    # crea un arreglo para la llave, inicializado con None (para Byes)
-    llave_participantes = [None] * llave_size
-    
-    # Llenar las primeras posiciones con los participantes reales
-    for i in range(num_participantes):
-        llave_participantes[i] = participantes_ids[i]
-
+    rondas = sorteos.construir_llave(participantes_ids)
 
-    partidos_generados = []
-    ronda_actual = "Ronda 1"
-    
-    # Crea partidos de la primera ronda
-    for i in range(0, llave_size, 2):
-        participante1_id = llave_participantes[i]
-        participante2_id = llave_participantes[i+1] if i+1 < llave_size else None 
-
-        is_bye_match = (participante1_id is None) or (participante2_id is None)
-
-        partido_data_common = {
-            "tipo": tipo_partido,
-            "torneo_id": torneo_id,
-            "categoria_id": categoria_id,
-            "horario": datetime.now(), 
-            "mesa": 1,                 
-            "ronda": ronda_actual,
-            "bye": is_bye_match,
-            "posicion_llave": i // 2 + 1,
-            "partido_ganador_id": None, # se llenará cuando se genere la siguiente ronda
-            "grupo_id": None    # no aplica para eliminación directa
-        }
-
-        if tipo_partido == "individual":
-            partido_data = schemas.PartidoCreate(
-                jugador1_id=participante1_id,
-                jugador2_id=participante2_id,
-                equipo1_id=None,
-                equipo2_id=None,
-                **partido_data_common
-            )
-        elif tipo_partido == "dobles":
-            partido_data = schemas.PartidoCreate(
-                jugador1_id=None,
-                jugador2_id=None,
-                equipo1_id=participante1_id,
-                equipo2_id=participante2_id,
-                **partido_data_common
-            )
-        else:
-            raise ValueError("Tipo de partido inválido para generación de llave. Debe ser 'individual' o 'dobles'.")
-
-        try:
-            db_partido = create_partido(db, partido_data)
-            partidos_generados.append(db_partido)
-        except ValueError as e:
-            print(f"Error al crear partido en llave de eliminación: {e}")
-            db.rollback()
+    # todas las rondas en una sola transaccion
+    try:
+        partidos_generados = _insertar_llaves(db, torneo_id, [(categoria_id, tipo_partido, rondas)], datetime.now())[(categoria_id, tipo_partido)]
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Error al generar la llave de eliminación.")
 
-    
     return partidos_generados
 
+def construir_torneo(db: Session, torneo_id: int, parametros: schemas.ConstruccionTorneoCreate):
+    # Sorteo de todas las categorías del torneo: lee las inscripciones (dos consultas), calcula los sorteos
+    # en paralelo con sorteos.sortear_categorias (procesos, sin base de datos) y escribe todo con inserts
+    # masivos en una sola transacción.
+    if not get_torneo(db, torneo_id):
+        raise ValueError(f"Torneo con ID {torneo_id} no encontrado.")
+    ya_construido = (
+        db.query(models.Partido.id).filter(models.Partido.torneo_id == torneo_id).first()
+        or db.query(models.Grupo.id).filter(models.Grupo.torneo_id == torneo_id).first()
+    )
+    if ya_construido:
+        raise ValueError("El torneo ya tiene grupos o partidos generados.")
+
+    tareas = {}
+    def tarea(categoria_id):
+        if categoria_id not in tareas:
+            tareas[categoria_id] = {
+                "categoria_id": categoria_id,
+                "individuales": [],
+                "dobles": [],
+                "formato_individual": parametros.formato_individual,
+                "jugadores_por_grupo": parametros.jugadores_por_grupo,
+                "semilla": parametros.semilla,
+            }
+        return tareas[categoria_id]
+    for categoria_id, jugador_id, rating, asociacion_id in _participantes_individuales(db, torneo_id):
+        tarea(categoria_id)["individuales"].append((jugador_id, rating, asociacion_id))
+    for categoria_id, equipo_id in db.execute(
+        select(models.inscripcion_dobles.c.categoria_id, models.inscripcion_dobles.c.equipo_id)
+        .where(models.inscripcion_dobles.c.torneo_id == torneo_id)
+    ):
+        tarea(categoria_id)["dobles"].append(equipo_id)
+    if not tareas:
+        raise ValueError("El torneo no tiene inscripciones.")
+
+    lista_tareas = [tareas[c] for c in sorted(tareas)]
+    inicio = time.perf_counter()
+    resultados = sorteos.sortear_categorias(lista_tareas, parametros.procesos)
+    segundos_calculo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    horario = datetime.now()
+    try:
+        grupos = _insertar_grupos(db, torneo_id, [(r["categoria_id"], r["grupos"]) for r in resultados if r["grupos"]], True, horario)
+        llaves = _insertar_llaves(db, torneo_id, [
+            (r["categoria_id"], tipo, r[campo])
+            for r in resultados for tipo, campo in (("individual", "llave_individual"), ("dobles", "llave_dobles")) if r[campo]
+        ], horario)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Error al guardar el sorteo del torneo.")
+    segundos_escritura = time.perf_counter() - inicio
+
+    categorias = []
+    for r in resultados:
+        grupos_categoria, partidos_grupos = grupos.get(r["categoria_id"], ([], 0))
+        partidos_llave = sum(len(llaves.get((r["categoria_id"], tipo), [])) for tipo in CAMPOS_PARTICIPANTE)
+        categorias.append(schemas.CategoriaConstruidaOut(
+            categoria_id=r["categoria_id"],
+            grupos=grupos_categoria,
+            partidos_creados=partidos_grupos + partidos_llave,
+            segundos=r["segundos"],
+        ))
+    return schemas.ConstruccionTorneoOut(categorias=categorias, segundos_calculo=segundos_calculo, segundos_escritura=segundos_escritura)
+
+def _colocar_ganador(partido_actual: models.Partido, siguiente_partido: models.Partido, ganador_id: int, es_equipo: bool):
+    # deja al ganador en el lado que le corresponde del siguiente partido (sin commit)
+    if es_equipo:
+        campo1, campo2 = "equipo1_id", "equipo2_id"
+        lado_ocupado = "ya tiene un equipo asignado"
+        ambos_ocupados = "El siguiente partido ya tiene ambos equipos asignados."
+    else: # Es jugador
+        campo1, campo2 = "jugador1_id", "jugador2_id"
+        lado_ocupado = "ya tiene un jugador asignado"
+        ambos_ocupados = "El siguiente partido ya tiene ambos jugadores asignados."
+
+    if partido_actual.posicion_llave is not None:
+        # en la llave, posiciones impares llegan al lado 1 y pares al lado 2
+        campo = campo1 if partido_actual.posicion_llave % 2 == 1 else campo2
+        if getattr(siguiente_partido, campo) not in (None, ganador_id):
+            raise ValueError(f"El lado del siguiente partido que corresponde a este cruce {lado_ocupado}.")
+        setattr(siguiente_partido, campo, ganador_id)
+    elif getattr(siguiente_partido, campo1) is None:
+        setattr(siguiente_partido, campo1, ganador_id)
+    elif getattr(siguiente_partido, campo2) is None:
+        setattr(siguiente_partido, campo2, ganador_id)
+    else:
+        raise ValueError(ambos_ocupados)
+
+def _evento_ganador_avanzado(partido_id: int, siguiente_partido: models.Partido, ganador_id: int):
+    return {
+        "tipo": "ganador_avanzado",
+        "torneo_id": siguiente_partido.torneo_id,
+        "mesa": siguiente_partido.mesa,
+        "partido_id": partido_id,
+        "ganador_id": ganador_id,
+        "siguiente_partido_id": siguiente_partido.id,
+        "ronda": siguiente_partido.ronda,
+        "posicion_llave": siguiente_partido.posicion_llave
+    }
+
 def avanzar_ganador(db: Session, partido_actual_id: int, ganador_id: int, es_equipo: bool = False):
   
     partido_actual = get_partido(db, partido_actual_id)
@@ -849,24 +1423,11 @@ def avanzar_ganador(db: Session, partido_actual_id: int, ganador_id: int, es_equ
     if not siguiente_partido:
         raise ValueError("Siguiente partido en la llave no encontrado.")
 
-    # Determina si el ganador es jugador o equipo
-    if es_equipo:
-        if siguiente_partido.equipo1_id is None:
-            siguiente_partido.equipo1_id = ganador_id
-        elif siguiente_partido.equipo2_id is None:
-            siguiente_partido.equipo2_id = ganador_id
-        else:
-            raise ValueError("El siguiente partido ya tiene ambos equipos asignados.")
-    else: # Es jugador
-        if siguiente_partido.jugador1_id is None:
-            siguiente_partido.jugador1_id = ganador_id
-        elif siguiente_partido.jugador2_id is None:
-            siguiente_partido.jugador2_id = ganador_id
-        else:
-            raise ValueError("El siguiente partido ya tiene ambos jugadores asignados.")
-    
+    _colocar_ganador(partido_actual, siguiente_partido, ganador_id, es_equipo)
+
     db.commit()
     db.refresh(siguiente_partido)
+    _publicar_eventos([_evento_ganador_avanzado(partido_actual_id, siguiente_partido, ganador_id)])
     return siguiente_partido
 
 def asignar_horario_mesa(db: Session, partido_id: int, horario: datetime, mesa: int):
@@ -883,6 +1444,7 @@ def asignar_horario_mesa(db: Session, partido_id: int, horario: datetime, mesa:
         raise ValueError(f"Torneo asociado al partido con ID {partido.torneo_id} no encontrado.")
     if mesa <= 0 or mesa > torneo.mesas_disponibles:
         raise ValueError(f"Mesa {mesa} no válida para el torneo. Mesas disponibles: 1 a {torneo.mesas_disponibles}.")
+    _choques_horario(db, partido, horario, mesa)
 
     partido.horario = horario
     partido.mesa = mesa
@@ -890,6 +1452,131 @@ def asignar_horario_mesa(db: Session, partido_id: int, horario: datetime, mesa:
     db.refresh(partido)
     return partido
 
+def _choques_horario(db: Session, partido: models.Partido, horario: datetime, mesa: int):
+    # valida que la mesa y los participantes estén libres en [horario, horario + duración).
+    # Solo se buscan partidos que empiezan dentro de la ventana (horario - duración máxima, fin):
+    # son rangos sobre los índices (torneo_id, mesa, horario) y (participante, horario).
+    # La duración de cada partido es sets_por_partido de su categoría * minutos_por_set de su torneo,
+    # la misma que usa planificar_torneo. Sets de la categoría y cotas de la ventana salen en una consulta.
+    sets_por_partido, max_sets, max_minutos = db.execute(
+        select(
+            models.Categoria.sets_por_partido,
+            select(func.max(models.Categoria.sets_por_partido)).scalar_subquery(),
+            select(func.max(models.Torneo.minutos_por_set)).scalar_subquery(),
+        ).where(models.Categoria.id == partido.categoria_id)
+    ).one()
+    duracion = timedelta(minutes=sets_por_partido * partido.torneo.minutos_por_set)
+    duracion_maxima = timedelta(minutes=max_sets * max_minutos)
+    fin = horario + duracion
+
+    def chocan(condicion):
+        filas = db.execute(
+            select(models.Partido.id, models.Partido.horario, models.Categoria.sets_por_partido, models.Torneo.minutos_por_set)
+            .join(models.Categoria, models.Categoria.id == models.Partido.categoria_id)
+            .join(models.Torneo, models.Torneo.id == models.Partido.torneo_id)
+            .where(condicion & (models.Partido.horario > horario - duracion_maxima) & (models.Partido.horario < fin) &
+                   (models.Partido.id != partido.id) & models.Partido.bye.isnot(True))
+        ).fetchall()
+        for f in filas:
+            if f.horario + timedelta(minutes=f.sets_por_partido * f.minutos_por_set) > horario:
+                return f
+        return None
+
+    otro = chocan((models.Partido.torneo_id == partido.torneo_id) & (models.Partido.mesa == mesa))
+    if otro:
+        raise ValueError(f"La mesa {mesa} ya está ocupada por el partido {otro.id} ({otro.horario:%Y-%m-%d %H:%M}).")
+
+    if partido.tipo == "individual":
+        participantes = [("Jugador", models.Partido.jugador1_id, models.Partido.jugador2_id, j) for j in (partido.jugador1_id, partido.jugador2_id)]
+    else:
+        participantes = [("Equipo", models.Partido.equipo1_id, models.Partido.equipo2_id, e) for e in (partido.equipo1_id, partido.equipo2_id)]
+    for nombre, columna1, columna2, participante_id in participantes:
+        if participante_id is None:
+            continue
+        # dos rangos, uno por índice, en vez de un OR que obliga a recorrer
+        otro = chocan(columna1 == participante_id) or chocan(columna2 == participante_id)
+        if otro:
+            raise ValueError(f"{nombre} {participante_id} ya juega el partido {otro.id} ({otro.horario:%Y-%m-%d %H:%M}) en ese horario.")
+
+def planificar_torneo(db: Session, torneo_id: int, parametros: schemas.PlanificacionCreate):
+    # asigna horario y mesa a todos los partidos pendientes del torneo (sin sets registrados y que no son bye).
+    # Los partidos que ya empezaron quedan fijos y ocupan su mesa y sus jugadores en la agenda.
+    torneo = get_torneo(db, torneo_id)
+    if not torneo:
+        raise ValueError("Torneo no encontrado.")
+
+    p = models.Partido.__table__
+    e = models.EstadoPartido.__table__
+    filas = db.execute(
+        select(p.c.id, p.c.tipo, p.c.categoria_id, p.c.partido_ganador_id, p.c.horario, p.c.mesa,
+               p.c.jugador1_id, p.c.jugador2_id, p.c.equipo1_id, p.c.equipo2_id,
+               e.c.partido_id.is_(None).label("pendiente"))
+        .select_from(p.outerjoin(e, e.c.partido_id == p.c.id))
+        .where((p.c.torneo_id == torneo_id) & p.c.bye.isnot(True))
+    ).fetchall()
+    if not any(f.pendiente for f in filas):
+        return schemas.PlanificacionOut(planificados=0)
+
+    sets_por_categoria = dict(db.execute(
+        select(models.Categoria.id, models.Categoria.sets_por_partido)
+        .where(models.Categoria.id.in_({f.categoria_id for f in filas}))
+    ).fetchall())
+    # en dobles el descanso se cuenta por cada jugador del equipo
+    ids_equipos = {f.equipo1_id for f in filas} | {f.equipo2_id for f in filas}
+    ids_equipos.discard(None)
+    jugadores_equipo = {}
+    if ids_equipos:
+        jugadores_equipo = {
+            eq.id: (eq.jugador1_id, eq.jugador2_id)
+            for eq in db.execute(
+                select(models.EquipoDobles.id, models.EquipoDobles.jugador1_id, models.EquipoDobles.jugador2_id)
+                .where(models.EquipoDobles.id.in_(ids_equipos))
+            )
+        }
+
+    origen = planificacion.a_datetime(torneo.fecha_inicio, 0)
+    agenda = planificacion.AgendaTorneo()
+    partidos = []
+    for f in filas:
+        if f.tipo == "dobles":
+            jugadores = [j for eq in (f.equipo1_id, f.equipo2_id) if eq in jugadores_equipo for j in jugadores_equipo[eq]]
+        else:
+            jugadores = [j for j in (f.jugador1_id, f.jugador2_id) if j is not None]
+        duracion = sets_por_categoria[f.categoria_id] * torneo.minutos_por_set
+        if f.pendiente:
+            partidos.append({"id": f.id, "duracion": duracion, "jugadores": jugadores, "siguiente": f.partido_ganador_id})
+        else:
+            inicio = int((f.horario - origen).total_seconds() // 60)
+            agenda.agregar_partido(f.id, inicio, duracion, f.mesa, jugadores, parametros.descanso_minutos)
+
+    inicio_minimo = 0
+    if parametros.desde is not None:
+        inicio_minimo = max(0, int((parametros.desde - origen).total_seconds() // 60))
+    asignaciones = planificacion.planificar(
+        partidos,
+        mesas=torneo.mesas_disponibles,
+        dias=(torneo.fecha_fin - torneo.fecha_inicio).days + 1,
+        hora_inicio=parametros.hora_inicio,
+        hora_fin=parametros.hora_fin,
+        descanso=parametros.descanso_minutos,
+        inicio_minimo=inicio_minimo,
+        agenda=agenda
+    )
+
+    # un solo UPDATE masivo por llave primaria
+    db.execute(update(models.Partido), [
+        {"id": partido_id, "horario": planificacion.a_datetime(torneo.fecha_inicio, inicio), "mesa": mesa}
+        for partido_id, (inicio, mesa) in asignaciones.items()
+    ])
+    db.commit()
+
+    duraciones = {pt["id"]: pt["duracion"] for pt in partidos}
+    return schemas.PlanificacionOut(
+        planificados=len(asignaciones),
+        inicio=planificacion.a_datetime(torneo.fecha_inicio, min(inicio for inicio, _ in asignaciones.values())),
+        fin=planificacion.a_datetime(torneo.fecha_inicio, max(inicio + duraciones[pid] for pid, (inicio, _) in asignaciones.items()))
+    )
+
 def registrar_resultado_set(db: Session, resultado_set_data: schemas.ResultadoSetCreate):
 
     #Registra el resultado de un set para un partido.
@@ -916,19 +1603,149 @@ def registrar_resultado_set(db: Session, resultado_set_data: schemas.ResultadoSe
     resultado = models.ResultadoSet(**resultado_set_data.dict())
     db.add(resultado)
     try:
+        db.flush()
+        estado, recien_finalizado = _guardar_estado_partido(db, partido, categoria, sets_existentes + [resultado])
+        eventos_partido = _eventos_resultado_set(partido, resultado, estado, recien_finalizado)
         db.commit()
         db.refresh(resultado)
-        return resultado
     except IntegrityError:
         db.rollback()
         raise ValueError(f"El set número {resultado_set_data.numero_set} ya ha sido registrado para el partido {resultado_set_data.partido_id}.")
 
+    _publicar_eventos(eventos_partido)
+    return resultado
+
+
+def _avanzar_ganadores_lote(db: Session, partidos, categorias, sets_por_partido, estados, ultimo_indice):
+    # coloca en el siguiente partido a los ganadores de los partidos que terminan con el lote,
+    # antes de escribir nada: así un avance imposible deja fuera solo los sets de ese partido.
+    # retorna [(partido, siguiente_partido, ganador_id)] y {partido_id: motivo} de los rechazados
+    terminan = {}
+    for partido_id in ultimo_indice:
+        partido = partidos[partido_id]
+        if not partido.partido_ganador_id:
+            continue
+        valores = _calcular_estado_partido(partido, categorias[partido.categoria_id], sets_por_partido[partido_id])
+        estado = estados.get(partido_id)
+        if valores["finalizado"] and not (estado and estado.finalizado):
+            terminan[partido_id] = valores["ganador_id"]
+    if not terminan:
+        return [], {}
+
+    siguientes = {p.id: p for p in db.query(models.Partido).filter(
+        models.Partido.id.in_({partidos[pid].partido_ganador_id for pid in terminan}))}
+    avanzados, rechazados = [], {}
+    for partido_id, ganador_id in terminan.items():
+        partido = partidos[partido_id]
+        siguiente_partido = siguientes.get(partido.partido_ganador_id)
+        if not siguiente_partido:
+            rechazados[partido_id] = "Siguiente partido en la llave no encontrado."
+            continue
+        try:
+            _colocar_ganador(partido, siguiente_partido, ganador_id, partido.tipo == "dobles")
+        except ValueError as e:
+            rechazados[partido_id] = str(e)
+            continue
+        avanzados.append((partido, siguiente_partido, ganador_id))
+    return avanzados, rechazados
+
+def registrar_resultados_set_lote(db: Session, resultados: List[schemas.ResultadoSetCreate], avanzar_ganadores: bool = False):
+
+    # Registra muchos sets (de distintos partidos) en una sola transacción.
+    # Partidos, categorías, sets y estados se cargan de una vez y cada set se valida en memoria;
+    # los que no pasan se informan en "errores" con su índice y el resto se inserta.
+    # Con avanzar_ganadores, si el ganador de un partido no puede avanzar en la llave no se registra
+    # ninguno de los sets de ese partido en el lote (cada uno queda en "errores"); los demás partidos sí.
+
+    partido_ids = {r.partido_id for r in resultados}
+    partidos = {p.id: p for p in db.query(models.Partido).filter(models.Partido.id.in_(partido_ids))}
+    categoria_ids = {p.categoria_id for p in partidos.values()}
+    categorias = {c.id: c for c in db.query(models.Categoria).filter(models.Categoria.id.in_(categoria_ids))}
+    sets_por_partido = {pid: [] for pid in partidos}
+    for rs in db.query(models.ResultadoSet).filter(models.ResultadoSet.partido_id.in_(partidos.keys())).order_by(
+            models.ResultadoSet.partido_id, models.ResultadoSet.numero_set):
+        sets_por_partido[rs.partido_id].append(rs)
+    # deja los estados en el identity map para que _guardar_estado_partido no consulte de a uno
+    estados = {e.partido_id: e for e in db.query(models.EstadoPartido).filter(models.EstadoPartido.partido_id.in_(partidos.keys()))}
+
+    errores = []
+    creados = []
+    ultimo_indice = {}
+    for indice, data in enumerate(resultados):
+        partido = partidos.get(data.partido_id)
+        if not partido:
+            errores.append(schemas.ErrorLote(indice=indice, detalle=f"Partido con ID {data.partido_id} no encontrado."))
+            continue
+        categoria = categorias.get(partido.categoria_id)
+        if not categoria:
+            errores.append(schemas.ErrorLote(indice=indice, detalle=f"Categoría del partido con ID {partido.categoria_id} no encontrada."))
+            continue
+
+        sets_existentes = sets_por_partido[partido.id]
+        if any(rs.numero_set == data.numero_set for rs in sets_existentes):
+            errores.append(schemas.ErrorLote(indice=indice, detalle=f"El set número {data.numero_set} ya ha sido registrado para el partido {data.partido_id}."))
+            continue
+        if data.numero_set > len(sets_existentes) + 1:
+            errores.append(schemas.ErrorLote(indice=indice, detalle=f"El set número {data.numero_set} no es el siguiente set consecutivo. El siguiente set esperado es {len(sets_existentes) + 1}."))
+            continue
+        if data.numero_set > categoria.sets_por_partido:
+            errores.append(schemas.ErrorLote(indice=indice, detalle=f"Número de set inválido ({data.numero_set}). La categoría '{categoria.nombre}' solo permite hasta {categoria.sets_por_partido} sets."))
+            continue
+
+        resultado = models.ResultadoSet(**data.dict())
+        sets_existentes.append(resultado) # los siguientes sets del lote ven este
+        creados.append((indice, resultado))
+        ultimo_indice[partido.id] = indice
+
+    avanzados = []
+    if avanzar_ganadores:
+        avanzados, rechazados = _avanzar_ganadores_lote(db, partidos, categorias, sets_por_partido, estados, ultimo_indice)
+        for indice, resultado in creados:
+            if resultado.partido_id in rechazados:
+                errores.append(schemas.ErrorLote(indice=indice, detalle=f"{rechazados[resultado.partido_id]} Los sets del partido {resultado.partido_id} en este lote no se registraron."))
+        creados = [(indice, r) for indice, r in creados if r.partido_id not in rechazados]
+        for partido_id in rechazados:
+            del ultimo_indice[partido_id]
+        errores.sort(key=lambda e: e.indice)
+    creados = [r for _, r in creados]
+
+    if not creados:
+        return schemas.ResultadoSetLoteOut(creados=[], errores=errores, finalizados=[])
+
+    eventos_lote = []
+    finalizados = []
+    try:
+        db.add_all(creados)
+        db.flush()
+
+        for partido_id in ultimo_indice:
+            partido = partidos[partido_id]
+            sets_partido = sets_por_partido[partido_id]
+            estado, recien_finalizado = _guardar_estado_partido(db, partido, categorias[partido.categoria_id], sets_partido)
+            eventos_lote += _eventos_resultado_set(partido, sets_partido[-1], estado, recien_finalizado)
+            if recien_finalizado:
+                finalizados.append(schemas.EstadoPartidoOut.model_validate(estado))
+
+        for partido, siguiente_partido, ganador_id in avanzados:
+            eventos_lote.append(_evento_ganador_avanzado(partido.id, siguiente_partido, ganador_id))
+
+        db.flush()
+        salida = [schemas.ResultadoSetOut.model_validate(r) for r in creados]
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Error al registrar el lote de sets. Algún set pudo ser registrado por otra solicitud al mismo tiempo.")
+
+    _publicar_eventos(eventos_lote)
+    return schemas.ResultadoSetLoteOut(creados=salida, errores=errores, finalizados=finalizados)
+
 
 def determinar_ganador_partido(db: Session, partido_id: int):
    
     #Determina el ganador de un partido basándose en los resultados de los sets
     #y las reglas de la categoría.
     #Retorna el ID del ganador (jugador o equipo) o None si el partido no ha terminado.
+    #La API lee el estado materializado (get_ganador_partido); este cálculo completo queda para verificarlo.
    
     partido = get_partido(db, partido_id)
     if not partido:
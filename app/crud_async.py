@@ -0,0 +1,236 @@
+# versiones async de las funciones de lectura de crud.py, usadas por las rutas GET
+from sqlalchemy import case, func, literal_column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from typing import Optional
+from . import models, schemas, paginacion, clasificacion, serializacion, ratings, versiones
+from .crud import filtros_partidos
+
+async def _listar(db: AsyncSession, modelo, skip: int, limit: int, cursor: Optional[str]):
+    stmt = paginacion.paginar(select(modelo), [modelo.id], skip, limit, cursor)
+    return (await db.execute(stmt)).scalars().all()
+
+async def get_filas(db: AsyncSession, tabla, esquema, llave, skip: int, limit: int, cursor: Optional[str], condiciones=()):
+    # listado en modo rápido: filas Core con solo las columnas del esquema de salida
+    stmt = select(*serializacion.columnas_esquema(tabla, esquema)).where(*condiciones)
+    stmt = paginacion.paginar(stmt, [tabla.c[c] for c in llave], skip, limit, cursor)
+    return (await db.execute(stmt)).fetchall()
+
+# jugador
+async def get_jugador(db: AsyncSession, jugador_id: int):
+    return await db.get(models.Jugador, jugador_id)
+
+async def get_jugadores(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.Jugador, skip, limit, cursor)
+
+# búsqueda por nombre: índice de trigramas (pg_trgm en Postgres, FTS5 trigram en SQLite).
+# Orden: coincidencia exacta, prefijo del nombre, prefijo de una palabra y después cualquier subcadena.
+CAMPOS_CURSOR_BUSQUEDA = ["rango", "nombre_orden", "jugador_id"]
+
+def _filtro_nombre(dialecto: str, nombre, termino: str):
+    if dialecto == "sqlite":
+        if len(termino) < 3:
+            # el tokenizador trigram no encuentra términos de menos de 3 caracteres
+            return nombre.startswith(termino, autoescape=True)
+        frase = '"' + termino.replace('"', '""') + '"'
+        return models.Jugador.id.in_(
+            select(literal_column("rowid")).select_from(text("jugador_fts")).where(text("jugador_fts MATCH :frase_busqueda").bindparams(frase_busqueda=frase))
+        )
+    # en Postgres el LIKE '%...%' sobre lower(nombre) usa el índice GIN gin_trgm_ops
+    return nombre.contains(termino, autoescape=True)
+
+async def buscar_jugadores(db: AsyncSession, q: str, pais: Optional[str] = None, ciudad: Optional[str] = None,
+                           asociacion_id: Optional[int] = None, limit: int = 20, cursor: Optional[str] = None):
+    termino = q.strip().lower()
+    if not termino:
+        raise ValueError("El término de búsqueda no puede estar vacío.")
+    nombre = func.lower(models.Jugador.nombre)
+    rango = case(
+        (nombre == termino, 0),
+        (nombre.startswith(termino, autoescape=True), 1),
+        (nombre.contains(" " + termino, autoescape=True), 2),
+        else_=3,
+    )
+    stmt = select(models.Jugador, rango.label("rango"), nombre.label("nombre_orden"), models.Jugador.id.label("jugador_id")).where(
+        _filtro_nombre(db.get_bind().dialect.name, nombre, termino)
+    )
+    if pais is not None:
+        stmt = stmt.where(models.Jugador.pais == pais)
+    if ciudad is not None:
+        stmt = stmt.where(models.Jugador.ciudad == ciudad)
+    if asociacion_id is not None:
+        stmt = stmt.where(models.Jugador.asociacion_id == asociacion_id)
+    stmt = paginacion.paginar(stmt, [rango, nombre, models.Jugador.id], 0, limit, cursor)
+    return (await db.execute(stmt)).all()
+
+# torneo
+async def get_torneo(db: AsyncSession, torneo_id: int):
+    return await db.get(models.Torneo, torneo_id)
+
+async def get_torneos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.Torneo, skip, limit, cursor)
+
+# categoria
+async def get_categoria(db: AsyncSession, categoria_id: int):
+    return await db.get(models.Categoria, categoria_id)
+
+async def get_categorias(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.Categoria, skip, limit, cursor)
+
+# asociacion
+async def get_asociacion(db: AsyncSession, asociacion_id: int):
+    return await db.get(models.Asociacion, asociacion_id)
+
+async def get_asociaciones(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.Asociacion, skip, limit, cursor)
+
+# partido
+async def get_partido(db: AsyncSession, partido_id: int):
+    return await db.get(models.Partido, partido_id)
+
+async def get_partidos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, filtros: Optional[schemas.FiltrosPartido] = None):
+    stmt = select(models.Partido).where(*filtros_partidos(filtros))
+    stmt = paginacion.paginar(stmt, [models.Partido.id], skip, limit, cursor)
+    return (await db.execute(stmt)).scalars().all()
+
+# resultado set
+async def get_resultado_set(db: AsyncSession, resultado_id: int):
+    return await db.get(models.ResultadoSet, resultado_id)
+
+async def get_resultados_set(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.ResultadoSet, skip, limit, cursor)
+
+async def get_resultados_set_by_partido(db: AsyncSession, partido_id: int):
+    stmt = select(models.ResultadoSet).where(models.ResultadoSet.partido_id == partido_id).order_by(models.ResultadoSet.numero_set)
+    return (await db.execute(stmt)).scalars().all()
+
+# estado del partido
+async def get_estado_partido(db: AsyncSession, partido_id: int):
+    return await db.get(models.EstadoPartido, partido_id)
+
+async def get_ganador_partido(db: AsyncSession, partido_id: int):
+    estado = await get_estado_partido(db, partido_id)
+    if estado:
+        return estado.ganador_id
+    if not await get_partido(db, partido_id):
+        raise ValueError("Partido no encontrado.")
+    return None
+
+# grupo
+async def get_grupo(db: AsyncSession, grupo_id: int):
+    return await db.get(models.Grupo, grupo_id)
+
+async def get_grupos(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.Grupo, skip, limit, cursor)
+
+# equipos dobles
+async def get_equipo_dobles(db: AsyncSession, equipo_id: int):
+    return await db.get(models.EquipoDobles, equipo_id)
+
+async def get_equipos_dobles(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    return await _listar(db, models.EquipoDobles, skip, limit, cursor)
+
+# ratings: sin fila todavía = rating inicial y 0 partidos
+async def get_rating(db: AsyncSession, modelo, participante_id: int):
+    registro = await db.get(modelo, participante_id)
+    if registro is None:
+        return schemas.RatingOut(participante_id=participante_id, rating=ratings.RATING_INICIAL, partidos=0)
+    return schemas.RatingOut(participante_id=participante_id, rating=registro.rating, partidos=registro.partidos)
+
+# inscripciones individuales
+async def get_inscripciones(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.inscripcion.c
+    stmt = paginacion.paginar(models.inscripcion.select(), [c.jugador_id, c.torneo_id, c.categoria_id], skip, limit, cursor)
+    results = (await db.execute(stmt)).fetchall()
+    return [schemas.InscripcionOut(**r._asdict()) for r in results]
+
+async def get_inscripcion(db: AsyncSession, jugador_id: int, torneo_id: int, categoria_id: int):
+    c = models.inscripcion.c
+    result = (await db.execute(
+        models.inscripcion.select().where(
+            (c.jugador_id == jugador_id) & (c.torneo_id == torneo_id) & (c.categoria_id == categoria_id)
+        )
+    )).fetchone()
+    if result:
+        return schemas.InscripcionOut(**result._asdict())
+    return None
+
+# inscripciones dobles
+async def get_inscripciones_dobles(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.inscripcion_dobles.c
+    stmt = paginacion.paginar(models.inscripcion_dobles.select(), [c.equipo_id, c.torneo_id, c.categoria_id], skip, limit, cursor)
+    results = (await db.execute(stmt)).fetchall()
+    return [schemas.InscripcionDoblesOut(**r._asdict()) for r in results]
+
+async def get_inscripcion_dobles(db: AsyncSession, equipo_id: int, torneo_id: int, categoria_id: int):
+    c = models.inscripcion_dobles.c
+    result = (await db.execute(
+        models.inscripcion_dobles.select().where(
+            (c.equipo_id == equipo_id) & (c.torneo_id == torneo_id) & (c.categoria_id == categoria_id)
+        )
+    )).fetchone()
+    if result:
+        return schemas.InscripcionDoblesOut(**result._asdict())
+    return None
+
+# participantes de grupo
+async def get_participantes_grupo(db: AsyncSession, grupo_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.grupo_participante.c
+    stmt = paginacion.paginar(models.grupo_participante.select().where(c.grupo_id == grupo_id), [c.jugador_id], skip, limit, cursor)
+    results = (await db.execute(stmt)).fetchall()
+    return [schemas.GrupoParticipanteOut(**r._asdict()) for r in results]
+
+async def get_participantes_grupo_con_jugador(db: AsyncSession, grupo_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    c = models.grupo_participante.c
+    stmt = select(models.Jugador).join(models.grupo_participante, c.jugador_id == models.Jugador.id).where(c.grupo_id == grupo_id)
+    jugadores = (await db.execute(paginacion.paginar(stmt, [c.jugador_id], skip, limit, cursor))).scalars().all()
+    return [
+        schemas.GrupoParticipanteDetalleOut(grupo_id=grupo_id, jugador_id=j.id, jugador=schemas.JugadorOut.model_validate(j))
+        for j in jugadores
+    ]
+
+# clasificación de grupo
+async def get_clasificacion_grupo(db: AsyncSession, grupo_id: int):
+    # None si el grupo no existe; el resultado queda en caché hasta que cambie alguna de sus tablas.
+    # La firma se lee antes que los datos, así lo guardado nunca es más viejo que su firma
+    firma = clasificacion.firma(await versiones.leer(db, clasificacion.TABLAS))
+    en_cache = clasificacion.obtener(grupo_id, firma)
+    if en_cache is not None:
+        return en_cache
+    if await db.get(models.Grupo, grupo_id) is None:
+        return None
+    estadisticas = [r._asdict() for r in (await db.execute(clasificacion.consulta_estadisticas(grupo_id))).fetchall()]
+    enfrentamientos = []
+    if clasificacion.hay_empates(estadisticas):
+        # los partidos uno a uno solo se traen para el desempate directo
+        enfrentamientos = [r._asdict() for r in (await db.execute(clasificacion.consulta_enfrentamientos(grupo_id))).fetchall()]
+    tabla = [schemas.ClasificacionGrupoOut(**fila) for fila in clasificacion.ordenar(estadisticas, enfrentamientos)]
+    clasificacion.guardar(grupo_id, firma, tabla)
+    return tabla
+
+# llave de eliminación de un torneo con participantes y sets.
+# Carga fija de consultas sin importar el tamaño de la llave: partidos + categoría (join),
+# y un SELECT ... IN por cada relación (jugador1, jugador2, equipo1, equipo2, resultados);
+# selectinload parte el IN cada 500 ids, así que sobre 500 partidos suma una consulta por tramo.
+def _orden_llave(partido: models.Partido):
+    # "Ronda 10" va después de "Ronda 2": el número de ronda se compara como entero
+    ronda = partido.ronda or ""
+    numero = int(ronda[6:]) if ronda.startswith("Ronda ") and ronda[6:].isdigit() else 0
+    return (partido.categoria_id, partido.tipo, numero, ronda, partido.posicion_llave, partido.id)
+
+async def get_llave_torneo(db: AsyncSession, torneo_id: int, categoria_id: Optional[int] = None):
+    stmt = (
+        select(models.Partido)
+        .where((models.Partido.torneo_id == torneo_id) & models.Partido.posicion_llave.isnot(None))
+        .options(
+            joinedload(models.Partido.categoria),
+            selectinload(models.Partido.jugador1),
+            selectinload(models.Partido.jugador2),
+            selectinload(models.Partido.equipo1),
+            selectinload(models.Partido.equipo2),
+            selectinload(models.Partido.resultados),
+        )
+    )
+    if categoria_id is not None:
+        stmt = stmt.where(models.Partido.categoria_id == categoria_id)
+    return sorted((await db.execute(stmt)).scalars().all(), key=_orden_llave)
@@ -0,0 +1,33 @@
+import os
+import time
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from .db import DATABASE_URI, MetricasPool, opciones_pool
+
+# El motor sync de app/db.py se mantiene para Alembic y scripts; este modulo solo lo importa la API.
+
+def _uri_async(uri: str):
+    # usa el driver async que corresponde a la URI sync configurada
+    esquema, _, resto = uri.partition("://")
+    if "+asyncpg" in esquema or "+aiosqlite" in esquema:
+        return uri
+    if esquema.startswith("postgresql"):
+        return f"postgresql+asyncpg://{resto}"
+    if esquema.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{resto}"
+    return uri
+
+ASYNC_DATABASE_URI = os.getenv("ASYNC_DATABASE_URI", _uri_async(DATABASE_URI))
+async_engine = create_async_engine(ASYNC_DATABASE_URI, **opciones_pool(ASYNC_DATABASE_URI))
+metricas_pool_async = MetricasPool(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    """
+    Igual que get_db pero entrega una AsyncSession para las rutas async.
+    """
+    async with AsyncSessionLocal() as db:
+        inicio = time.perf_counter()
+        await db.connection()
+        metricas_pool_async.registrar_espera(time.perf_counter() - inicio)
+        yield db
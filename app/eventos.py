@@ -0,0 +1,99 @@
+# pub/sub en proceso para empujar resultados en vivo a los marcadores (SSE)
+import asyncio
+import json
+import threading
+
+TAMANO_COLA = 100 # eventos pendientes por suscriptor antes de descartar los más antiguos
+
+
+def canales_partido(torneo_id: int, mesa: int):
+    return [f"torneo:{torneo_id}", f"mesa:{torneo_id}:{mesa}"]
+
+
+class Suscripcion:
+    def __init__(self, canales, tamano_cola: int):
+        self.canales = canales
+        self.cola = asyncio.Queue(maxsize=tamano_cola)
+        self.perdidos = 0 # eventos descartados desde la última entrega, el cliente debe resincronizar
+
+
+class Difusor:
+    """
+    Reparte eventos a los suscriptores de cada canal.
+    publicar() se puede llamar desde cualquier hilo (las rutas sync corren en el threadpool);
+    la entrega ocurre en el event loop. Si un cliente lento llena su cola se descartan sus eventos
+    más antiguos en vez de bloquear al que publica.
+    """
+
+    def __init__(self, tamano_cola: int = TAMANO_COLA):
+        self.tamano_cola = tamano_cola
+        self._suscripciones = {}
+        self._loop = None
+        self._lock = threading.Lock()
+        self.publicados = 0
+        self.descartados = 0
+
+    def suscribir(self, canales):
+        # se llama desde el event loop
+        self._loop = asyncio.get_running_loop()
+        suscripcion = Suscripcion(canales, self.tamano_cola)
+        with self._lock:
+            for canal in canales:
+                self._suscripciones.setdefault(canal, set()).add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion):
+        with self._lock:
+            for canal in suscripcion.canales:
+                suscritos = self._suscripciones.get(canal)
+                if suscritos:
+                    suscritos.discard(suscripcion)
+                    if not suscritos:
+                        del self._suscripciones[canal]
+
+    def num_suscriptores(self):
+        with self._lock:
+            return len({s for suscritos in self._suscripciones.values() for s in suscritos})
+
+    def publicar(self, canales, evento: dict):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return # nadie se ha suscrito todavía
+        with self._lock:
+            if not any(canal in self._suscripciones for canal in canales):
+                return
+        # el evento se serializa una sola vez para todos los suscriptores
+        mensaje = f"event: {evento['tipo']}\ndata: {json.dumps(evento, default=str)}\n\n"
+        loop.call_soon_threadsafe(self._entregar, canales, mensaje)
+
+    def _entregar(self, canales, mensaje: str):
+        with self._lock:
+            destinatarios = {s for canal in canales for s in self._suscripciones.get(canal, ())}
+        self.publicados += 1
+        for suscripcion in destinatarios:
+            if suscripcion.cola.full():
+                suscripcion.cola.get_nowait()
+                suscripcion.perdidos += 1
+                self.descartados += 1
+            suscripcion.cola.put_nowait(mensaje)
+
+    async def flujo(self, canales, keep_alive: float = 15.0):
+        # generador de mensajes SSE para una conexión, se cancela cuando el cliente se desconecta
+        suscripcion = self.suscribir(canales)
+        try:
+            yield ": conectado\n\n"
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(suscripcion.cola.get(), timeout=keep_alive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if suscripcion.perdidos:
+                    perdidos, suscripcion.perdidos = suscripcion.perdidos, 0
+                    yield f"event: eventos_perdidos\ndata: {json.dumps({'tipo': 'eventos_perdidos', 'cantidad': perdidos})}\n\n"
+                yield mensaje
+        finally:
+            self.cancelar(suscripcion)
+
+
+difusor = Difusor()
@@ -0,0 +1,55 @@
+# exportación en streaming de tablas grandes (NDJSON o CSV)
+#
+# se lee con un cursor del lado del servidor (stream_results + yield_per) y se escribe
+# bloque a bloque, así la memoria no crece con la cantidad de filas exportadas.
+import csv
+import io
+
+from sqlalchemy import select
+
+from . import models, serializacion
+from .db import engine
+
+TAMANO_BLOQUE = 1000
+
+TABLAS = {
+    "jugadores": models.Jugador.__table__,
+    "partidos": models.Partido.__table__,
+    "resultados-set": models.ResultadoSet.__table__,
+    "inscripciones": models.inscripcion,
+    "inscripciones-dobles": models.inscripcion_dobles,
+}
+
+TIPOS_CONTENIDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _bloque_ndjson(columnas, filas):
+    return b"".join(serializacion.dumps(dict(zip(columnas, fila))) + b"\n" for fila in filas)
+
+def _bloque_csv(filas):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(filas)
+    return buffer.getvalue()
+
+def exportar(nombre_tabla: str, formato: str, tamano_bloque: int = TAMANO_BLOQUE):
+    # devuelve un generador; la validación ocurre antes de abrir la conexión
+    if nombre_tabla not in TABLAS:
+        raise ValueError(f"Tabla '{nombre_tabla}' no exportable. Opciones: {', '.join(TABLAS)}.")
+    if formato not in TIPOS_CONTENIDO:
+        raise ValueError(f"Formato '{formato}' no soportado. Use 'ndjson' o 'csv'.")
+    return _generar(TABLAS[nombre_tabla], formato, tamano_bloque)
+
+def _generar(tabla, formato: str, tamano_bloque: int):
+    # conexión propia: la sesión de la petición ya se cerró cuando se envía el cuerpo
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=tamano_bloque).execute(
+            select(tabla).order_by(*tabla.primary_key.columns)
+        )
+        columnas = list(resultado.keys())
+        if formato == "csv":
+            yield _bloque_csv([columnas])
+        for filas in resultado.partitions():
+            yield _bloque_ndjson(columnas, filas) if formato == "ndjson" else _bloque_csv(filas)
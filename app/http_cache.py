@@ -0,0 +1,60 @@
+# GET condicional (ETag / Last-Modified) a partir de las versiones de tabla
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import versiones
+from .db_async import get_async_db
+
+
+def _etag(versiones_tablas):
+    firma = "|".join(f"{t}:{v}" for t, (v, _) in sorted(versiones_tablas.items()))
+    return 'W/"' + hashlib.sha1(firma.encode()).hexdigest()[:20] + '"'
+
+def _coincide(if_none_match: str, etag: str):
+    if if_none_match.strip() == "*":
+        return True
+    # la comparación de If-None-Match es débil: se ignora el prefijo W/
+    candidatos = {e.strip().removeprefix("W/") for e in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidatos
+
+def _no_modificado_desde(if_modified_since: str, ultima):
+    try:
+        fecha = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    # Last-Modified tiene resolución de segundos
+    return ultima.replace(microsecond=0) <= fecha
+
+def condicional(*tablas: str):
+    """
+    Dependencia para rutas GET cuyo contenido solo depende de las tablas indicadas.
+    Agrega ETag y Last-Modified; si el cliente ya tiene esa versión responde 304 antes
+    de consultar las filas y de serializar la respuesta.
+    """
+    async def dependencia(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        versiones_tablas = await versiones.leer(db, tablas)
+        etag = _etag(versiones_tablas)
+        fechas = [a for _, a in versiones_tablas.values() if a is not None]
+        ultima = max(fechas).replace(tzinfo=timezone.utc) if fechas else None
+
+        cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+        if ultima is not None:
+            cabeceras["Last-Modified"] = format_datetime(ultima, usegmt=True)
+
+        if_none_match = request.headers.get("if-none-match")
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_none_match is not None:
+            no_modificado = _coincide(if_none_match, etag)
+        else:
+            no_modificado = bool(if_modified_since and ultima and _no_modificado_desde(if_modified_since, ultima))
+        if no_modificado:
+            raise HTTPException(status_code=304, headers=cabeceras)
+        response.headers.update(cabeceras)
+
+    return dependencia
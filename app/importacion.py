@@ -0,0 +1,82 @@
+# lectura en streaming de archivos de inscripciones (CSV o JSON Lines) y CLI de importación
+#
+# uso: python -m app.importacion inscripciones.csv [--dobles] [--formato csv|jsonl] [--lote 1000]
+import argparse
+import codecs
+import csv
+import io
+import json
+import sys
+import tempfile
+
+FORMATOS = ("csv", "jsonl")
+MEMORIA_MAXIMA = 1024 * 1024 # bytes del archivo subido que se guardan en memoria antes de pasar a disco
+
+
+def detectar_formato(nombre_archivo: str):
+    nombre = (nombre_archivo or "").lower()
+    return "jsonl" if nombre.endswith((".jsonl", ".ndjson")) else "csv"
+
+def leer_filas(texto, formato: str):
+    # texto: archivo abierto en modo texto. Entrega (numero_de_fila, dict) sin cargar el archivo completo
+    if formato == "csv":
+        lector = csv.DictReader(texto)
+        for fila in lector:
+            yield lector.line_num, fila
+    elif formato == "jsonl":
+        for numero_fila, linea in enumerate(texto, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield numero_fila, json.loads(linea)
+            except ValueError:
+                yield numero_fila, None # queda como error de formato en el reporte
+    else:
+        raise ValueError(f"Formato '{formato}' no soportado. Use 'csv' o 'jsonl'.")
+
+async def recibir_archivo(fragmentos):
+    # copia el cuerpo de una petición (iterador async de bytes) a un temporal sin tenerlo entero en memoria,
+    # validando UTF-8 a medida que llega. Retorna el archivo en modo texto para leer_filas
+    decodificador = codecs.getincrementaldecoder("utf-8")()
+    binario = tempfile.SpooledTemporaryFile(max_size=MEMORIA_MAXIMA)
+    try:
+        async for fragmento in fragmentos:
+            decodificador.decode(fragmento)
+            binario.write(fragmento)
+        decodificador.decode(b"", final=True)
+    except BaseException:
+        binario.close()
+        raise
+    binario.seek(0)
+    return io.TextIOWrapper(binario, encoding="utf-8-sig", newline="")
+
+
+def main(argv=None):
+    from . import crud
+    from .db import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Importa inscripciones desde un archivo CSV o JSON Lines.")
+    parser.add_argument("archivo")
+    parser.add_argument("--dobles", action="store_true", help="el archivo trae inscripciones de equipos de dobles")
+    parser.add_argument("--formato", choices=FORMATOS, help="por defecto se deduce de la extensión")
+    parser.add_argument("--lote", type=int, default=1000, help="filas por lote de inserción")
+    args = parser.parse_args(argv)
+
+    formato = args.formato or detectar_formato(args.archivo)
+    importar = crud.importar_inscripciones_dobles if args.dobles else crud.importar_inscripciones
+
+    db = SessionLocal()
+    try:
+        with open(args.archivo, encoding="utf-8-sig", newline="") as texto:
+            reporte = importar(db, leer_filas(texto, formato), tamano_lote=args.lote)
+    finally:
+        db.close()
+
+    print(f"insertadas: {reporte.insertadas}, duplicadas: {reporte.duplicadas}, errores: {len(reporte.errores)}")
+    for error in reporte.errores:
+        print(f"fila {error.fila}: {error.detalle}", file=sys.stderr)
+    return 1 if reporte.errores else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
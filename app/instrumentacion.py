@@ -0,0 +1,106 @@
+# métricas de base de datos por petición: cantidad de consultas, tiempo total y la consulta más lenta
+#
+# los eventos before/after_cursor_execute de cada motor suman en el objeto de la petición actual
+# (ContextVar); el middleware lo crea, lo publica en Server-Timing y escribe una línea de log JSON.
+# SLOW_QUERY_MS (por defecto 200, 0 desactiva) registra las consultas lentas con su plan (EXPLAIN).
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger("app.instrumentacion")
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+MAX_LARGO_SQL = 500 # largo máximo del SQL en el log
+
+
+class MetricasPeticion:
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self.mas_lenta = 0.0
+        self.sql_mas_lenta = None
+
+    def registrar(self, duracion: float, sql: str):
+        self.consultas += 1
+        self.tiempo_db += duracion
+        if duracion > self.mas_lenta:
+            self.mas_lenta = duracion
+            self.sql_mas_lenta = sql
+
+    def server_timing(self, total: float):
+        return (
+            f'db;dur={self.tiempo_db * 1000:.1f};desc="{self.consultas} consultas", '
+            f'db-max;dur={self.mas_lenta * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+
+_actual: ContextVar[Optional[MetricasPeticion]] = ContextVar("metricas_peticion", default=None)
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get("inicio_consulta")
+    if not inicios:
+        return
+    duracion = time.perf_counter() - inicios.pop()
+    metricas = _actual.get()
+    if metricas is not None:
+        metricas.registrar(duracion, statement)
+    if SLOW_QUERY_MS and duracion * 1000 >= SLOW_QUERY_MS:
+        _registrar_lenta(conn, statement, parameters, executemany, duracion)
+
+def _registrar_lenta(conn, statement, parameters, executemany, duracion):
+    datos = {"evento": "consulta_lenta", "duracion_ms": round(duracion * 1000, 1), "sql": statement[:MAX_LARGO_SQL]}
+    if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        datos["plan"] = _explain(conn, statement, parameters)
+    logger.warning(json.dumps(datos, ensure_ascii=False, default=str))
+
+def _explain(conn, statement, parameters):
+    # EXPLAIN sin ANALYZE no ejecuta la sentencia; se usa un cursor aparte sobre la misma conexión
+    prefijo = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(prefijo + statement, parameters)
+            return [" ".join(str(c) for c in fila) for fila in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as e:
+        return [f"no disponible: {e}"]
+
+def registrar_motor(engine):
+    # para motores async se pasa engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _antes)
+    event.listen(engine, "after_cursor_execute", _despues)
+
+
+async def middleware(request, call_next):
+    metricas = MetricasPeticion()
+    token = _actual.set(metricas)
+    inicio = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _actual.reset(token)
+    total = time.perf_counter() - inicio
+    response.headers["Server-Timing"] = metricas.server_timing(total)
+    logger.info(json.dumps({
+        "evento": "peticion",
+        "metodo": request.method,
+        "ruta": request.url.path,
+        "estado": response.status_code,
+        "consultas": metricas.consultas,
+        "tiempo_db_ms": round(metricas.tiempo_db * 1000, 1),
+        "consulta_mas_lenta_ms": round(metricas.mas_lenta * 1000, 1),
+        "consulta_mas_lenta": (metricas.sql_mas_lenta or "")[:MAX_LARGO_SQL] or None,
+        "total_ms": round(total * 1000, 1),
+    }, ensure_ascii=False))
+    return response
@@ -1,11 +1,15 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date, datetime
 
 
-from . import crud, models, schemas
-from .db import get_db 
+from . import crud, crud_async, models, schemas, paginacion, eventos, importacion, exportacion, cache, clasificacion, http_cache, instrumentacion, serializacion
+from .db import engine, get_db, metricas_pool
+from .db_async import async_engine, get_async_db, metricas_pool_async
 
 
 from dotenv import load_dotenv
@@ -27,14 +31,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],  
+    expose_headers=[paginacion.CABECERA_CURSOR, "ETag", "Server-Timing"],
 )
 
+# consultas y tiempo de base de datos por petición (cabecera Server-Timing y log)
+instrumentacion.registrar_motor(engine)
+instrumentacion.registrar_motor(async_engine.sync_engine)
+app.middleware("http")(instrumentacion.middleware)
+
+
+def _con_cursor(response: Response, registros, campos, limit: int):
+    # si hay mas paginas, el cursor de la siguiente va en la cabecera X-Next-Cursor
+    siguiente = paginacion.siguiente_cursor(registros, campos, limit)
+    if siguiente:
+        response.headers[paginacion.CABECERA_CURSOR] = siguiente
+    return registros
+
+async def _listado_rapido(response: Response, db: AsyncSession, tabla, esquema, llave, skip: int, limit: int, cursor: Optional[str], condiciones=()):
+    # ?rapido=true: filas Core codificadas directo, sin validar cada registro con response_model.
+    # Al devolver una Response propia hay que copiar las cabeceras ya puestas (ETag, cursor)
+    filas = await crud_async.get_filas(db, tabla, esquema, llave, skip, limit, cursor, condiciones)
+    _con_cursor(response, filas, llave, limit)
+    cabeceras = {k: v for k, v in response.headers.items() if k not in ("content-length", "content-type")}
+    return serializacion.RespuestaRapida(serializacion.filas_a_dicts(filas), headers=cabeceras)
+
 
 # Endpoint de prueba
 @app.get("/")
 def read_root():
     return {"message": "¡Bienvenido a la API de Gestión de Torneos de Tenis de Mesa!"}
 
+# metricas del pool de conexiones (motor sync y motor async)
+@app.get("/metrics/pool")
+def metricas_pool_endpoint():
+    return {"sync": metricas_pool.resumen(), "async": metricas_pool_async.resumen()}
+
+@app.get("/metrics/cache")
+def metricas_cache_endpoint():
+    return cache.referencias.resumen()
+
 # endpoints para jugadores
 @app.post("/jugadores/", response_model=schemas.JugadorOut, status_code=status.HTTP_201_CREATED)
 def crear_jugador(jugador: schemas.JugadorCreate, db: Session = Depends(get_db)):
@@ -45,16 +80,39 @@ def crear_jugador(jugador: schemas.JugadorCreate, db: Session = Depends(get_db))
             raise HTTPException(status_code=400, detail=f"Asociación con ID {jugador.asociacion_id} no encontrada.")
     return crud.create_jugador(db, jugador)
 
-@app.get("/jugadores/{jugador_id}", response_model=schemas.JugadorOut)
-def leer_jugador(jugador_id: int, db: Session = Depends(get_db)):
-    db_jugador = crud.get_jugador(db, jugador_id)
+# debe declararse antes de /jugadores/{jugador_id}
+@app.get("/jugadores/buscar", response_model=List[schemas.JugadorOut], dependencies=[Depends(http_cache.condicional("jugador"))])
+async def buscar_jugadores(response: Response, q: str, pais: Optional[str] = None, ciudad: Optional[str] = None, asociacion_id: Optional[int] = None,
+                           limit: int = 20, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    try:
+        filas = await crud_async.buscar_jugadores(db, q, pais, ciudad, asociacion_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _con_cursor(response, filas, crud_async.CAMPOS_CURSOR_BUSQUEDA, limit)
+    return [fila.Jugador for fila in filas]
+
+@app.get("/jugadores/{jugador_id}", response_model=schemas.JugadorOut, dependencies=[Depends(http_cache.condicional("jugador"))])
+async def leer_jugador(jugador_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_jugador = await crud_async.get_jugador(db, jugador_id)
     if db_jugador is None:
         raise HTTPException(status_code=404, detail="Jugador no encontrado")
     return db_jugador
 
-@app.get("/jugadores/", response_model=List[schemas.JugadorOut])
-def listar_jugadores(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_jugadores(db, skip, limit)
+@app.get("/jugadores/{jugador_id}/rating", response_model=schemas.RatingOut, dependencies=[Depends(http_cache.condicional("jugador", "rating_jugador"))])
+async def leer_rating_jugador(jugador_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.get_jugador(db, jugador_id) is None:
+        raise HTTPException(status_code=404, detail="Jugador no encontrado")
+    return await crud_async.get_rating(db, models.RatingJugador, jugador_id)
+
+@app.get("/jugadores/", response_model=List[schemas.JugadorOut], dependencies=[Depends(http_cache.condicional("jugador"))])
+async def listar_jugadores(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, rapido: bool = False, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if rapido:
+            return await _listado_rapido(response, db, models.Jugador.__table__, schemas.JugadorOut, ["id"], skip, limit, cursor)
+        registros = await crud_async.get_jugadores(db, skip, limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
 @app.put("/jugadores/{jugador_id}", response_model=schemas.JugadorOut)
 def actualizar_jugador(jugador_id: int, jugador_data: schemas.JugadorUpdate, db: Session = Depends(get_db)):
@@ -82,16 +140,20 @@ def crear_torneo(torneo: schemas.TorneoCreate, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/torneos/{torneo_id}", response_model=schemas.TorneoOut)
-def leer_torneo(torneo_id: int, db: Session = Depends(get_db)):
-    db_torneo = crud.get_torneo(db, torneo_id)
+@app.get("/torneos/{torneo_id}", response_model=schemas.TorneoOut, dependencies=[Depends(http_cache.condicional("torneo"))])
+async def leer_torneo(torneo_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_torneo = await crud_async.get_torneo(db, torneo_id)
     if db_torneo is None:
         raise HTTPException(status_code=404, detail="Torneo no encontrado")
     return db_torneo
 
-@app.get("/torneos/", response_model=List[schemas.TorneoOut])
-def listar_torneos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_torneos(db, skip, limit)
+@app.get("/torneos/", response_model=List[schemas.TorneoOut], dependencies=[Depends(http_cache.condicional("torneo"))])
+async def listar_torneos(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    try:
+        registros = await crud_async.get_torneos(db, skip, limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
 @app.put("/torneos/{torneo_id}", response_model=schemas.TorneoOut)
 def actualizar_torneo(torneo_id: int, torneo_data: schemas.TorneoUpdate, db: Session = Depends(get_db)):
@@ -118,13 +180,17 @@ def crear_categoria(categoria: schemas.CategoriaCreate, db: Session = Depends(ge
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/categorias/", response_model=List[schemas.CategoriaOut])
-def listar_categorias(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_categorias(db, skip=skip, limit=limit)
+@app.get("/categorias/", response_model=List[schemas.CategoriaOut], dependencies=[Depends(http_cache.condicional("categoria"))])
+async def listar_categorias(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    try:
+        registros = await crud_async.get_categorias(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
-@app.get("/categorias/{categoria_id}", response_model=schemas.CategoriaOut)
-def leer_categoria(categoria_id: int, db: Session = Depends(get_db)):
-    db_categoria = crud.get_categoria(db, categoria_id)
+@app.get("/categorias/{categoria_id}", response_model=schemas.CategoriaOut, dependencies=[Depends(http_cache.condicional("categoria"))])
+async def leer_categoria(categoria_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_categoria = await crud_async.get_categoria(db, categoria_id)
     if db_categoria is None:
         raise HTTPException(status_code=404, detail="Categoría no encontrada")
     return db_categoria
@@ -154,13 +220,17 @@ def crear_asociacion(asociacion: schemas.AsociacionCreate, db: Session = Depends
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/asociaciones/", response_model=List[schemas.AsociacionOut])
-def listar_asociaciones(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_asociaciones(db, skip=skip, limit=limit)
+@app.get("/asociaciones/", response_model=List[schemas.AsociacionOut], dependencies=[Depends(http_cache.condicional("asociacion"))])
+async def listar_asociaciones(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    try:
+        registros = await crud_async.get_asociaciones(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
-@app.get("/asociaciones/{asociacion_id}", response_model=schemas.AsociacionOut)
-def leer_asociacion(asociacion_id: int, db: Session = Depends(get_db)):
-    asociacion = crud.get_asociacion(db, asociacion_id)
+@app.get("/asociaciones/{asociacion_id}", response_model=schemas.AsociacionOut, dependencies=[Depends(http_cache.condicional("asociacion"))])
+async def leer_asociacion(asociacion_id: int, db: AsyncSession = Depends(get_async_db)):
+    asociacion = await crud_async.get_asociacion(db, asociacion_id)
     if asociacion is None:
         raise HTTPException(status_code=404, detail="Asociación no encontrada")
     return asociacion
@@ -190,13 +260,20 @@ def crear_partido(partido: schemas.PartidoCreate, db: Session = Depends(get_db))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/partidos/", response_model=List[schemas.PartidoOut])
-def listar_partidos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_partidos(db, skip=skip, limit=limit)
+@app.get("/partidos/", response_model=List[schemas.PartidoOut], dependencies=[Depends(http_cache.condicional("partido"))])
+async def listar_partidos(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, rapido: bool = False,
+                          filtros: schemas.FiltrosPartido = Depends(), db: AsyncSession = Depends(get_async_db)):
+    try:
+        if rapido:
+            return await _listado_rapido(response, db, models.Partido.__table__, schemas.PartidoOut, ["id"], skip, limit, cursor, crud.filtros_partidos(filtros))
+        registros = await crud_async.get_partidos(db, skip=skip, limit=limit, cursor=cursor, filtros=filtros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
-@app.get("/partidos/{partido_id}", response_model=schemas.PartidoOut)
-def leer_partido(partido_id: int, db: Session = Depends(get_db)):
-    partido = crud.get_partido(db, partido_id)
+@app.get("/partidos/{partido_id}", response_model=schemas.PartidoOut, dependencies=[Depends(http_cache.condicional("partido"))])
+async def leer_partido(partido_id: int, db: AsyncSession = Depends(get_async_db)):
+    partido = await crud_async.get_partido(db, partido_id)
     if partido is None:
         raise HTTPException(status_code=404, detail="Partido no encontrado")
     return partido
@@ -226,13 +303,19 @@ def crear_resultado_set(resultado_set: schemas.ResultadoSetCreate, db: Session =
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/resultados-set/", response_model=List[schemas.ResultadoSetOut])
-def listar_resultados_set(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_resultados_set(db, skip, limit)
+@app.get("/resultados-set/", response_model=List[schemas.ResultadoSetOut], dependencies=[Depends(http_cache.condicional("resultado_set"))])
+async def listar_resultados_set(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, rapido: bool = False, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if rapido:
+            return await _listado_rapido(response, db, models.ResultadoSet.__table__, schemas.ResultadoSetOut, ["id"], skip, limit, cursor)
+        registros = await crud_async.get_resultados_set(db, skip, limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
-@app.get("/resultados-set/{resultado_id}", response_model=schemas.ResultadoSetOut)
-def obtener_resultado_set(resultado_id: int, db: Session = Depends(get_db)):
-    resultado = crud.get_resultado_set(db, resultado_id)
+@app.get("/resultados-set/{resultado_id}", response_model=schemas.ResultadoSetOut, dependencies=[Depends(http_cache.condicional("resultado_set"))])
+async def obtener_resultado_set(resultado_id: int, db: AsyncSession = Depends(get_async_db)):
+    resultado = await crud_async.get_resultado_set(db, resultado_id)
     if not resultado:
         raise HTTPException(status_code=404, detail="Resultado de set no encontrado")
     return resultado
@@ -262,13 +345,17 @@ def crear_grupo(grupo: schemas.GrupoCreate, db: Session = Depends(get_db)):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/grupos/", response_model=List[schemas.GrupoOut])
-def listar_grupos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_grupos(db, skip=skip, limit=limit)
+@app.get("/grupos/", response_model=List[schemas.GrupoOut], dependencies=[Depends(http_cache.condicional("grupo"))])
+async def listar_grupos(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    try:
+        registros = await crud_async.get_grupos(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
-@app.get("/grupos/{grupo_id}", response_model=schemas.GrupoOut)
-def leer_grupo(grupo_id: int, db: Session = Depends(get_db)):
-    grupo = crud.get_grupo(db, grupo_id)
+@app.get("/grupos/{grupo_id}", response_model=schemas.GrupoOut, dependencies=[Depends(http_cache.condicional("grupo"))])
+async def leer_grupo(grupo_id: int, db: AsyncSession = Depends(get_async_db)):
+    grupo = await crud_async.get_grupo(db, grupo_id)
     if grupo is None:
         raise HTTPException(status_code=404, detail="Grupo no encontrado")
     return grupo
@@ -298,17 +385,27 @@ def crear_equipo_dobles(equipo: schemas.EquipoDoblesCreate, db: Session = Depend
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/equipos-dobles/", response_model=List[schemas.EquipoDoblesOut])
-def listar_equipos_dobles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_equipos_dobles(db, skip=skip, limit=limit)
+@app.get("/equipos-dobles/", response_model=List[schemas.EquipoDoblesOut], dependencies=[Depends(http_cache.condicional("equipo_dobles"))])
+async def listar_equipos_dobles(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    try:
+        registros = await crud_async.get_equipos_dobles(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["id"], limit)
 
-@app.get("/equipos-dobles/{equipo_id}", response_model=schemas.EquipoDoblesOut)
-def obtener_equipo_dobles(equipo_id: int, db: Session = Depends(get_db)):
-    equipo = crud.get_equipo_dobles(db, equipo_id)
+@app.get("/equipos-dobles/{equipo_id}", response_model=schemas.EquipoDoblesOut, dependencies=[Depends(http_cache.condicional("equipo_dobles"))])
+async def obtener_equipo_dobles(equipo_id: int, db: AsyncSession = Depends(get_async_db)):
+    equipo = await crud_async.get_equipo_dobles(db, equipo_id)
     if not equipo:
         raise HTTPException(status_code=404, detail="Equipo de dobles no encontrado")
     return equipo
 
+@app.get("/equipos-dobles/{equipo_id}/rating", response_model=schemas.RatingOut, dependencies=[Depends(http_cache.condicional("equipo_dobles", "rating_equipo"))])
+async def leer_rating_equipo(equipo_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.get_equipo_dobles(db, equipo_id) is None:
+        raise HTTPException(status_code=404, detail="Equipo de dobles no encontrado")
+    return await crud_async.get_rating(db, models.RatingEquipo, equipo_id)
+
 @app.put("/equipos-dobles/{equipo_id}", response_model=schemas.EquipoDoblesOut)
 def actualizar_equipo_dobles(equipo_id: int, equipo_data: schemas.EquipoDoblesUpdate, db: Session = Depends(get_db)):
     try:
@@ -326,6 +423,20 @@ def eliminar_equipo_dobles(equipo_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Equipo de dobles no encontrado")
     return {"message": "Equipo de dobles eliminado exitosamente"}
 
+# exportación completa de tablas grandes (jugadores, partidos, resultados-set, inscripciones, inscripciones-dobles)
+@app.get("/exportar/{tabla}")
+def exportar_tabla(tabla: str, formato: str = "ndjson"):
+    try:
+        contenido = exportacion.exportar(tabla, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    extension = "csv" if formato == "csv" else "ndjson"
+    return StreamingResponse(
+        contenido,
+        media_type=exportacion.TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{tabla}.{extension}"'},
+    )
+
 # endpoints para INSCRIPCIONES INDIVIDUALES
 @app.post("/inscripciones/individual/", response_model=schemas.InscripcionOut, status_code=status.HTTP_201_CREATED)
 def inscribir_jugador(inscripcion: schemas.InscripcionCreate, db: Session = Depends(get_db)):
@@ -334,13 +445,41 @@ def inscribir_jugador(inscripcion: schemas.InscripcionCreate, db: Session = Depe
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/inscripciones/individual/", response_model=List[schemas.InscripcionOut])
-def listar_inscripciones(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_inscripciones(db, skip=skip, limit=limit)
+async def _importar_archivo(request: Request, formato: Optional[str], importar, db: Session, tamano_lote: int):
+    # el archivo va como cuerpo de la petición (text/csv o application/x-ndjson)
+    if formato is None:
+        tipo = request.headers.get("content-type", "")
+        formato = "jsonl" if ("ndjson" in tipo or "jsonl" in tipo) else "csv"
+    if formato not in importacion.FORMATOS:
+        raise HTTPException(status_code=400, detail=f"Formato '{formato}' no soportado. Use 'csv' o 'jsonl'.")
+    try:
+        texto = await importacion.recibir_archivo(request.stream())
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="El archivo debe estar codificado en UTF-8.")
+    try:
+        return await run_in_threadpool(importar, db, importacion.leer_filas(texto, formato), tamano_lote)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        texto.close()
+
+@app.post("/inscripciones/individual/importar/", response_model=schemas.ImportacionOut)
+async def importar_inscripciones(request: Request, formato: Optional[str] = None, tamano_lote: int = 1000, db: Session = Depends(get_db)):
+    return await _importar_archivo(request, formato, crud.importar_inscripciones, db, tamano_lote)
+
+@app.get("/inscripciones/individual/", response_model=List[schemas.InscripcionOut], dependencies=[Depends(http_cache.condicional("inscripcion"))])
+async def listar_inscripciones(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, rapido: bool = False, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if rapido:
+            return await _listado_rapido(response, db, models.inscripcion, schemas.InscripcionOut, ["jugador_id", "torneo_id", "categoria_id"], skip, limit, cursor)
+        registros = await crud_async.get_inscripciones(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["jugador_id", "torneo_id", "categoria_id"], limit)
 
-@app.get("/inscripciones/individual/{jugador_id}/{torneo_id}/{categoria_id}", response_model=schemas.InscripcionOut)
-def obtener_inscripcion(jugador_id: int, torneo_id: int, categoria_id: int, db: Session = Depends(get_db)):
-    db_inscripcion = crud.get_inscripcion(db, jugador_id, torneo_id, categoria_id)
+@app.get("/inscripciones/individual/{jugador_id}/{torneo_id}/{categoria_id}", response_model=schemas.InscripcionOut, dependencies=[Depends(http_cache.condicional("inscripcion"))])
+async def obtener_inscripcion(jugador_id: int, torneo_id: int, categoria_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_inscripcion = await crud_async.get_inscripcion(db, jugador_id, torneo_id, categoria_id)
     if db_inscripcion is None:
         raise HTTPException(status_code=404, detail="Inscripción individual no encontrada")
     return db_inscripcion
@@ -361,13 +500,23 @@ def inscribir_equipo_dobles(inscripcion: schemas.InscripcionDoblesCreate, db: Se
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/inscripciones/dobles/", response_model=List[schemas.InscripcionDoblesOut])
-def listar_inscripciones_dobles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_inscripciones_dobles(db, skip=skip, limit=limit)
+@app.post("/inscripciones/dobles/importar/", response_model=schemas.ImportacionOut)
+async def importar_inscripciones_dobles(request: Request, formato: Optional[str] = None, tamano_lote: int = 1000, db: Session = Depends(get_db)):
+    return await _importar_archivo(request, formato, crud.importar_inscripciones_dobles, db, tamano_lote)
+
+@app.get("/inscripciones/dobles/", response_model=List[schemas.InscripcionDoblesOut], dependencies=[Depends(http_cache.condicional("inscripcion_dobles"))])
+async def listar_inscripciones_dobles(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, rapido: bool = False, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if rapido:
+            return await _listado_rapido(response, db, models.inscripcion_dobles, schemas.InscripcionDoblesOut, ["equipo_id", "torneo_id", "categoria_id"], skip, limit, cursor)
+        registros = await crud_async.get_inscripciones_dobles(db, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, registros, ["equipo_id", "torneo_id", "categoria_id"], limit)
 
-@app.get("/inscripciones/dobles/{equipo_id}/{torneo_id}/{categoria_id}", response_model=schemas.InscripcionDoblesOut)
-def obtener_inscripcion_dobles(equipo_id: int, torneo_id: int, categoria_id: int, db: Session = Depends(get_db)):
-    db_inscripcion = crud.get_inscripcion_dobles(db, equipo_id, torneo_id, categoria_id)
+@app.get("/inscripciones/dobles/{equipo_id}/{torneo_id}/{categoria_id}", response_model=schemas.InscripcionDoblesOut, dependencies=[Depends(http_cache.condicional("inscripcion_dobles"))])
+async def obtener_inscripcion_dobles(equipo_id: int, torneo_id: int, categoria_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_inscripcion = await crud_async.get_inscripcion_dobles(db, equipo_id, torneo_id, categoria_id)
     if db_inscripcion is None:
         raise HTTPException(status_code=404, detail="Inscripción de dobles no encontrada")
     return db_inscripcion
@@ -389,13 +538,24 @@ def add_jugador_to_grupo_endpoint(grupo_id: int, participante: schemas.GrupoPart
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/grupos/{grupo_id}/participantes/", response_model=List[schemas.GrupoParticipanteOut])
-def read_grupo_participantes_endpoint(grupo_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/grupos/{grupo_id}/clasificacion", response_model=List[schemas.ClasificacionGrupoOut], dependencies=[Depends(http_cache.condicional(*clasificacion.TABLAS))])
+async def obtener_clasificacion_grupo(grupo_id: int, db: AsyncSession = Depends(get_async_db)):
+    tabla = await crud_async.get_clasificacion_grupo(db, grupo_id)
+    if tabla is None:
+        raise HTTPException(status_code=404, detail="Grupo no encontrado")
+    return tabla
 
-    participantes = crud.get_grupo_participantes(db, skip=skip, limit=limit)
-    # filtra los participantes por el grupo_id si el crud no lo hace
-    filtered_participantes = [p for p in participantes if p.grupo_id == grupo_id]
-    return filtered_participantes
+@app.get("/grupos/{grupo_id}/participantes/", response_model=List[schemas.GrupoParticipanteDetalleOut], response_model_exclude_unset=True, dependencies=[Depends(http_cache.condicional("grupo_participante", "jugador"))])
+async def read_grupo_participantes_endpoint(response: Response, grupo_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                                      incluir_jugadores: bool = False, db: AsyncSession = Depends(get_async_db)):
+    try:
+        if incluir_jugadores:
+            participantes = await crud_async.get_participantes_grupo_con_jugador(db, grupo_id, skip=skip, limit=limit, cursor=cursor)
+        else:
+            participantes = await crud_async.get_participantes_grupo(db, grupo_id, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _con_cursor(response, participantes, ["jugador_id"], limit)
 
 @app.delete("/grupos/{grupo_id}/participantes/{jugador_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_grupo_participante_endpoint(grupo_id: int, jugador_id: int, db: Session = Depends(get_db)):
@@ -415,6 +575,20 @@ def generate_group_matches_endpoint(grupo_id: int, db: Session = Depends(get_db)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/torneos/{torneo_id}/categorias/{categoria_id}/sortear-grupos/", response_model=schemas.SorteoGruposOut, status_code=status.HTTP_201_CREATED)
+def sortear_grupos_endpoint(torneo_id: int, categoria_id: int, parametros: schemas.SorteoGruposCreate, db: Session = Depends(get_db)):
+    try:
+        return crud.sortear_grupos(db, torneo_id, categoria_id, parametros)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/torneos/{torneo_id}/construir", response_model=schemas.ConstruccionTorneoOut, status_code=status.HTTP_201_CREATED)
+def construir_torneo_endpoint(torneo_id: int, parametros: Optional[schemas.ConstruccionTorneoCreate] = None, db: Session = Depends(get_db)):
+    try:
+        return crud.construir_torneo(db, torneo_id, parametros or schemas.ConstruccionTorneoCreate())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/torneos/{torneo_id}/categorias/{categoria_id}/generar-llave-individual/", response_model=List[schemas.PartidoOut], status_code=status.HTTP_201_CREATED)
 def generate_elimination_bracket_individual_endpoint(torneo_id: int, categoria_id: int, db: Session = Depends(get_db)):
     # Obtener participantes inscritos individualmente en esta categora para este torneo
@@ -457,6 +631,13 @@ def generate_elimination_bracket_dobles_endpoint(torneo_id: int, categoria_id: i
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/torneos/{torneo_id}/planificar", response_model=schemas.PlanificacionOut)
+def planificar_torneo_endpoint(torneo_id: int, parametros: Optional[schemas.PlanificacionCreate] = None, db: Session = Depends(get_db)):
+    try:
+        return crud.planificar_torneo(db, torneo_id, parametros or schemas.PlanificacionCreate())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.put("/partidos/{partido_id}/asignar-horario-mesa/", response_model=schemas.PartidoOut)
 def assign_match_schedule_table_endpoint(partido_id: int, horario: datetime, mesa: int, db: Session = Depends(get_db)):
     try:
@@ -474,16 +655,52 @@ def register_set_result_endpoint(partido_id: int, resultado_set: schemas.Resulta
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/partidos/{partido_id}/ganador/", response_model=Optional[int]) # devuelve int de id de jugador o none
-def get_match_winner_endpoint(partido_id: int, db: Session = Depends(get_db)):
+@app.post("/resultados-set/lote/", response_model=schemas.ResultadoSetLoteOut)
+def register_set_results_batch_endpoint(lote: schemas.ResultadoSetLoteCreate, db: Session = Depends(get_db)):
     try:
-        ganador_id = crud.determinar_ganador_partido(db, partido_id)
+        return crud.registrar_resultados_set_lote(db, lote.resultados, lote.avanzar_ganadores)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/partidos/{partido_id}/estado/", response_model=schemas.EstadoPartidoOut, dependencies=[Depends(http_cache.condicional("estado_partido", "partido"))])
+async def get_match_state_endpoint(partido_id: int, db: AsyncSession = Depends(get_async_db)):
+    estado = await crud_async.get_estado_partido(db, partido_id)
+    if estado is None:
+        if await crud_async.get_partido(db, partido_id) is None:
+            raise HTTPException(status_code=404, detail="Partido no encontrado")
+        # partido sin sets registrados
+        return schemas.EstadoPartidoOut(partido_id=partido_id, sets_ganados1=0, sets_ganados2=0, finalizado=False)
+    return estado
+
+@app.get("/partidos/{partido_id}/ganador/", response_model=Optional[int], dependencies=[Depends(http_cache.condicional("estado_partido", "partido"))]) # devuelve int de id de jugador o none
+async def get_match_winner_endpoint(partido_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        # lectura del estado materializado, se mantiene al registrar/editar/borrar sets
+        ganador_id = await crud_async.get_ganador_partido(db, partido_id)
         if ganador_id is None:
             return None 
         return ganador_id
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# llave de eliminación del torneo (o de una categoría) con participantes y sets, de la primera ronda a la final
+@app.get("/torneos/{torneo_id}/llave", response_model=List[schemas.PartidoDetailOut],
+         dependencies=[Depends(http_cache.condicional("partido", "resultado_set", "jugador", "equipo_dobles", "categoria"))])
+async def obtener_llave_torneo(torneo_id: int, categoria_id: Optional[int] = None, db: AsyncSession = Depends(get_async_db)):
+    if await crud_async.get_torneo(db, torneo_id) is None:
+        raise HTTPException(status_code=404, detail="Torneo no encontrado")
+    return await crud_async.get_llave_torneo(db, torneo_id, categoria_id)
+
+# resultados en vivo (server-sent events) por torneo, o por mesa si se indica
+@app.get("/torneos/{torneo_id}/eventos")
+async def live_events_endpoint(torneo_id: int, mesa: Optional[int] = None):
+    canales = [f"mesa:{torneo_id}:{mesa}"] if mesa is not None else [f"torneo:{torneo_id}"]
+    return StreamingResponse(
+        eventos.difusor.flujo(canales),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/partidos/{partido_id}/avanzar-ganador/", response_model=schemas.PartidoOut)
 def advance_winner_endpoint(partido_id: int, ganador_id: int, es_equipo: bool = False, db: Session = Depends(get_db)):
     try:
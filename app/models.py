@@ -2,16 +2,18 @@ from .base import Base
 
 from sqlalchemy import (
     Column, Integer, String, Date, ForeignKey, Table, DateTime, Boolean,
-    CheckConstraint
+    CheckConstraint, Index, Float, DDL, event
 )
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy.orm import backref, relationship, validates
 
 
 # tabla para jugadores inscritos a torneos en las categorías
 inscripcion = Table("inscripcion", Base.metadata,
     Column("jugador_id", ForeignKey("jugador.id"), primary_key=True),
     Column("torneo_id", ForeignKey("torneo.id"), primary_key=True),
-    Column("categoria_id", ForeignKey("categoria.id"), primary_key=True)
+    Column("categoria_id", ForeignKey("categoria.id"), primary_key=True),
+    # la llave primaria parte por jugador_id, las llaves se buscan por torneo y categoria
+    Index("ix_inscripcion_torneo_id_categoria_id", "torneo_id", "categoria_id")
 )
 
 class Categoria(Base):
@@ -46,12 +48,31 @@ class Jugador(Base):
     genero = Column(String, nullable=False)  # "M" o "F"
     ciudad = Column(String, nullable=False)
     pais = Column(String, nullable=False)
-    asociacion_id = Column(Integer, ForeignKey("asociacion.id"), nullable=True)
+    asociacion_id = Column(Integer, ForeignKey("asociacion.id"), nullable=True, index=True)
 
     asociacion = relationship("Asociacion", backref="jugadores")
     categorias = relationship("Categoria", secondary=inscripcion, backref="jugadores_inscritos_categoria")
     torneos = relationship("Torneo", secondary=inscripcion, backref="jugadores_inscritos_torneo")
 
+# índice FTS5 trigram para buscar jugadores por nombre en SQLite (crud_async._filtro_nombre).
+# Con alembic lo crea la revisión a9d3f5b7c2e8; estos eventos cubren las bases creadas con create_all.
+for sentencia in (
+    "CREATE VIRTUAL TABLE jugador_fts USING fts5(nombre, content='jugador', content_rowid='id', tokenize='trigram')",
+    "INSERT INTO jugador_fts(jugador_fts) VALUES ('rebuild')",
+    """CREATE TRIGGER jugador_fts_ai AFTER INSERT ON jugador BEGIN
+        INSERT INTO jugador_fts(rowid, nombre) VALUES (new.id, new.nombre);
+    END""",
+    """CREATE TRIGGER jugador_fts_ad AFTER DELETE ON jugador BEGIN
+        INSERT INTO jugador_fts(jugador_fts, rowid, nombre) VALUES ('delete', old.id, old.nombre);
+    END""",
+    """CREATE TRIGGER jugador_fts_au AFTER UPDATE OF nombre ON jugador BEGIN
+        INSERT INTO jugador_fts(jugador_fts, rowid, nombre) VALUES ('delete', old.id, old.nombre);
+        INSERT INTO jugador_fts(rowid, nombre) VALUES (new.id, new.nombre);
+    END""",
+):
+    event.listen(Jugador.__table__, "after_create", DDL(sentencia).execute_if(dialect="sqlite"))
+event.listen(Jugador.__table__, "before_drop", DDL("DROP TABLE IF EXISTS jugador_fts").execute_if(dialect="sqlite"))
+
 class Torneo(Base):
     __tablename__ = "torneo"
     id = Column(Integer, primary_key=True)
@@ -61,6 +82,8 @@ class Torneo(Base):
     mesas_disponibles = Column(Integer, nullable=False)
     fecha_inscripcion_inicio = Column(Date, nullable=False)
     fecha_inscripcion_fin = Column(Date, nullable=False)
+    # duración estimada de un set: planificación y choques de horario usan esta misma cifra
+    minutos_por_set = Column(Integer, nullable=False, default=10, server_default="10")
 
 class Partido(Base):
     __tablename__ = "partido"
@@ -77,7 +100,7 @@ class Partido(Base):
     categoria = relationship("Categoria")
 
     posicion_llave = Column(Integer, nullable=True)  
-    partido_ganador_id = Column(Integer, ForeignKey("partido.id"), nullable=True)  # siguiente partido al que avanza el ganador
+    partido_ganador_id = Column(Integer, ForeignKey("partido.id"), nullable=True, index=True)  # siguiente partido al que avanza el ganador
     partido_ganador = relationship("Partido", remote_side=[id])
 
     # Para individuale
@@ -93,9 +116,24 @@ class Partido(Base):
     equipo1 = relationship("EquipoDobles", foreign_keys=[equipo1_id])
     equipo2 = relationship("EquipoDobles", foreign_keys=[equipo2_id])
 
-    grupo_id = Column(Integer, ForeignKey("grupo.id"), nullable=True)
+    grupo_id = Column(Integer, ForeignKey("grupo.id"), nullable=True, index=True)
     grupo = relationship("Grupo", backref="partidos")
 
+    __table_args__ = (
+        # llaves y listados por torneo y categoria (tambien sirve para filtrar solo por torneo)
+        Index("ix_partido_torneo_id_categoria_id", "torneo_id", "categoria_id"),
+        # filtros del listado: categoria/ronda/mesa (también índice de la clave foránea) y rango de horario por torneo
+        Index("ix_partido_categoria_id_ronda_mesa", "categoria_id", "ronda", "mesa"),
+        Index("ix_partido_torneo_id_horario", "torneo_id", "horario"),
+        # choques de horario: partidos de una mesa y partidos de un participante por rango de horario
+        # (los de participante también sirven como índice de la clave foránea)
+        Index("ix_partido_torneo_id_mesa_horario", "torneo_id", "mesa", "horario"),
+        Index("ix_partido_jugador1_id_horario", "jugador1_id", "horario"),
+        Index("ix_partido_jugador2_id_horario", "jugador2_id", "horario"),
+        Index("ix_partido_equipo1_id_horario", "equipo1_id", "horario"),
+        Index("ix_partido_equipo2_id_horario", "equipo2_id", "horario"),
+    )
+
     @validates("tipo")
     def validate_tipo(self, key, tipo):
         if tipo == "individual" and (self.jugador1_id is None or self.jugador2_id is None):
@@ -112,13 +150,59 @@ class ResultadoSet(Base):
     puntos_jugador1 = Column(Integer, nullable=False)
     puntos_jugador2 = Column(Integer, nullable=False)
 
-    partido = relationship("Partido", backref="resultados")
+    partido = relationship("Partido", backref=backref("resultados", order_by="ResultadoSet.numero_set"))
 
     __table_args__ = (
         CheckConstraint("puntos_jugador1 >= 0"),
         CheckConstraint("puntos_jugador2 >= 0"),
+        # un set no se puede registrar dos veces para el mismo partido
+        Index("ix_resultado_set_partido_id_numero_set", "partido_id", "numero_set", unique=True),
+    )
+
+# estado materializado del partido, se recalcula cada vez que se escribe un set
+class EstadoPartido(Base):
+    __tablename__ = "estado_partido"
+    partido_id = Column(Integer, ForeignKey("partido.id"), primary_key=True)
+    sets_ganados1 = Column(Integer, nullable=False, default=0)
+    sets_ganados2 = Column(Integer, nullable=False, default=0)
+    finalizado = Column(Boolean, nullable=False, default=False)
+    ganador_id = Column(Integer, nullable=True) # id de jugador o de equipo según el tipo de partido
+
+# rating Elo de jugadores (partidos individuales) y de equipos (partidos de dobles);
+# se actualiza cuando un partido queda con ganador
+class RatingJugador(Base):
+    __tablename__ = "rating_jugador"
+    jugador_id = Column(Integer, ForeignKey("jugador.id"), primary_key=True)
+    rating = Column(Float, nullable=False)
+    partidos = Column(Integer, nullable=False, default=0)
+
+class RatingEquipo(Base):
+    __tablename__ = "rating_equipo"
+    equipo_id = Column(Integer, ForeignKey("equipo_dobles.id"), primary_key=True)
+    rating = Column(Float, nullable=False)
+    partidos = Column(Integer, nullable=False, default=0)
+
+class HistorialRating(Base):
+    __tablename__ = "historial_rating"
+    id = Column(Integer, primary_key=True)
+    partido_id = Column(Integer, ForeignKey("partido.id"), nullable=False, index=True)
+    tipo = Column(String, nullable=False) # "individual" (jugador) o "dobles" (equipo)
+    participante_id = Column(Integer, nullable=False)
+    rating_antes = Column(Float, nullable=False)
+    rating_despues = Column(Float, nullable=False)
+    fecha = Column(DateTime, nullable=False) # UTC
+
+    __table_args__ = (
+        Index("ix_historial_rating_tipo_participante_id", "tipo", "participante_id"),
     )
 
+# versión por tabla para ETag / Last-Modified; sube en cada commit que escribe en la tabla
+class VersionTabla(Base):
+    __tablename__ = "version_tabla"
+    tabla = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    actualizado = Column(DateTime, nullable=False) # UTC
+
 class Grupo(Base):
     __tablename__ = "grupo"
     id = Column(Integer, primary_key=True)
@@ -129,17 +213,22 @@ class Grupo(Base):
     torneo = relationship("Torneo", backref="grupos")
     categoria = relationship("Categoria", backref="grupos")
 
+    __table_args__ = (
+        Index("ix_grupo_torneo_id_categoria_id", "torneo_id", "categoria_id"),
+    )
+
 # participantes en un grupo (individuales)
 grupo_participante = Table("grupo_participante", Base.metadata,
     Column("grupo_id", ForeignKey("grupo.id"), primary_key=True),
-    Column("jugador_id", ForeignKey("jugador.id"), primary_key=True)
+    Column("jugador_id", ForeignKey("jugador.id"), primary_key=True),
+    Index("ix_grupo_participante_jugador_id", "jugador_id")
 )
 
 class EquipoDobles(Base):
     __tablename__ = "equipo_dobles"
     id = Column(Integer, primary_key=True)
-    jugador1_id = Column(Integer, ForeignKey("jugador.id"), nullable=False)
-    jugador2_id = Column(Integer, ForeignKey("jugador.id"), nullable=False)
+    jugador1_id = Column(Integer, ForeignKey("jugador.id"), nullable=False, index=True)
+    jugador2_id = Column(Integer, ForeignKey("jugador.id"), nullable=False, index=True)
 
     jugador1 = relationship("Jugador", foreign_keys=[jugador1_id])
     jugador2 = relationship("Jugador", foreign_keys=[jugador2_id])
@@ -157,5 +246,6 @@ class EquipoDobles(Base):
 inscripcion_dobles = Table("inscripcion_dobles", Base.metadata,
     Column("equipo_id", ForeignKey("equipo_dobles.id"), primary_key=True),
     Column("torneo_id", ForeignKey("torneo.id"), primary_key=True),
-    Column("categoria_id", ForeignKey("categoria.id"), primary_key=True)
+    Column("categoria_id", ForeignKey("categoria.id"), primary_key=True),
+    Index("ix_inscripcion_dobles_torneo_id_categoria_id", "torneo_id", "categoria_id")
 )
@@ -0,0 +1,65 @@
+# paginacion por cursor (keyset) compartida por todos los listados
+import base64
+import json
+
+from sqlalchemy import tuple_
+
+CABECERA_CURSOR = "X-Next-Cursor"
+
+
+def codificar_cursor(valores):
+    # el cursor es opaco para el cliente: los valores de la llave del ultimo registro en base64
+    return base64.urlsafe_b64encode(json.dumps(list(valores)).encode()).decode()
+
+def _tipo_columna(columna):
+    # tipo de Python esperado para el valor de la columna; object si no se conoce (p.ej. func.lower)
+    try:
+        return columna.type.python_type
+    except NotImplementedError:
+        return object
+
+def _valor_valido(valor, tipo) -> bool:
+    # solo escalares JSON: una lista u objeto en el cursor terminaría en un error de la base (500)
+    if valor is None:
+        return True
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        return False
+    if tipo is int:
+        return isinstance(valor, int)
+    if tipo is float:
+        return isinstance(valor, (int, float))
+    if tipo is str:
+        return isinstance(valor, str)
+    return True
+
+def decodificar_cursor(cursor: str, columnas):
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError("Cursor de paginación inválido.")
+    if not isinstance(valores, list) or len(valores) != len(columnas):
+        raise ValueError("Cursor de paginación inválido.")
+    if not all(_valor_valido(valor, _tipo_columna(columna)) for valor, columna in zip(valores, columnas)):
+        raise ValueError("Cursor de paginación inválido.")
+    return valores
+
+def paginar(consulta, columnas, skip: int = 0, limit: int = 100, cursor=None):
+    # ordena por la llave y aplica el cursor (id > ultimo_id) o, en modo legado, el offset.
+    # sirve tanto para Query como para select()
+    consulta = consulta.order_by(*columnas)
+    if cursor:
+        valores = decodificar_cursor(cursor, columnas)
+        if len(columnas) == 1:
+            consulta = consulta.where(columnas[0] > valores[0])
+        else:
+            consulta = consulta.where(tuple_(*columnas) > tuple_(*valores))
+    elif skip:
+        consulta = consulta.offset(skip)
+    return consulta.limit(limit)
+
+def siguiente_cursor(registros, campos, limit: int):
+    # si la pagina vino completa puede haber mas registros: el cursor apunta al ultimo
+    if limit <= 0 or len(registros) < limit:
+        return None
+    ultimo = registros[-1]
+    return codificar_cursor(getattr(ultimo, campo) for campo in campos)
@@ -0,0 +1,137 @@
+# planificación de horarios y mesas para todos los partidos pendientes de un torneo
+#
+# cálculo puro, sin base de datos: crud arma la lista de partidos y escribe el resultado.
+# Los tiempos se manejan en minutos desde las 00:00 del primer día del torneo.
+#
+# benchmark: python -m tests.benchmark_planificacion [num_partidos] [mesas]
+import heapq
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+MINUTOS_DIA = 24 * 60
+
+
+class AgendaTorneo:
+    # intervalos ocupados [inicio, fin) por recurso: ("mesa", n) o ("jugador", id).
+    # Los intervalos de un recurso no se solapan, así que ordenados por inicio también quedan
+    # ordenados por fin y basta mirar el último que empieza antes del fin consultado: O(log n).
+    def __init__(self):
+        self._inicios = {}
+        self._intervalos = {}
+
+    def conflicto(self, recurso, inicio: int, fin: int):
+        # retorna (inicio, fin, partido_id) del intervalo que choca, o None
+        inicios = self._inicios.get(recurso)
+        if not inicios:
+            return None
+        i = bisect_left(inicios, fin)
+        if i and self._intervalos[recurso][i - 1][1] > inicio:
+            return self._intervalos[recurso][i - 1]
+        return None
+
+    def primer_hueco(self, recursos, inicio: int, duracion: int):
+        # primera hora >= inicio en que todos los recursos están libres durante duracion minutos
+        while True:
+            choques = [c for c in (self.conflicto(r, inicio, inicio + duracion) for r in recursos) if c]
+            if not choques:
+                return inicio
+            inicio = max(c[1] for c in choques)
+
+    def agregar(self, recurso, inicio: int, fin: int, partido_id=None):
+        intervalos = self._intervalos.setdefault(recurso, [])
+        i = bisect_left(self._inicios.setdefault(recurso, []), inicio)
+        self._inicios[recurso].insert(i, inicio)
+        intervalos.insert(i, (inicio, fin, partido_id))
+
+    def agregar_partido(self, partido_id, inicio: int, duracion: int, mesa: int, jugadores, descanso: int = 0):
+        # en los jugadores el intervalo incluye el descanso posterior
+        self.agregar(("mesa", mesa), inicio, inicio + duracion, partido_id)
+        for j in jugadores:
+            self.agregar(("jugador", j), inicio, inicio + duracion + descanso, partido_id)
+
+
+def _a_minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+def _ajustar_a_jornada(inicio: int, duracion: int, apertura: int, cierre: int):
+    # si el partido no alcanza a terminar dentro de la jornada, pasa a la apertura del día siguiente
+    dia, minuto = divmod(inicio, MINUTOS_DIA)
+    if minuto < apertura:
+        return dia * MINUTOS_DIA + apertura
+    if minuto + duracion > cierre:
+        return (dia + 1) * MINUTOS_DIA + apertura
+    return inicio
+
+def planificar(partidos, mesas: int, dias: int, hora_inicio, hora_fin, descanso: int, inicio_minimo: int = 0, agenda: AgendaTorneo = None):
+    # partidos: dicts con "id", "duracion" (minutos), "jugadores" (ids de jugadores que juegan, vacío
+    # si todavía no se conocen) y "siguiente" (id del partido al que avanza el ganador, o None).
+    # agenda: partidos que ya tienen horario fijo y no se mueven; se completa con los planificados.
+    # Retorna {partido_id: (inicio_en_minutos, mesa)}.
+    #
+    # Algoritmo voraz con dos colas de prioridad: las mesas por hora en que quedan libres y los
+    # partidos listos por la hora más temprana en que pueden empezar. Un partido está listo cuando
+    # ya se planificaron los partidos que lo alimentan (partido_ganador_id); puede empezar cuando
+    # terminaron esos partidos y sus jugadores cumplieron el descanso.
+    agenda = agenda if agenda is not None else AgendaTorneo()
+    apertura, cierre = _a_minutos(hora_inicio), _a_minutos(hora_fin)
+    if cierre <= apertura:
+        raise ValueError("La hora de término de la jornada debe ser posterior a la de inicio.")
+    limite = (dias - 1) * MINUTOS_DIA + cierre
+
+    por_id = {p["id"]: p for p in partidos}
+    pendientes_previos = {pid: 0 for pid in por_id}
+    for p in partidos:
+        if p["siguiente"] in por_id:
+            pendientes_previos[p["siguiente"]] += 1
+        if p["duracion"] > cierre - apertura:
+            raise ValueError(f"El partido {p['id']} dura más que una jornada completa.")
+
+    listo_desde = {pid: inicio_minimo for pid in por_id}
+    libre_jugador = {}
+    listos = [(inicio_minimo, pid) for pid, n in pendientes_previos.items() if n == 0]
+    heapq.heapify(listos)
+    libre_mesa = [(inicio_minimo, mesa) for mesa in range(1, mesas + 1)]
+
+    asignaciones = {}
+    while listos:
+        clave, pid = heapq.heappop(listos)
+        p = por_id[pid]
+        disponible = max([listo_desde[pid]] + [libre_jugador.get(j, inicio_minimo) for j in p["jugadores"]])
+        if disponible > clave:
+            # un jugador quedó ocupado desde que el partido entró a la cola: vuelve con la nueva hora
+            heapq.heappush(listos, (disponible, pid))
+            continue
+
+        libre, mesa = heapq.heappop(libre_mesa)
+        recursos = [("mesa", mesa)] + [("jugador", j) for j in p["jugadores"]]
+        inicio = max(libre, disponible)
+        while True:
+            # se salta lo que ya está ocupado en la agenda (mesa o jugadores) hasta un hueco dentro de la jornada
+            inicio = _ajustar_a_jornada(inicio, p["duracion"], apertura, cierre)
+            hueco = agenda.primer_hueco(recursos[:1], inicio, p["duracion"])
+            hueco = agenda.primer_hueco(recursos[1:], hueco, p["duracion"] + descanso) if len(recursos) > 1 else hueco
+            if hueco == inicio:
+                break
+            inicio = hueco
+        fin = inicio + p["duracion"]
+        if fin > limite:
+            raise ValueError("Los días del torneo no alcanzan para jugar todos los partidos pendientes.")
+        heapq.heappush(libre_mesa, (fin, mesa))
+        agenda.agregar_partido(pid, inicio, p["duracion"], mesa, p["jugadores"], descanso)
+        asignaciones[pid] = (inicio, mesa)
+
+        for j in p["jugadores"]:
+            libre_jugador[j] = fin + descanso
+        siguiente = p["siguiente"]
+        if siguiente in por_id:
+            listo_desde[siguiente] = max(listo_desde[siguiente], fin + descanso)
+            pendientes_previos[siguiente] -= 1
+            if pendientes_previos[siguiente] == 0:
+                heapq.heappush(listos, (listo_desde[siguiente], siguiente))
+
+    if len(asignaciones) < len(por_id):
+        raise ValueError("Hay partidos con dependencias circulares en la llave.")
+    return asignaciones
+
+def a_datetime(fecha_inicio, minutos: int):
+    return datetime.combine(fecha_inicio, datetime.min.time()) + timedelta(minutes=minutos)
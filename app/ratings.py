@@ -0,0 +1,144 @@
+# ratings Elo para jugadores y equipos de dobles
+#
+# la actualización incremental (un partido a la vez) la hace crud cuando un partido queda con
+# ganador. La reconstrucción completa reproduce todos los partidos finalizados en orden
+# cronológico con NumPy, en lotes de partidos que no repiten participante:
+#
+#   python -m app.ratings reconstruir
+import os
+import sys
+from datetime import datetime, timezone
+
+RATING_INICIAL = 1500.0
+K = float(os.getenv("RATING_K", "32"))
+TAMANO_INSERCION = 10_000
+
+
+def esperado(rating_a: float, rating_b: float):
+    return 1.0 / (1.0 + 10 ** ((rating_b - rating_a) / 400.0))
+
+def actualizar_par(rating_a: float, rating_b: float, gana_a: bool, k: float = K):
+    # suma cero: lo que gana uno lo pierde el otro
+    delta = k * ((1.0 if gana_a else 0.0) - esperado(rating_a, rating_b))
+    return rating_a + delta, rating_b - delta
+
+def lotes_sin_repetidos(participantes1, participantes2):
+    # corta la secuencia cronológica en tramos donde nadie juega dos veces;
+    # dentro de un tramo todos los partidos se pueden actualizar a la vez
+    lotes = []
+    inicio = 0
+    vistos = set()
+    for i, (a, b) in enumerate(zip(participantes1, participantes2)):
+        if a in vistos or b in vistos:
+            lotes.append((inicio, i))
+            inicio = i
+            vistos = set()
+        vistos.add(a)
+        vistos.add(b)
+    if inicio < len(participantes1):
+        lotes.append((inicio, len(participantes1)))
+    return lotes
+
+def reconstruir(participantes1, participantes2, gana1, inicial: float = RATING_INICIAL, k: float = K):
+    # participantes1/2 y gana1: secuencias del mismo largo en orden cronológico.
+    # Retorna (ids, ratings, partidos_jugados, antes1, despues1, antes2, despues2) como arreglos NumPy
+    try:
+        import numpy as np
+    except ImportError:
+        raise RuntimeError("La reconstrucción de ratings requiere numpy instalado.")
+
+    p1 = np.asarray(participantes1, dtype=np.int64)
+    p2 = np.asarray(participantes2, dtype=np.int64)
+    resultado = np.asarray(gana1, dtype=np.float64)
+    ids, indices = np.unique(np.concatenate([p1, p2]), return_inverse=True)
+    i1, i2 = indices[:len(p1)], indices[len(p1):]
+
+    ratings = np.full(len(ids), inicial, dtype=np.float64)
+    antes1 = np.empty(len(p1))
+    antes2 = np.empty(len(p1))
+    deltas = np.empty(len(p1))
+    for inicio, fin in lotes_sin_repetidos(i1.tolist(), i2.tolist()):
+        a, b = i1[inicio:fin], i2[inicio:fin]
+        ra, rb = ratings[a], ratings[b]
+        delta = k * (resultado[inicio:fin] - 1.0 / (1.0 + 10 ** ((rb - ra) / 400.0)))
+        antes1[inicio:fin] = ra
+        antes2[inicio:fin] = rb
+        deltas[inicio:fin] = delta
+        ratings[a] = ra + delta
+        ratings[b] = rb - delta
+    jugados = np.bincount(indices, minlength=len(ids))
+    return ids, ratings, jugados, antes1, antes1 + deltas, antes2, antes2 - deltas
+
+
+def reconstruir_en_base(db):
+    # borra ratings e historial y reproduce todos los partidos finalizados (por horario, id)
+    from sqlalchemy import delete, select
+    from . import models
+
+    p = models.Partido.__table__
+    e = models.EstadoPartido.__table__
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.execute(delete(models.HistorialRating))
+    db.execute(delete(models.RatingJugador))
+    db.execute(delete(models.RatingEquipo))
+
+    resumen = {}
+    for tipo, modelo, llave, col1, col2 in (
+        ("individual", models.RatingJugador, "jugador_id", p.c.jugador1_id, p.c.jugador2_id),
+        ("dobles", models.RatingEquipo, "equipo_id", p.c.equipo1_id, p.c.equipo2_id),
+    ):
+        filas = db.execute(
+            select(p.c.id, col1, col2, e.c.ganador_id)
+            .select_from(p.join(e, e.c.partido_id == p.c.id))
+            .where((p.c.tipo == tipo) & e.c.finalizado.is_(True) & col1.isnot(None) & col2.isnot(None))
+            .order_by(p.c.horario, p.c.id)
+            .execution_options(yield_per=TAMANO_INSERCION)
+        )
+        partidos, participantes1, participantes2, gana1 = [], [], [], []
+        for partido_id, a, b, ganador in filas:
+            partidos.append(partido_id)
+            participantes1.append(a)
+            participantes2.append(b)
+            gana1.append(1.0 if ganador == a else 0.0)
+        if not partidos:
+            resumen[tipo] = 0
+            continue
+
+        ids, ratings, jugados, antes1, despues1, antes2, despues2 = reconstruir(participantes1, participantes2, gana1)
+        _insertar_por_partes(db, modelo.__table__, [
+            {llave: int(i), "rating": float(r), "partidos": int(n)} for i, r, n in zip(ids, ratings, jugados)
+        ])
+        historial = []
+        for j, partido_id in enumerate(partidos):
+            historial.append({"partido_id": partido_id, "tipo": tipo, "participante_id": participantes1[j],
+                              "rating_antes": float(antes1[j]), "rating_despues": float(despues1[j]), "fecha": ahora})
+            historial.append({"partido_id": partido_id, "tipo": tipo, "participante_id": participantes2[j],
+                              "rating_antes": float(antes2[j]), "rating_despues": float(despues2[j]), "fecha": ahora})
+        _insertar_por_partes(db, models.HistorialRating.__table__, historial)
+        resumen[tipo] = len(partidos)
+    db.commit()
+    return resumen
+
+def _insertar_por_partes(db, tabla, filas):
+    for i in range(0, len(filas), TAMANO_INSERCION):
+        db.execute(tabla.insert(), filas[i:i + TAMANO_INSERCION])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["reconstruir"]:
+        print("uso: python -m app.ratings reconstruir", file=sys.stderr)
+        return 2
+    from .db import SessionLocal
+    from . import versiones # para que la reconstrucción invalide los ETag de ratings
+    db = SessionLocal()
+    try:
+        resumen = reconstruir_en_base(db)
+    finally:
+        db.close()
+    print(f"partidos individuales: {resumen['individual']}, partidos de dobles: {resumen['dobles']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from datetime import date, datetime
+from datetime import date, datetime, time
 from typing import Optional, List
 
 # Esquemas para Asociacion
@@ -82,6 +82,7 @@ class TorneoBase(BaseModel):
     mesas_disponibles: int = Field(..., gt=0)
     fecha_inscripcion_inicio: date
     fecha_inscripcion_fin: date
+    minutos_por_set: int = Field(10, gt=0) # duración estimada de un partido = sets_por_partido * minutos_por_set
 
 class TorneoCreate(TorneoBase):
     pass
@@ -93,6 +94,7 @@ class TorneoUpdate(TorneoBase):
     mesas_disponibles: Optional[int] = Field(None, gt=0)
     fecha_inscripcion_inicio: Optional[date] = None
     fecha_inscripcion_fin: Optional[date] = None
+    minutos_por_set: Optional[int] = Field(None, gt=0)
 
 class TorneoOut(TorneoBase):
     id: int
@@ -160,6 +162,18 @@ class PartidoOut(PartidoBase):
     class Config:
         from_attributes = True
 
+# filtros del listado de partidos (parámetros de query); todos opcionales y combinables
+class FiltrosPartido(BaseModel):
+    torneo_id: Optional[int] = None
+    categoria_id: Optional[int] = None
+    ronda: Optional[str] = None
+    mesa: Optional[int] = None
+    grupo_id: Optional[int] = None
+    jugador_id: Optional[int] = None # como jugador1/jugador2 o como integrante de un equipo de dobles
+    horario_desde: Optional[datetime] = None
+    horario_hasta: Optional[datetime] = None
+    bye: Optional[bool] = None
+
 # Esquemas para ResultadoSet
 class ResultadoSetBase(BaseModel):
     partido_id: int
@@ -182,6 +196,52 @@ class ResultadoSetOut(ResultadoSetBase):
     class Config:
         from_attributes = True  
 
+# partido con participantes y sets anidados (vista de llave)
+class PartidoDetailOut(PartidoOut):
+    categoria: Optional[CategoriaOut] = None
+    jugador1: Optional[JugadorOut] = None
+    jugador2: Optional[JugadorOut] = None
+    equipo1: Optional[EquipoDoblesOut] = None
+    equipo2: Optional[EquipoDoblesOut] = None
+    resultados: List[ResultadoSetOut] = [] # ordenados por numero_set
+
+# Esquema para el estado materializado de un partido
+class EstadoPartidoOut(BaseModel):
+    partido_id: int
+    sets_ganados1: int
+    sets_ganados2: int
+    finalizado: bool
+    ganador_id: Optional[int] = None
+
+    class Config:
+        from_attributes = True
+
+# Esquemas para la carga de sets por lote
+class ResultadoSetLoteCreate(BaseModel):
+    resultados: List[ResultadoSetCreate]
+    avanzar_ganadores: bool = False # avanza en la llave a los ganadores de los partidos que terminen
+
+class ErrorLote(BaseModel):
+    indice: int # posición del elemento en la lista enviada
+    detalle: str
+
+class ResultadoSetLoteOut(BaseModel):
+    creados: List[ResultadoSetOut]
+    errores: List[ErrorLote]
+    finalizados: List[EstadoPartidoOut] # partidos que terminaron con este lote
+
+# Esquemas para la planificación de horarios y mesas de un torneo
+class PlanificacionCreate(BaseModel):
+    desde: Optional[datetime] = None # por defecto el primer día del torneo
+    hora_inicio: time = time(9, 0) # apertura de cada jornada
+    hora_fin: time = time(21, 0) # ningún partido termina después de esta hora
+    descanso_minutos: int = Field(10, ge=0) # descanso mínimo de un jugador entre partidos
+
+class PlanificacionOut(BaseModel):
+    planificados: int
+    inicio: Optional[datetime] = None
+    fin: Optional[datetime] = None # hora estimada de término del último partido
+
 # Esquemas para Grupo
 class GrupoBase(BaseModel):
     nombre: str
@@ -202,6 +262,38 @@ class GrupoOut(GrupoBase):
     class Config:
         from_attributes = True
 
+# sorteo automático de grupos desde las inscripciones de una categoría
+class SorteoGruposCreate(BaseModel):
+    num_grupos: int = Field(..., gt=0)
+    generar_partidos: bool = False # generar también los partidos todos contra todos de cada grupo
+
+class GrupoSorteadoOut(BaseModel):
+    id: int
+    nombre: str
+    jugadores_ids: List[int] # en orden de siembra
+
+class SorteoGruposOut(BaseModel):
+    grupos: List[GrupoSorteadoOut]
+    partidos_creados: int
+
+# sorteo de todas las categorías de un torneo (grupos + todos contra todos, o llave, y llaves de dobles)
+class ConstruccionTorneoCreate(BaseModel):
+    formato_individual: str = Field("grupos", pattern="^(grupos|llave)$")
+    jugadores_por_grupo: int = Field(4, ge=2)
+    semilla: Optional[int] = None # misma semilla = mismas llaves
+    procesos: Optional[int] = Field(None, gt=0) # por defecto, un proceso por CPU (o ninguno si el torneo es chico)
+
+class CategoriaConstruidaOut(BaseModel):
+    categoria_id: int
+    grupos: List[GrupoSorteadoOut]
+    partidos_creados: int
+    segundos: float # tiempo de cálculo del sorteo de la categoría
+
+class ConstruccionTorneoOut(BaseModel):
+    categorias: List[CategoriaConstruidaOut]
+    segundos_calculo: float
+    segundos_escritura: float
+
 # Esquemas para Inscripción Individual (tabla de asociación inscripcion)
 class InscripcionCreate(BaseModel):
     jugador_id: int
@@ -224,6 +316,16 @@ class InscripcionDoblesOut(InscripcionDoblesCreate):
     class Config:
         from_attributes = True
 
+# Esquemas para la importación masiva de inscripciones
+class ErrorImportacion(BaseModel):
+    fila: int # número de fila en el archivo (la cabecera del CSV es la fila 1)
+    detalle: str
+
+class ImportacionOut(BaseModel):
+    insertadas: int
+    duplicadas: int # filas válidas que ya estaban inscritas
+    errores: List[ErrorImportacion]
+
 # Esquemas para Grupo Participante (tabla de asociación grupo_participante)
 class GrupoParticipanteCreate(BaseModel):
     grupo_id: int
@@ -233,3 +335,25 @@ class GrupoParticipanteOut(GrupoParticipanteCreate):
 
     class Config:
         from_attributes = True
+
+class GrupoParticipanteDetalleOut(GrupoParticipanteOut):
+    jugador: Optional[JugadorOut] = None # solo si se pide incluir los datos del jugador
+
+# tabla de posiciones de un grupo (victoria = 2 puntos, derrota = 1)
+class ClasificacionGrupoOut(BaseModel):
+    posicion: int
+    jugador_id: int
+    puntos: int
+    partidos_jugados: int
+    partidos_ganados: int
+    partidos_perdidos: int
+    sets_ganados: int
+    sets_perdidos: int
+    puntos_favor: int
+    puntos_contra: int
+
+# rating Elo de un jugador (individual) o de un equipo de dobles
+class RatingOut(BaseModel):
+    participante_id: int
+    rating: float
+    partidos: int
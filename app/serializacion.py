@@ -0,0 +1,41 @@
+# respuesta JSON rápida para listados grandes
+#
+# las filas se leen con Core (solo las columnas del esquema de salida) y se codifican directo,
+# sin construir objetos ORM ni validar cada uno con Pydantic: los tipos ya vienen de las mismas
+# columnas que declaran los esquemas *Out. Usa orjson si está instalado y si no json.
+#
+# microbenchmark: python -m tests.benchmark_serializacion
+import json
+from datetime import date, datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_default(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def dumps(valor) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(valor)
+    return json.dumps(valor, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def columnas_esquema(tabla, esquema):
+    # columnas de la tabla en el orden de los campos del esquema, así el JSON sale igual que con response_model
+    return [tabla.c[campo] for campo in esquema.model_fields]
+
+def filas_a_dicts(filas):
+    return [dict(fila._mapping) for fila in filas]
+
+
+class RespuestaRapida(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
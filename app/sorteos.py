@@ -0,0 +1,154 @@
+# calculos de sorteo que no acceden a la base de datos
+#
+# benchmark del sorteo en paralelo de un torneo completo: python -m tests.benchmark_sorteos [categorias] [inscritos] [procesos]
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# bajo este total de inscritos el sorteo se calcula sin pool (arrancar los procesos toma ~200 ms)
+MIN_INSCRITOS_PARALELO = 50_000
+
+
+def construir_llave(participantes_ids):
+    # Arma todas las rondas de una llave de eliminacion directa.
+    # Retorna una lista de rondas (la primera ronda primero); cada ronda es una lista de
+    # cruces {"participante1", "participante2", "bye"} ordenados por posicion en la llave.
+    # El ganador del cruce en la posicion p (desde 1) avanza al cruce (p + 1) // 2 de la ronda siguiente.
+    num_participantes = len(participantes_ids)
+    if num_participantes == 0:
+        return []
+
+    # Determinar la potencia de 2 más cercana y mayor o igual al número de participantes
+    llave_size = 2
+    while llave_size < num_participantes:
+        llave_size *= 2
+
+    num_partidos = llave_size // 2
+    num_byes = llave_size - num_participantes
+
+    # los byes se reparten a lo largo de la llave, nunca dos byes en el mismo cruce
+    posiciones_bye = {i * num_partidos // num_byes for i in range(num_byes)}
+
+    participantes = iter(participantes_ids)
+    primera_ronda = []
+    for posicion in range(num_partidos):
+        participante1 = next(participantes)
+        participante2 = None if posicion in posiciones_bye else next(participantes)
+        primera_ronda.append({
+            "participante1": participante1,
+            "participante2": participante2,
+            "bye": participante2 is None
+        })
+
+    rondas = [primera_ronda]
+    while len(rondas[-1]) > 1:
+        anterior = rondas[-1]
+        siguiente = [{"participante1": None, "participante2": None, "bye": False} for _ in range(len(anterior) // 2)]
+        if len(rondas) == 1:
+            # el participante con bye avanza directo a la segunda ronda
+            for posicion, cruce in enumerate(anterior):
+                if cruce["bye"]:
+                    lado = "participante1" if posicion % 2 == 0 else "participante2"
+                    siguiente[posicion // 2][lado] = cruce["participante1"]
+        rondas.append(siguiente)
+
+    return rondas
+
+
+def nombre_grupo(indice):
+    # 0 -> "A", 25 -> "Z", 26 -> "AA" (como las columnas de una planilla)
+    letras = ""
+    indice += 1
+    while indice > 0:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(ord("A") + resto) + letras
+    return f"Grupo {letras}"
+
+
+def repartir_grupos(participantes, num_grupos):
+    # Reparte participantes en grupos con siembra en serpiente.
+    # participantes: lista de (id, rating, asociacion_id). Se ordenan por rating (mayor primero) y se
+    # toman en bombos de num_grupos; el bombo par recorre los grupos 0..n-1 y el impar n-1..0.
+    # Dentro de cada bombo, cada participante va al primer grupo libre del recorrido que todavía no
+    # tenga a nadie de su asociación (si no hay, al que tenga menos), así cada grupo recibe uno por bombo.
+    # Retorna una lista de num_grupos listas de ids.
+    if num_grupos <= 0:
+        raise ValueError("El número de grupos debe ser mayor a 0.")
+    ordenados = sorted(participantes, key=lambda p: (-p[1], p[0]))
+    grupos = [[] for _ in range(num_grupos)]
+    asociaciones = [{} for _ in range(num_grupos)]
+    for numero_bombo, inicio in enumerate(range(0, len(ordenados), num_grupos)):
+        recorrido = list(range(num_grupos)) if numero_bombo % 2 == 0 else list(range(num_grupos - 1, -1, -1))
+        for participante_id, _, asociacion_id in ordenados[inicio:inicio + num_grupos]:
+            destino = recorrido[0]
+            if asociacion_id is not None:
+                # el primer grupo sin nadie de la asociación; si no hay, el que tenga menos
+                for grupo in recorrido:
+                    if asociacion_id not in asociaciones[grupo]:
+                        destino = grupo
+                        break
+                else:
+                    destino = min(recorrido, key=lambda g: asociaciones[g][asociacion_id])
+                asociaciones[destino][asociacion_id] = asociaciones[destino].get(asociacion_id, 0) + 1
+            recorrido.remove(destino)
+            grupos[destino].append(participante_id)
+    return grupos
+
+
+def todos_contra_todos(participantes_ids):
+    # cruces de un grupo: cada participante contra todos los demás, una vez
+    return [
+        (participantes_ids[i], participantes_ids[j])
+        for i in range(len(participantes_ids))
+        for j in range(i + 1, len(participantes_ids))
+    ]
+
+
+def sortear_categoria(tarea):
+    # Sorteo completo de una categoría, pensado para correr en otro proceso (solo datos simples).
+    # tarea: {"categoria_id", "individuales": [(id, rating, asociacion_id)], "dobles": [ids],
+    #         "formato_individual": "grupos" | "llave", "jugadores_por_grupo", "semilla"}
+    # Retorna {"categoria_id", "grupos": [[ids]], "llave_individual": rondas | None, "llave_dobles": rondas | None, "segundos"}.
+    # Los cruces de cada grupo (todos_contra_todos) los arma quien inserta: son baratos y devolverlos
+    # desde el proceso solo agrandaría el resultado a serializar.
+    inicio = time.perf_counter()
+    semilla = tarea.get("semilla")
+    azar = random.Random(None if semilla is None else f"{semilla}-{tarea['categoria_id']}")
+    resultado = {"categoria_id": tarea["categoria_id"], "grupos": [], "llave_individual": None, "llave_dobles": None}
+
+    individuales = tarea["individuales"]
+    if len(individuales) >= 2:
+        if tarea["formato_individual"] == "grupos":
+            num_grupos = max(1, len(individuales) // tarea["jugadores_por_grupo"])
+            resultado["grupos"] = repartir_grupos(individuales, num_grupos)
+        else:
+            ids = [p[0] for p in individuales]
+            azar.shuffle(ids)
+            resultado["llave_individual"] = construir_llave(ids)
+
+    if len(tarea["dobles"]) >= 2:
+        ids = list(tarea["dobles"])
+        azar.shuffle(ids)
+        resultado["llave_dobles"] = construir_llave(ids)
+
+    resultado["segundos"] = time.perf_counter() - inicio
+    return resultado
+
+
+def sortear_categorias(tareas, procesos=None):
+    # Sortea todas las categorías en un pool de procesos (el cálculo es Python puro, así que los
+    # hilos no escalan por el GIL). Con un solo proceso o una sola categoría se calcula aquí mismo,
+    # y también si no se pidió un número de procesos y el torneo es chico: levantar el pool cuesta
+    # más que el sorteo. Los resultados vuelven en el mismo orden que las tareas.
+    if procesos is None and sum(len(t["individuales"]) + len(t["dobles"]) for t in tareas) < MIN_INSCRITOS_PARALELO:
+        procesos = 1
+    procesos = min(procesos or os.cpu_count() or 1, len(tareas))
+    if procesos <= 1:
+        return [sortear_categoria(tarea) for tarea in tareas]
+    # forkserver evita hacer fork del proceso del servidor, que tiene hilos corriendo
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context("forkserver" if "forkserver" in metodos else None)
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto) as pool:
+        return list(pool.map(sortear_categoria, tareas, chunksize=max(1, len(tareas) // (procesos * 4))))
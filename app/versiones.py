@@ -0,0 +1,73 @@
+# contador de versión por tabla, usado para ETag y Last-Modified en las rutas GET
+#
+# durante la transacción se anotan en session.info las tablas escritas (flush del ORM y
+# INSERT/UPDATE/DELETE ejecutados por la sesión); después del commit se incrementa su fila en
+# version_tabla en una transacción aparte y corta. Así los escritores no quedan en fila detrás del
+# bloqueo de esa fila durante toda su transacción. Orden resultante: una versión leída antes que los
+# datos nunca es más nueva que ellos (lo que necesitan ETag y la caché de clasificación); entre el
+# commit y el incremento un lector puede ver datos nuevos con la versión anterior, que se corrige
+# en cuanto llega el incremento.
+from datetime import datetime, timezone
+
+from sqlalchemy import event, inspect, select
+
+from . import models
+from .db import SessionLocal
+
+TABLA = models.VersionTabla.__table__
+
+
+def _anotar(session, tabla: str):
+    if tabla != TABLA.name:
+        session.info.setdefault("tablas_modificadas", set()).add(tabla)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _tablas_del_flush(session, flush_context):
+    for instancia in session.new | session.dirty | session.deleted:
+        _anotar(session, inspect(instancia).mapper.local_table.name)
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _tablas_de_sentencias(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        tabla = getattr(orm_execute_state.statement, "table", None)
+        if tabla is not None and getattr(tabla, "name", None):
+            _anotar(orm_execute_state.session, tabla.name)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _incrementar_versiones(session):
+    tablas = session.info.pop("tablas_modificadas", None)
+    if tablas:
+        with session.get_bind().begin() as conexion:
+            incrementar(conexion, tablas)
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _descartar(session):
+    session.info.pop("tablas_modificadas", None)
+
+
+def incrementar(conexion, tablas):
+    # INSERT ... ON CONFLICT DO UPDATE: la fila de una tabla se crea la primera vez que se escribe
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None)
+    dialecto = conexion.dialect.name
+    if dialecto == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialecto == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        conexion.execute(
+            TABLA.update().where(TABLA.c.tabla.in_(tablas)).values(version=TABLA.c.version + 1, actualizado=ahora)
+        )
+        return
+    stmt = insert(TABLA)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TABLA.c.tabla],
+        set_={"version": TABLA.c.version + 1, "actualizado": stmt.excluded.actualizado}
+    )
+    conexion.execute(stmt, [{"tabla": t, "version": 1, "actualizado": ahora} for t in sorted(tablas)])
+
+async def leer(db, tablas):
+    # {tabla: (version, actualizado)}; una tabla que nunca se escribió queda en (0, None)
+    filas = (await db.execute(select(TABLA).where(TABLA.c.tabla.in_(tablas)))).fetchall()
+    versiones = {t: (0, None) for t in tablas}
+    versiones.update({f.tabla: (f.version, f.actualizado) for f in filas})
+    return versiones
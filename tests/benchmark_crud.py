@@ -0,0 +1,70 @@
+# consultas y commits de crud.generar_partidos_grupo frente al camino anterior (una consulta de
+# existencia y un create_partido con su commit por cada cruce), sobre una base sqlite en memoria.
+# No corre con pytest (no es test_*): python -m tests.benchmark_crud [jugadores]
+import sys
+import time
+from datetime import date, datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import tests.conftest  # noqa: F401  fija DATABASE_URI temporal antes de importar la app
+
+from app import crud, models, sorteos
+from app.base import Base
+
+
+def main(num_jugadores: int):
+    motor = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(motor)
+    contadores = {"consultas": 0, "commits": 0}
+    event.listen(motor, "before_cursor_execute", lambda *args: contadores.__setitem__("consultas", contadores["consultas"] + 1))
+    event.listen(motor, "commit", lambda *args: contadores.__setitem__("commits", contadores["commits"] + 1))
+
+    db = sessionmaker(bind=motor)()
+    torneo = models.Torneo(nombre="Benchmark", fecha_inicio=date(2030, 1, 1), fecha_fin=date(2030, 1, 5), mesas_disponibles=8,
+                           fecha_inscripcion_inicio=date(2029, 1, 1), fecha_inscripcion_fin=date(2029, 12, 31))
+    categoria = models.Categoria(nombre="Benchmark", edad_min=0, edad_max=99, genero="M", sets_por_partido=5, puntos_por_set=11)
+    db.add_all([torneo, categoria])
+    db.flush()
+    grupos = [models.Grupo(nombre=nombre, torneo_id=torneo.id, categoria_id=categoria.id) for nombre in ("antes", "ahora")]
+    jugadores = [models.Jugador(nombre=f"J{i}", fecha_nacimiento=date(2000, 1, 1), genero="M", ciudad="x", pais="x") for i in range(num_jugadores)]
+    db.add_all(grupos + jugadores)
+    db.flush()
+    db.execute(models.grupo_participante.insert(), [{"grupo_id": g.id, "jugador_id": j.id} for g in grupos for j in jugadores])
+    db.commit()
+
+    def por_cruce(grupo):
+        ids = [j.id for j in jugadores]
+        for jugador1_id, jugador2_id in sorteos.todos_contra_todos(ids):
+            existe = db.query(models.Partido).filter(
+                models.Partido.grupo_id == grupo.id,
+                ((models.Partido.jugador1_id == jugador1_id) & (models.Partido.jugador2_id == jugador2_id)) |
+                ((models.Partido.jugador1_id == jugador2_id) & (models.Partido.jugador2_id == jugador1_id))
+            ).first()
+            if existe:
+                continue
+            # mismas lecturas y commit que create_partido por cada partido
+            db.query(models.Jugador).filter_by(id=jugador1_id).first()
+            db.query(models.Jugador).filter_by(id=jugador2_id).first()
+            crud.get_torneo(db, grupo.torneo_id)
+            crud.get_categoria(db, grupo.categoria_id)
+            partido = models.Partido(torneo_id=grupo.torneo_id, categoria_id=grupo.categoria_id, horario=datetime.now(), mesa=1,
+                                     ronda="Fase de Grupos", bye=False, jugador1_id=jugador1_id, jugador2_id=jugador2_id,
+                                     grupo_id=grupo.id, tipo="individual")
+            db.add(partido)
+            db.commit()
+            db.refresh(partido)
+
+    for nombre, generar in (("antes (por cruce)", lambda: por_cruce(grupos[0])), ("ahora (masivo)", lambda: crud.generar_partidos_grupo(db, grupos[1].id))):
+        contadores.update(consultas=0, commits=0)
+        t0 = time.perf_counter()
+        generar()
+        transcurrido = time.perf_counter() - t0
+        print(f"{nombre}: {num_jugadores} jugadores, {contadores['consultas']} consultas, "
+              f"{contadores['commits']} commits, {transcurrido * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16)
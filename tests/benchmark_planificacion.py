@@ -0,0 +1,47 @@
+# tiempo de planificacion.planificar para un torneo sintético: llaves de 64 jugadores (63 partidos)
+# más grupos de 4 hasta completar num_partidos.
+# No corre con pytest (no es test_*): python -m tests.benchmark_planificacion [num_partidos] [mesas]
+import sys
+import time
+from datetime import time as hora
+
+from app.planificacion import planificar
+
+
+def main(num_partidos: int, mesas: int):
+    partidos = []
+    siguiente_id = 1
+    jugador = 1
+    while len(partidos) < num_partidos:
+        if len(partidos) % 2 == 0:
+            rondas = [32, 16, 8, 4, 2, 1]
+            ids = []
+            for n in rondas:
+                ids.append(list(range(siguiente_id, siguiente_id + n)))
+                siguiente_id += n
+            for r, ronda in enumerate(ids):
+                for pos, pid in enumerate(ronda):
+                    jugadores = [jugador + 2 * pos, jugador + 2 * pos + 1] if r == 0 else []
+                    sig = ids[r + 1][pos // 2] if r + 1 < len(ids) else None
+                    partidos.append({"id": pid, "duracion": 40, "jugadores": jugadores, "siguiente": sig})
+            jugador += 64
+        else:
+            for a in range(4):
+                for b in range(a + 1, 4):
+                    partidos.append({"id": siguiente_id, "duracion": 40, "jugadores": [jugador + a, jugador + b], "siguiente": None})
+                    siguiente_id += 1
+            jugador += 4
+    partidos = partidos[:num_partidos]
+    ids = {p["id"] for p in partidos}
+    for p in partidos:
+        if p["siguiente"] not in ids:
+            p["siguiente"] = None
+
+    t0 = time.perf_counter()
+    asignaciones = planificar(partidos, mesas, dias=60, hora_inicio=hora(9), hora_fin=hora(21), descanso=10)
+    transcurrido = time.perf_counter() - t0
+    print(f"{len(asignaciones)} partidos en {mesas} mesas: {transcurrido * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000, int(sys.argv[2]) if len(sys.argv) > 2 else 16)
@@ -0,0 +1,41 @@
+# microbenchmark de serializacion: validar cada fila con PartidoOut (response_model) frente a
+# codificar las filas Core directo con serializacion.dumps.
+# No corre con pytest (no es test_*): python -m tests.benchmark_serializacion [filas ...]
+import json
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from app import serializacion
+from app.schemas import PartidoOut
+
+
+def main(tamanos):
+    campos = list(PartidoOut.model_fields)
+    for n in tamanos:
+        filas = [
+            (i, "individual", 1, 1, datetime(2030, 1, 1, 9, 0), i % 16 + 1, "Ronda 1", False, i, None, i * 2, i * 2 + 1, None, None, None)
+            for i in range(n)
+        ]
+        nombres = ["id", "tipo", "torneo_id", "categoria_id", "horario", "mesa", "ronda", "bye", "posicion_llave",
+                   "partido_ganador_id", "jugador1_id", "jugador2_id", "equipo1_id", "equipo2_id", "grupo_id"]
+        objetos = [SimpleNamespace(**dict(zip(nombres, f))) for f in filas]
+
+        # camino actual: validar cada objeto con from_attributes y codificar con json
+        t0 = time.perf_counter()
+        json.dumps([PartidoOut.model_validate(o).model_dump(mode="json") for o in objetos])
+        actual = time.perf_counter() - t0
+
+        # camino rápido: filas Core a dicts y codificación directa
+        t0 = time.perf_counter()
+        indices = [nombres.index(c) for c in campos]
+        serializacion.dumps([{c: f[i] for c, i in zip(campos, indices)} for f in filas])
+        rapido = time.perf_counter() - t0
+
+        print(f"{n:>7} filas: actual {actual * 1000:8.1f} ms | rápido {rapido * 1000:8.1f} ms | x{actual / rapido:.1f}"
+              f" ({'orjson' if serializacion.orjson else 'json'})")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [100, 10_000, 100_000])
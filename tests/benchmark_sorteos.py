@@ -0,0 +1,35 @@
+# sorteo de un torneo completo con sorteos.sortear_categorias, en línea y en un pool de procesos.
+# No corre con pytest (no es test_*): python -m tests.benchmark_sorteos [categorias] [inscritos] [procesos]
+import os
+import random
+import sys
+import time
+
+from app.sorteos import sortear_categorias
+
+
+def main(num_categorias: int, inscritos: int, procesos: int):
+    azar = random.Random(1)
+    tareas = [{
+        "categoria_id": c,
+        "individuales": [(c * inscritos + i, azar.uniform(1000, 2000), azar.randint(1, 20)) for i in range(inscritos)],
+        "dobles": list(range(c * inscritos, c * inscritos + inscritos // 2)),
+        "formato_individual": "grupos",
+        "jugadores_por_grupo": 4,
+        "semilla": 1,
+    } for c in range(num_categorias)]
+    for n in sorted({1, procesos}):
+        t0 = time.perf_counter()
+        resultados = sortear_categorias(tareas, n)
+        transcurrido = time.perf_counter() - t0
+        calculo = sum(r["segundos"] for r in resultados)
+        print(f"{num_categorias} categorías de {inscritos} inscritos, {n} proceso(s): {transcurrido * 1000:.1f} ms "
+              f"(cálculo sumado {calculo * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 400,
+        int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1),
+    )
@@ -0,0 +1,124 @@
+# prueba de carga de los endpoints de lectura: rutas async (crud_async + AsyncSession) contra
+# las mismas rutas sync (crud + Session en el threadpool), sobre la misma base sqlite sembrada.
+# No corre con pytest (no es test_*): python -m tests.carga [concurrencia] [segundos]
+import asyncio
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from tests.conftest import crear_categoria, crear_jugadores, crear_torneo  # fija DATABASE_URI temporal
+
+from app import crud, crud_async, models, schemas
+from app.base import Base
+from app.db import SessionLocal, engine, get_db
+from app.db_async import get_async_db
+
+RUTAS = ["/jugadores/{id}", "/jugadores/?limit=100", "/partidos/?limit=100&torneo_id={torneo}", "/torneos/"]
+
+
+def app_async():
+    app = FastAPI()
+
+    @app.get("/jugadores/{jugador_id}", response_model=schemas.JugadorOut)
+    async def leer_jugador(jugador_id: int, db: AsyncSession = Depends(get_async_db)):
+        return await crud_async.get_jugador(db, jugador_id)
+
+    @app.get("/jugadores/", response_model=List[schemas.JugadorOut])
+    async def listar_jugadores(limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+        return await crud_async.get_jugadores(db, 0, limit, cursor)
+
+    @app.get("/partidos/", response_model=List[schemas.PartidoOut])
+    async def listar_partidos(filtros: schemas.FiltrosPartido = Depends(), limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+        return await crud_async.get_partidos(db, 0, limit, None, filtros)
+
+    @app.get("/torneos/", response_model=List[schemas.TorneoOut])
+    async def listar_torneos(limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+        return await crud_async.get_torneos(db, 0, limit)
+
+    return app
+
+
+def app_sync():
+    app = FastAPI()
+
+    @app.get("/jugadores/{jugador_id}", response_model=schemas.JugadorOut)
+    def leer_jugador(jugador_id: int, db: Session = Depends(get_db)):
+        return crud.get_jugador(db, jugador_id)
+
+    @app.get("/jugadores/", response_model=List[schemas.JugadorOut])
+    def listar_jugadores(limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_db)):
+        return crud.get_jugadores(db, 0, limit, cursor)
+
+    @app.get("/partidos/", response_model=List[schemas.PartidoOut])
+    def listar_partidos(filtros: schemas.FiltrosPartido = Depends(), limit: int = 100, db: Session = Depends(get_db)):
+        return crud.get_partidos(db, 0, limit, None, filtros)
+
+    @app.get("/torneos/", response_model=List[schemas.TorneoOut])
+    def listar_torneos(limit: int = 100, db: Session = Depends(get_db)):
+        return crud.get_torneos(db, 0, limit)
+
+    return app
+
+
+def sembrar(num_jugadores: int = 500, num_partidos: int = 2000):
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    try:
+        torneo, categoria = crear_torneo(db), crear_categoria(db)
+        jugadores = crear_jugadores(db, num_jugadores)
+        inicio = datetime(2030, 1, 1, 9)
+        db.add_all(
+            models.Partido(torneo_id=torneo.id, categoria_id=categoria.id, mesa=i % 8 + 1,
+                           horario=inicio + timedelta(minutes=30 * (i // 8)),
+                           jugador1_id=jugadores[i % num_jugadores].id, jugador2_id=jugadores[(i + 1) % num_jugadores].id,
+                           tipo="individual")
+            for i in range(num_partidos)
+        )
+        db.commit()
+        return torneo.id, [j.id for j in jugadores]
+    finally:
+        db.close()
+
+
+async def medir(app, rutas, concurrencia: int, segundos: float):
+    # `concurrencia` clientes piden las rutas en ronda durante `segundos`; devuelve peticiones por segundo
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://carga") as cliente:
+        await cliente.get(rutas[0])  # calienta pool y mapeos
+        fin = time.perf_counter() + segundos
+        total = 0
+
+        async def cliente_carga(desfase: int):
+            nonlocal total
+            i = desfase
+            while time.perf_counter() < fin:
+                respuesta = await cliente.get(rutas[i % len(rutas)])
+                respuesta.raise_for_status()
+                total += 1
+                i += 1
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente_carga(i) for i in range(concurrencia)))
+        return total / (time.perf_counter() - inicio)
+
+
+async def comparar(concurrencia: int = 32, segundos: float = 5.0):
+    # un solo event loop: el pool del motor async queda ligado al loop que lo usó primero
+    torneo_id, jugadores = sembrar()
+    sync, asincrona = app_sync(), app_async()
+    print(f"concurrencia {concurrencia}, {segundos}s por ruta")
+    for plantilla in RUTAS:
+        rutas = [plantilla.format(id=j, torneo=torneo_id) for j in jugadores[:50]]
+        rps_sync = await medir(sync, rutas, concurrencia, segundos)
+        rps_async = await medir(asincrona, rutas, concurrencia, segundos)
+        print(f"{plantilla:40} sync {rps_sync:8.1f} rps   async {rps_async:8.1f} rps")
+
+
+if __name__ == "__main__":
+    asyncio.run(comparar(*(f(a) for f, a in zip((int, float), sys.argv[1:]))))
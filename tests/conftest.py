@@ -0,0 +1,92 @@
+# las pruebas usan una base sqlite temporal: DATABASE_URI se fija antes de importar la app
+import os
+import tempfile
+from datetime import date, datetime
+
+_directorio = tempfile.mkdtemp(prefix="tenis-mesa-pruebas-")
+os.environ["DATABASE_URI"] = f"sqlite:///{_directorio}/pruebas.db"
+os.environ.pop("ASYNC_DATABASE_URI", None)
+os.environ.pop("CACHE_REFERENCIAS_URL", None)
+
+import pytest
+
+from app import cache, clasificacion, models
+from app.base import Base
+from app.db import SessionLocal, engine
+
+
+@pytest.fixture(scope="session")
+def esquema():
+    # mismo esquema que deja `alembic upgrade head` (alembic check no encuentra diferencias)
+    Base.metadata.create_all(engine)
+    yield engine
+
+
+@pytest.fixture
+def db(esquema):
+    sesion = SessionLocal()
+    yield sesion
+    sesion.close()
+    # cada prueba parte con las tablas vacías y sin caché de referencias
+    with engine.begin() as conexion:
+        for tabla in reversed(Base.metadata.sorted_tables):
+            conexion.execute(tabla.delete())
+    cache.referencias.backend = cache.crear_backend()
+    clasificacion.invalidar()
+
+
+@pytest.fixture
+def plan_consulta(esquema):
+    # filas de EXPLAIN QUERY PLAN para una sentencia de SQLAlchemy
+    def plan(stmt):
+        compilado = stmt.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+        parametros = compilado.construct_params()
+        valores = tuple(parametros[nombre] for nombre in compilado.positiontup)
+        with engine.connect() as conexion:
+            filas = conexion.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compilado), valores).fetchall()
+        return [fila[-1] for fila in filas]
+    return plan
+
+
+def usa_indice(plan, indice: str):
+    return any(f"INDEX {indice} " in linea or linea.endswith(f"INDEX {indice}") for linea in plan)
+
+
+# datos base
+def crear_torneo(db, **valores):
+    torneo = models.Torneo(**{
+        "nombre": "Torneo", "fecha_inicio": date(2030, 1, 1), "fecha_fin": date(2030, 1, 5), "mesas_disponibles": 8,
+        "fecha_inscripcion_inicio": date(2020, 1, 1), "fecha_inscripcion_fin": date(2029, 12, 31), **valores
+    })
+    db.add(torneo)
+    db.commit()
+    return torneo
+
+def crear_categoria(db, **valores):
+    categoria = models.Categoria(**{
+        "nombre": f"Categoria {datetime.now().timestamp()}", "edad_min": 0, "edad_max": 99, "genero": "M",
+        "sets_por_partido": 5, "puntos_por_set": 11, **valores
+    })
+    db.add(categoria)
+    db.commit()
+    return categoria
+
+def crear_jugadores(db, cantidad: int, **valores):
+    jugadores = [
+        models.Jugador(**{"nombre": f"Jugador {i}", "fecha_nacimiento": date(2000, 1, 1), "genero": "M",
+                          "ciudad": "Santiago", "pais": "CL", **valores})
+        for i in range(cantidad)
+    ]
+    db.add_all(jugadores)
+    db.commit()
+    return jugadores
+
+def crear_partido(db, torneo, categoria, jugador1, jugador2, **valores):
+    # tipo al final: el validador de tipo revisa que los jugadores ya estén asignados
+    partido = models.Partido(**{
+        "torneo_id": torneo.id, "categoria_id": categoria.id, "horario": datetime(2030, 1, 1, 10), "mesa": 1,
+        "jugador1_id": jugador1.id, "jugador2_id": jugador2.id, **valores, "tipo": "individual"
+    })
+    db.add(partido)
+    db.commit()
+    return partido
@@ -0,0 +1,87 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect
+
+from app import models, paginacion
+from app.main import app
+from app.db import engine
+
+RUTA = "/jugadores/buscar"
+
+
+def _jugador(db, nombre, **valores):
+    jugador = models.Jugador(**{"nombre": nombre, "fecha_nacimiento": date(2000, 1, 1), "genero": "M",
+                                "ciudad": "Santiago", "pais": "CL", **valores})
+    db.add(jugador)
+    db.commit()
+    return jugador
+
+
+def _nombres(respuesta):
+    assert respuesta.status_code == 200
+    return [j["nombre"] for j in respuesta.json()]
+
+
+def test_create_all_crea_el_indice_fts(esquema):
+    # la búsqueda en SQLite depende de jugador_fts aunque la base no venga de alembic
+    assert "jugador_fts" in inspect(engine).get_table_names()
+
+
+def test_orden_exacto_prefijo_palabra_subcadena(db):
+    for nombre in ["Mariana Rojas", "Pedro Soto", "Maria Ana", "Anabel Soto", "Ana"]:
+        _jugador(db, nombre)
+    with TestClient(app) as cliente:
+        assert _nombres(cliente.get(RUTA, params={"q": "ANA"})) == ["Ana", "Anabel Soto", "Maria Ana", "Mariana Rojas"]
+
+
+def test_filtros_pais_ciudad_asociacion(db):
+    asociacion = models.Asociacion(nombre="Club", ciudad="Lima", pais="PE")
+    db.add(asociacion)
+    db.commit()
+    _jugador(db, "Ana Chile")
+    _jugador(db, "Ana Peru", pais="PE", ciudad="Cusco")
+    _jugador(db, "Ana Lima", pais="PE", ciudad="Lima", asociacion_id=asociacion.id)
+    with TestClient(app) as cliente:
+        assert _nombres(cliente.get(RUTA, params={"q": "ana", "pais": "PE"})) == ["Ana Lima", "Ana Peru"]
+        assert _nombres(cliente.get(RUTA, params={"q": "ana", "ciudad": "Santiago"})) == ["Ana Chile"]
+        assert _nombres(cliente.get(RUTA, params={"q": "ana", "asociacion_id": asociacion.id})) == ["Ana Lima"]
+
+
+def test_paginacion_por_cursor(db):
+    for nombre in ["Ana", "Ana Beltran", "Ana Castro", "Juana", "Mariana", "Adriana"]:
+        _jugador(db, nombre)
+    paginas = []
+    cursor = None
+    with TestClient(app) as cliente:
+        while True:
+            params = {"q": "ana", "limit": 4}
+            if cursor:
+                params["cursor"] = cursor
+            respuesta = cliente.get(RUTA, params=params)
+            paginas.append(_nombres(respuesta))
+            cursor = respuesta.headers.get(paginacion.CABECERA_CURSOR)
+            if not cursor:
+                break
+    assert paginas == [["Ana", "Ana Beltran", "Ana Castro", "Adriana"], ["Juana", "Mariana"]]
+
+
+def test_termino_corto_busca_solo_prefijo(db):
+    for nombre in ["Ana", "Anabel", "Mariana", "Maria Ana"]:
+        _jugador(db, nombre)
+    with TestClient(app) as cliente:
+        assert _nombres(cliente.get(RUTA, params={"q": "an"})) == ["Ana", "Anabel"]
+        assert _nombres(cliente.get(RUTA, params={"q": "a"})) == ["Ana", "Anabel"]
+        assert cliente.get(RUTA, params={"q": "  "}).status_code == 400
+
+
+def test_indice_sigue_los_cambios_de_nombre(db):
+    jugador = _jugador(db, "Pedro")
+    jugador.nombre = "Cristobal"
+    db.commit()
+    otro = _jugador(db, "Cristina")
+    db.delete(otro)
+    db.commit()
+    with TestClient(app) as cliente:
+        assert _nombres(cliente.get(RUTA, params={"q": "cris"})) == ["Cristobal"]
+        assert _nombres(cliente.get(RUTA, params={"q": "ped"})) == []
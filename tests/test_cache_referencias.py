@@ -0,0 +1,51 @@
+# caché de referencias: una lectura que se cruza con una actualización no deja la fila vieja guardada
+from app import cache, crud, models, schemas
+from app.db import SessionLocal
+from tests.conftest import crear_torneo
+
+
+def test_aciertos_despues_de_la_primera_lectura(db):
+    torneo = crear_torneo(db)
+    referencias = cache.referencias
+    aciertos, fallos = referencias.aciertos.get("torneo", 0), referencias.fallos.get("torneo", 0)
+    assert crud.get_torneo(db, torneo.id).nombre == "Torneo"
+    otra = SessionLocal()
+    try:
+        assert crud.get_torneo(otra, torneo.id).nombre == "Torneo"
+        assert crud.get_torneo(otra, torneo.id).nombre == "Torneo"
+    finally:
+        otra.close()
+    assert referencias.aciertos["torneo"] - aciertos == 2
+    assert referencias.fallos["torneo"] - fallos == 1
+
+
+def test_lectura_cruzada_con_actualizacion_no_queda_en_cache(db):
+    torneo = crear_torneo(db)
+    lector = SessionLocal()
+    try:
+        # el lector falla en caché y lee la fila antes de que se confirme la actualización...
+        generacion = cache.referencias.generacion(models.Torneo, torneo.id)
+        fila_vieja = lector.get(models.Torneo, torneo.id)
+        # ...la actualización confirma e invalida...
+        crud.update_torneo(db, torneo.id, schemas.TorneoUpdate(nombre="Renombrado"))
+        # ...y recién entonces el lector guarda lo que leyó
+        cache.referencias.guardar(fila_vieja, generacion)
+    finally:
+        lector.close()
+
+    nueva = SessionLocal()
+    try:
+        assert crud.get_torneo(nueva, torneo.id).nombre == "Renombrado"
+    finally:
+        nueva.close()
+
+
+def test_invalidar_descarta_la_entrada(db):
+    torneo = crear_torneo(db)
+    crud.get_torneo(db, torneo.id)
+    cache.referencias.invalidar(models.Torneo, torneo.id)
+    otra = SessionLocal()
+    try:
+        assert cache.referencias.obtener(otra, models.Torneo, torneo.id) is None
+    finally:
+        otra.close()
@@ -0,0 +1,55 @@
+# caché de clasificación: la entrada vale mientras no cambien las versiones compartidas de sus tablas
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import crud, models, schemas
+from app.db import engine
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+
+def _grupo_con_partido(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db, sets_por_partido=3)
+    jugador1, jugador2 = crear_jugadores(db, 2)
+    grupo = models.Grupo(nombre="A", torneo_id=torneo.id, categoria_id=categoria.id)
+    db.add(grupo)
+    db.commit()
+    for jugador in (jugador1, jugador2):
+        crud.create_grupo_participante(db, schemas.GrupoParticipanteCreate(grupo_id=grupo.id, jugador_id=jugador.id))
+    partido = crear_partido(db, torneo, categoria, jugador1, jugador2, grupo_id=grupo.id)
+    return grupo, partido, jugador1, jugador2
+
+def _lider(cliente, grupo):
+    respuesta = cliente.get(f"/grupos/{grupo.id}/clasificacion")
+    assert respuesta.status_code == 200
+    return respuesta.json()[0]
+
+
+def test_escritura_por_la_api_cambia_la_clasificacion(db):
+    grupo, partido, jugador1, jugador2 = _grupo_con_partido(db)
+    with TestClient(app) as cliente:
+        assert _lider(cliente, grupo)["partidos_jugados"] == 0
+        for numero in (1, 2):
+            crud.create_resultado_set(db, schemas.ResultadoSetCreate(partido_id=partido.id, numero_set=numero, puntos_jugador1=5, puntos_jugador2=11))
+        lider = _lider(cliente, grupo)
+    assert (lider["jugador_id"], lider["partidos_ganados"]) == (jugador2.id, 1)
+
+
+def test_cambio_confirmado_por_otro_worker(db):
+    # otro proceso no toca la caché de este: solo escribe los datos y sube version_tabla en la base
+    grupo, partido, jugador1, jugador2 = _grupo_con_partido(db)
+    with TestClient(app) as cliente:
+        assert _lider(cliente, grupo)["jugador_id"] == jugador1.id
+
+        with engine.begin() as conexion:
+            conexion.execute(models.EstadoPartido.__table__.insert().values(
+                partido_id=partido.id, sets_ganados1=0, sets_ganados2=2, finalizado=True, ganador_id=jugador2.id))
+        # sin cambio de versión la entrada en caché sigue sirviéndose
+        assert _lider(cliente, grupo)["partidos_jugados"] == 0
+
+        with engine.begin() as conexion:
+            conexion.execute(text("UPDATE version_tabla SET version = version + 1 WHERE tabla = 'estado_partido'"))
+            if conexion.execute(text("SELECT changes()")).scalar() == 0:
+                conexion.execute(text("INSERT INTO version_tabla (tabla, version, actualizado) VALUES ('estado_partido', 1, CURRENT_TIMESTAMP)"))
+        lider = _lider(cliente, grupo)
+    assert (lider["jugador_id"], lider["partidos_ganados"]) == (jugador2.id, 1)
@@ -0,0 +1,62 @@
+# el estado materializado (estado_partido) coincide con el cálculo completo de determinar_ganador_partido
+# y con lo que deja reconstruir_estados_partido, después de crear, editar y borrar sets
+from app import crud, models, schemas
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+
+def _estado(db, partido_id: int):
+    # un partido sin fila (o cuyos sets se borraron todos) cuenta como 0-0 sin terminar
+    db.expire_all()
+    estado = db.get(models.EstadoPartido, partido_id)
+    if estado is None:
+        return (0, 0, False, None)
+    return (estado.sets_ganados1, estado.sets_ganados2, estado.finalizado, estado.ganador_id)
+
+def _sets_ganados(db, partido, categoria):
+    ganadores = [crud._ganador_set(categoria, rs.puntos_jugador1, rs.puntos_jugador2)
+                 for rs in crud.get_resultados_set_by_partido(db, partido.id)]
+    return ganadores.count(1), ganadores.count(2)
+
+def _verificar(db, partido, categoria):
+    materializado = _estado(db, partido.id)
+    ganador = crud.determinar_ganador_partido(db, partido.id)
+    assert materializado[:2] == _sets_ganados(db, partido, categoria)
+    assert materializado[2:] == (ganador is not None, ganador)
+
+    crud.reconstruir_estados_partido(db)
+    assert _estado(db, partido.id) == materializado
+    return materializado
+
+
+def test_estado_sigue_a_los_sets(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db, sets_por_partido=3, puntos_por_set=11)
+    jugador1, jugador2 = crear_jugadores(db, 2)
+    partido = crear_partido(db, torneo, categoria, jugador1, jugador2)
+
+    def registrar(numero, p1, p2):
+        return crud.registrar_resultado_set(db, schemas.ResultadoSetCreate(
+            partido_id=partido.id, numero_set=numero, puntos_jugador1=p1, puntos_jugador2=p2))
+
+    set1 = registrar(1, 11, 7)
+    assert _verificar(db, partido, categoria) == (1, 0, False, None)
+
+    set2 = registrar(2, 10, 12) # set alargado, gana el lado 2
+    assert _verificar(db, partido, categoria) == (1, 1, False, None)
+
+    set3 = registrar(3, 13, 11)
+    assert _verificar(db, partido, categoria) == (2, 1, True, jugador1.id)
+
+    # editar un set cambia el ganador del partido
+    crud.update_resultado_set(db, set1.id, schemas.ResultadoSetUpdate(puntos_jugador1=8, puntos_jugador2=11))
+    assert _verificar(db, partido, categoria) == (1, 2, True, jugador2.id)
+
+    # un set sin ganador (11-10) no cuenta para nadie
+    crud.update_resultado_set(db, set3.id, schemas.ResultadoSetUpdate(puntos_jugador1=11, puntos_jugador2=10))
+    assert _verificar(db, partido, categoria) == (0, 2, True, jugador2.id)
+
+    crud.delete_resultado_set(db, set2.id)
+    assert _verificar(db, partido, categoria) == (0, 1, False, None)
+
+    crud.delete_resultado_set(db, set3.id)
+    crud.delete_resultado_set(db, set1.id)
+    assert _verificar(db, partido, categoria) == (0, 0, False, None)
@@ -0,0 +1,123 @@
+# Difusor con 1.000 suscriptores: reparto, descarte de los más antiguos y limpieza al cancelar
+import asyncio
+import json
+
+from app import eventos
+
+SUSCRIPTORES = 1000
+
+
+async def _vaciar_loop():
+    # _entregar llega con call_soon_threadsafe: dos vueltas del loop bastan para que se ejecute
+    for _ in range(2):
+        await asyncio.sleep(0)
+
+async def _publicar_desde_hilo(difusor, canales, evento):
+    # las rutas sync publican desde el threadpool
+    await asyncio.get_running_loop().run_in_executor(None, difusor.publicar, canales, evento)
+    await _vaciar_loop()
+
+def _mensajes(suscripcion):
+    mensajes = []
+    while not suscripcion.cola.empty():
+        mensajes.append(suscripcion.cola.get_nowait())
+    return mensajes
+
+def _datos(mensaje: str):
+    return json.loads(mensaje.split("data: ", 1)[1])
+
+
+def test_reparto_a_mil_suscriptores():
+    async def escenario():
+        difusor = eventos.Difusor()
+        # la mitad sigue el torneo completo, la otra mitad una de 10 mesas
+        por_torneo = [difusor.suscribir(["torneo:1"]) for _ in range(SUSCRIPTORES // 2)]
+        por_mesa = [difusor.suscribir([f"mesa:1:{i % 10 + 1}"]) for i in range(SUSCRIPTORES // 2)]
+        assert difusor.num_suscriptores() == SUSCRIPTORES
+
+        await _publicar_desde_hilo(difusor, eventos.canales_partido(1, 3), {"tipo": "set", "partido_id": 7})
+        await _publicar_desde_hilo(difusor, eventos.canales_partido(2, 3), {"tipo": "set", "partido_id": 8})
+
+        for suscripcion in por_torneo:
+            assert [_datos(m)["partido_id"] for m in _mensajes(suscripcion)] == [7]
+        for i, suscripcion in enumerate(por_mesa):
+            assert len(_mensajes(suscripcion)) == (1 if i % 10 + 1 == 3 else 0)
+        # el evento del torneo 2 no tenía suscriptores y no llegó a encolarse
+        assert difusor.publicados == 1
+        assert difusor.descartados == 0
+
+    asyncio.run(escenario())
+
+
+def test_suscriptor_en_dos_canales_recibe_una_vez():
+    async def escenario():
+        difusor = eventos.Difusor()
+        suscripciones = [difusor.suscribir(eventos.canales_partido(1, 2)) for _ in range(SUSCRIPTORES)]
+        await _publicar_desde_hilo(difusor, eventos.canales_partido(1, 2), {"tipo": "set"})
+        assert all(len(_mensajes(s)) == 1 for s in suscripciones)
+
+    asyncio.run(escenario())
+
+
+def test_cola_llena_descarta_los_mas_antiguos():
+    async def escenario():
+        difusor = eventos.Difusor(tamano_cola=5)
+        suscripciones = [difusor.suscribir(["torneo:1"]) for _ in range(SUSCRIPTORES)]
+        for numero in range(8):
+            await _publicar_desde_hilo(difusor, ["torneo:1"], {"tipo": "set", "numero": numero})
+
+        for suscripcion in suscripciones:
+            assert suscripcion.perdidos == 3
+            assert [_datos(m)["numero"] for m in _mensajes(suscripcion)] == [3, 4, 5, 6, 7]
+        assert difusor.publicados == 8
+        assert difusor.descartados == 3 * SUSCRIPTORES
+
+    asyncio.run(escenario())
+
+
+def test_flujo_avisa_eventos_perdidos_y_limpia_al_desconectar():
+    async def escenario():
+        difusor = eventos.Difusor(tamano_cola=2)
+        flujos = [difusor.flujo(eventos.canales_partido(1, i % 10 + 1)) for i in range(SUSCRIPTORES)]
+        for flujo in flujos:
+            assert await flujo.__anext__() == ": conectado\n\n"
+        assert difusor.num_suscriptores() == SUSCRIPTORES
+
+        for numero in range(3):
+            await _publicar_desde_hilo(difusor, ["torneo:1"], {"tipo": "set", "numero": numero})
+
+        for flujo in flujos:
+            aviso = await flujo.__anext__()
+            assert aviso.startswith("event: eventos_perdidos") and _datos(aviso)["cantidad"] == 1
+            assert _datos(await flujo.__anext__())["numero"] == 1
+            assert _datos(await flujo.__anext__())["numero"] == 2
+
+        # desconexión del cliente: la respuesta SSE cierra el generador
+        for flujo in flujos:
+            await flujo.aclose()
+        assert difusor.num_suscriptores() == 0
+        assert difusor._suscripciones == {}
+
+        # sin suscriptores publicar no hace nada
+        await _publicar_desde_hilo(difusor, ["torneo:1"], {"tipo": "set"})
+        assert difusor.publicados == 3
+
+    asyncio.run(escenario())
+
+
+def test_cancelar_solo_quita_esa_suscripcion():
+    async def escenario():
+        difusor = eventos.Difusor()
+        suscripciones = [difusor.suscribir(eventos.canales_partido(1, 1)) for _ in range(SUSCRIPTORES)]
+        for suscripcion in suscripciones[::2]:
+            difusor.cancelar(suscripcion)
+        assert difusor.num_suscriptores() == SUSCRIPTORES // 2
+
+        await _publicar_desde_hilo(difusor, ["mesa:1:1"], {"tipo": "set"})
+        assert [len(_mensajes(s)) for s in suscripciones] == [0, 1] * (SUSCRIPTORES // 2)
+
+        for suscripcion in suscripciones[1::2]:
+            difusor.cancelar(suscripcion)
+        assert difusor._suscripciones == {}
+
+    asyncio.run(escenario())
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import exportacion
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+COLUMNAS_JUGADOR = ["id", "nombre", "fecha_nacimiento", "genero", "ciudad", "pais", "asociacion_id"]
+
+
+def test_exporta_ndjson(db):
+    jugadores = crear_jugadores(db, 3, fecha_nacimiento=date(1999, 12, 31))
+    with TestClient(app) as cliente:
+        respuesta = cliente.get("/exportar/jugadores")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "application/x-ndjson"
+    assert respuesta.headers["content-disposition"] == 'attachment; filename="jugadores.ndjson"'
+    filas = [json.loads(linea) for linea in respuesta.text.splitlines()]
+    assert [f["id"] for f in filas] == [j.id for j in jugadores]
+    assert list(filas[0]) == COLUMNAS_JUGADOR
+    assert filas[0]["fecha_nacimiento"] == "1999-12-31"
+    assert filas[0]["asociacion_id"] is None
+
+
+def test_exporta_csv_con_encabezado(db):
+    jugadores = crear_jugadores(db, 2)
+    with TestClient(app) as cliente:
+        respuesta = cliente.get("/exportar/jugadores", params={"formato": "csv"})
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "text/csv; charset=utf-8"
+    assert respuesta.headers["content-disposition"] == 'attachment; filename="jugadores.csv"'
+    filas = list(csv.reader(io.StringIO(respuesta.text)))
+    assert filas[0] == COLUMNAS_JUGADOR
+    assert filas[1] == [str(jugadores[0].id), "Jugador 0", "2000-01-01", "M", "Santiago", "CL", ""]
+    assert len(filas) == 3
+
+
+def test_exporta_fechas_con_hora(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugador1, jugador2 = crear_jugadores(db, 2)
+    crear_partido(db, torneo, categoria, jugador1, jugador2)
+    ndjson = b"".join(exportacion.exportar("partidos", "ndjson"))
+    assert json.loads(ndjson)["horario"] == "2030-01-01T10:00:00"
+    encabezado, fila = csv.reader(io.StringIO("".join(exportacion.exportar("partidos", "csv"))))
+    assert fila[encabezado.index("horario")] == "2030-01-01 10:00:00"
+
+
+@pytest.mark.parametrize("ruta", ["/exportar/usuarios", "/exportar/jugadores?formato=xml"])
+def test_tabla_o_formato_desconocido_devuelve_400(db, ruta):
+    with TestClient(app) as cliente:
+        respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 400
+
+
+def test_tamano_bloque_parte_la_salida(db):
+    jugadores = crear_jugadores(db, 5)
+    bloques = list(exportacion.exportar("jugadores", "ndjson", tamano_bloque=2))
+    assert [len(b.splitlines()) for b in bloques] == [2, 2, 1]
+    assert [json.loads(l)["id"] for b in bloques for l in b.splitlines()] == [j.id for j in jugadores]
+    # en CSV el encabezado va en su propio bloque, antes de las filas
+    bloques_csv = list(exportacion.exportar("jugadores", "csv", tamano_bloque=2))
+    assert [len(b.splitlines()) for b in bloques_csv] == [1, 2, 2, 1]
@@ -0,0 +1,56 @@
+# plan de consulta del listado de partidos para cada combinación de filtros
+from datetime import datetime
+from itertools import combinations
+
+import re
+
+import pytest
+from sqlalchemy import select
+
+from app import models, paginacion, schemas
+from app.crud import filtros_partidos
+
+VALORES = {
+    "torneo_id": 1,
+    "categoria_id": 2,
+    "ronda": "Ronda 1",
+    "mesa": 3,
+    "grupo_id": 4,
+    "jugador_id": 5,
+    "horario_desde": datetime(2030, 1, 1, 9),
+    "horario_hasta": datetime(2030, 1, 1, 21),
+    "bye": False,
+}
+# filtros con un índice que empieza por ellos; ronda, mesa, horario y bye solo acotan dentro de esos
+ANCLAS = {"torneo_id", "categoria_id", "grupo_id", "jugador_id"}
+
+COMBINACIONES = [c for n in range(len(VALORES) + 1) for c in combinations(VALORES, n)]
+
+
+def _consulta(campos):
+    filtros = schemas.FiltrosPartido(**{campo: VALORES[campo] for campo in campos})
+    stmt = select(models.Partido).where(*filtros_partidos(filtros))
+    return paginacion.paginar(stmt, [models.Partido.id], 0, 100)
+
+def _filtro_del_indice(indice: str):
+    # filtro del listado que corresponde a la primera columna del índice
+    primera = next(ix for ix in models.Partido.__table__.indexes if ix.name == indice).columns[0].name
+    return "jugador_id" if primera in ("jugador1_id", "jugador2_id", "equipo1_id", "equipo2_id") else primera
+
+
+@pytest.mark.parametrize("campos", [c for c in COMBINACIONES if ANCLAS & set(c)], ids="+".join)
+def test_filtro_anclado_usa_indice(plan_consulta, campos):
+    plan = plan_consulta(_consulta(campos))
+    assert not any(linea.startswith("SCAN partido") for linea in plan), plan
+    indices = [m.group(1) for linea in plan if (m := re.match(r"SEARCH partido USING (?:COVERING )?INDEX (\w+)", linea))]
+    assert indices, plan
+    # cada índice usado sobre partido empieza por una columna que el listado filtra por igualdad
+    assert all(_filtro_del_indice(indice) in campos for indice in indices), plan
+
+
+@pytest.mark.parametrize("campos", [c for c in COMBINACIONES if not ANCLAS & set(c)], ids=lambda c: "+".join(c) or "sin_filtros")
+def test_filtro_sin_ancla_recorre_en_orden_de_id(plan_consulta, campos):
+    # sin torneo, categoría, grupo ni jugador no hay índice que acote: se recorre la llave primaria
+    # en el orden del cursor y el LIMIT corta la lectura, sin ordenar en un temporal
+    plan = plan_consulta(_consulta(campos))
+    assert not any("TEMP B-TREE" in linea for linea in plan), plan
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+
+from app import crud, models, paginacion
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_torneo
+
+
+def _dos_grupos(db, por_grupo: int = 5):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    grupos = [models.Grupo(nombre=nombre, torneo_id=torneo.id, categoria_id=categoria.id) for nombre in ("Grupo A", "Grupo B")]
+    db.add_all(grupos)
+    db.commit()
+    jugadores = crear_jugadores(db, 2 * por_grupo)
+    # intercalados para que el orden de inserción no coincida con el de la llave
+    miembros = {grupos[0].id: jugadores[::2], grupos[1].id: jugadores[1::2]}
+    db.execute(models.grupo_participante.insert(), [
+        {"grupo_id": grupo_id, "jugador_id": j.id} for grupo_id, lista in miembros.items() for j in reversed(lista)
+    ])
+    db.commit()
+    return {grupo_id: [j.id for j in lista] for grupo_id, lista in miembros.items()}
+
+
+def _paginas(leer, limit: int):
+    filas, cursor = [], None
+    while True:
+        pagina = leer(limit=limit, cursor=cursor)
+        filas += pagina
+        cursor = paginacion.siguiente_cursor(pagina, ["grupo_id", "jugador_id"], limit)
+        if not cursor:
+            return filas
+
+
+def test_get_grupo_participantes_pagina_todos_los_grupos(db):
+    miembros = _dos_grupos(db)
+    filas = _paginas(lambda **kw: crud.get_grupo_participantes(db, **kw), limit=3)
+    esperado = sorted((grupo_id, j) for grupo_id, ids in miembros.items() for j in ids)
+    assert [(f.grupo_id, f.jugador_id) for f in filas] == esperado
+
+
+def test_participantes_de_un_grupo_sync(db):
+    miembros = _dos_grupos(db)
+    grupo_id = next(iter(miembros))
+    assert [f.jugador_id for f in crud.get_participantes_grupo(db, grupo_id)] == miembros[grupo_id]
+    detalle = crud.get_participantes_grupo_con_jugador(db, grupo_id, limit=2)
+    assert [(f.jugador_id, f.jugador.id) for f in detalle] == [(j, j) for j in miembros[grupo_id][:2]]
+
+
+def _recorrer_ruta(cliente, grupo_id: int, limit: int, **params):
+    paginas, cursor = [], None
+    while True:
+        consulta = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        respuesta = cliente.get(f"/grupos/{grupo_id}/participantes/", params=consulta)
+        assert respuesta.status_code == 200
+        paginas.append(respuesta.json())
+        cursor = respuesta.headers.get(paginacion.CABECERA_CURSOR)
+        if not cursor:
+            return paginas
+
+
+def test_ruta_participantes_pagina_con_cursor(db):
+    miembros = _dos_grupos(db)
+    grupo_id, otro_id = miembros
+    with TestClient(app) as cliente:
+        paginas = _recorrer_ruta(cliente, grupo_id, limit=2)
+    assert [len(p) for p in paginas] == [2, 2, 1]
+    filas = [f for p in paginas for f in p]
+    # solo el grupo pedido y sin el jugador embebido
+    assert filas == [{"grupo_id": grupo_id, "jugador_id": j} for j in miembros[grupo_id]]
+    assert not set(miembros[otro_id]) & {f["jugador_id"] for f in filas}
+
+
+def test_ruta_participantes_con_jugador(db):
+    miembros = _dos_grupos(db)
+    grupo_id = list(miembros)[1]
+    with TestClient(app) as cliente:
+        paginas = _recorrer_ruta(cliente, grupo_id, limit=2, incluir_jugadores=True)
+    filas = [f for p in paginas for f in p]
+    assert [f["jugador_id"] for f in filas] == miembros[grupo_id]
+    for fila in filas:
+        assert fila["grupo_id"] == grupo_id
+        assert fila["jugador"]["id"] == fila["jugador_id"]
+        assert fila["jugador"]["nombre"].startswith("Jugador ")
+        assert fila["jugador"]["fecha_nacimiento"] == "2000-01-01"
@@ -0,0 +1,52 @@
+# choques de horario y planificación usan la misma duración: sets de la categoría * minutos_por_set del torneo
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app import crud, schemas
+from app.db import engine
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+
+@pytest.fixture
+def partidos(db):
+    torneo = crear_torneo(db, minutos_por_set=20)
+    categoria = crear_categoria(db, sets_por_partido=3) # 60 minutos por partido
+    j = crear_jugadores(db, 4)
+    ocupado = crear_partido(db, torneo, categoria, j[0], j[1], horario=datetime(2030, 1, 1, 10), mesa=1)
+    libre = crear_partido(db, torneo, categoria, j[2], j[3], horario=datetime(2030, 1, 1, 18), mesa=2)
+    return torneo, ocupado, libre
+
+
+def test_choque_usa_minutos_por_set_del_torneo(db, partidos):
+    torneo, ocupado, libre = partidos
+    # con los 10 minutos fijos de antes el partido de las 10:00 terminaba a las 10:30
+    with pytest.raises(ValueError, match="ya está ocupada"):
+        crud.asignar_horario_mesa(db, libre.id, datetime(2030, 1, 1, 10, 45), 1)
+    asignado = crud.asignar_horario_mesa(db, libre.id, datetime(2030, 1, 1, 11), 1)
+    assert (asignado.horario, asignado.mesa) == (datetime(2030, 1, 1, 11), 1)
+
+
+def test_choque_en_una_consulta_de_duracion(db, partidos):
+    torneo, ocupado, libre = partidos
+    db.expire_all()
+    sentencias = []
+    escuchar = lambda conn, cursor, sql, *args: sentencias.append(sql)
+    event.listen(engine, "before_cursor_execute", escuchar)
+    try:
+        crud.asignar_horario_mesa(db, libre.id, datetime(2030, 1, 1, 12), 3)
+    finally:
+        event.remove(engine, "before_cursor_execute", escuchar)
+    # partido, torneo, duración (categoría + cotas de la ventana), mesa, 2 rangos por jugador, UPDATE, refresh
+    selects_categoria = [s for s in sentencias if "FROM categoria" in s and "FROM partido" not in s]
+    assert len(selects_categoria) == 1
+    assert "max(categoria.sets_por_partido)" in selects_categoria[0]
+
+
+def test_planificar_usa_la_misma_duracion(db, partidos):
+    torneo, ocupado, libre = partidos
+    parametros = schemas.PlanificacionCreate(desde=datetime(2030, 1, 1, 9), hora_inicio="09:00", hora_fin="21:00", descanso_minutos=0)
+    salida = crud.planificar_torneo(db, torneo.id, parametros)
+    assert salida.planificados == 2
+    assert salida.fin - salida.inicio == (datetime(2030, 1, 1, 10) - datetime(2030, 1, 1, 9)) # dos mesas en paralelo, 60 minutos
@@ -0,0 +1,81 @@
+# importación por HTTP (el cuerpo se copia a un temporal por partes y se lee como texto UTF-8)
+# y por línea de comandos (python -m app.importacion)
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app import importacion, models
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_torneo
+
+RUTA = "/inscripciones/individual/importar/"
+
+
+def test_importa_csv_con_bom(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugadores = crear_jugadores(db, 3)
+    lineas = ["jugador_id,torneo_id,categoria_id"] + [f"{j.id},{torneo.id},{categoria.id}" for j in jugadores] + [f"999,{torneo.id},{categoria.id}"]
+    cuerpo = "\ufeff" + "\r\n".join(lineas) + "\r\n"
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.post(RUTA, content=cuerpo.encode(), headers={"content-type": "text/csv"})
+
+    assert respuesta.status_code == 200
+    reporte = respuesta.json()
+    assert reporte["insertadas"] == 3
+    assert [e["fila"] for e in reporte["errores"]] == [5]
+
+
+def test_cli_importa_csv_con_bom(db, tmp_path, capsys):
+    # los CSV exportados desde Excel traen BOM: sin utf-8-sig la primera columna sería "\ufeffjugador_id"
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugadores = crear_jugadores(db, 2)
+    archivo = tmp_path / "inscripciones.csv"
+    lineas = ["jugador_id,torneo_id,categoria_id"] + [f"{j.id},{torneo.id},{categoria.id}" for j in jugadores]
+    archivo.write_bytes(("\ufeff" + "\r\n".join(lineas) + "\r\n").encode())
+
+    assert importacion.main([str(archivo)]) == 0
+    salida = capsys.readouterr()
+    assert "insertadas: 2, duplicadas: 0, errores: 0" in salida.out
+    assert salida.err == ""
+    filas = db.execute(models.inscripcion.select()).all()
+    assert sorted(f.jugador_id for f in filas) == sorted(j.id for j in jugadores)
+
+
+def test_importa_jsonl(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugador, = crear_jugadores(db, 1)
+    cuerpo = json.dumps({"jugador_id": jugador.id, "torneo_id": torneo.id, "categoria_id": categoria.id}) + "\n{roto\n"
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.post(RUTA, content=cuerpo.encode(), headers={"content-type": "application/x-ndjson"})
+
+    assert respuesta.json()["insertadas"] == 1
+    assert [e["fila"] for e in respuesta.json()["errores"]] == [2]
+
+
+def test_archivo_no_utf8_devuelve_400(db):
+    with TestClient(app) as cliente:
+        respuesta = cliente.post(RUTA, content="jugador_id\n\xf1\n".encode("latin-1"), headers={"content-type": "text/csv"})
+    assert respuesta.status_code == 400
+    assert "UTF-8" in respuesta.json()["detail"]
+
+
+async def _fragmentos(datos: bytes, tamano: int):
+    for inicio in range(0, len(datos), tamano):
+        yield datos[inicio:inicio + tamano]
+
+
+def test_recibir_archivo_pasa_a_disco_y_respeta_caracteres_partidos():
+    # "ñ" ocupa dos bytes: con fragmentos de 3 bytes queda partida entre dos fragmentos
+    linea = "ñandú,1,2\n"
+    datos = ("a,b,c\n" + linea * (importacion.MEMORIA_MAXIMA // len(linea.encode()) + 10)).encode()
+    texto = asyncio.run(importacion.recibir_archivo(_fragmentos(datos, 3)))
+    try:
+        assert texto.buffer._rolled # superó MEMORIA_MAXIMA: está en disco, no en memoria
+        filas = list(importacion.leer_filas(texto, "csv"))
+    finally:
+        texto.close()
+    assert filas[0] == (2, {"a": "ñandú", "b": "1", "c": "2"})
+    assert len(filas) == importacion.MEMORIA_MAXIMA // len(linea.encode()) + 10
@@ -0,0 +1,54 @@
+# las consultas frecuentes de crud.py y main.py usan los índices de la migración 3f1a9c2b7d10
+# (y de las que reemplazaron alguno de ellos)
+import pytest
+from sqlalchemy import select
+
+from app import crud, models, schemas
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo, usa_indice
+
+p = models.Partido
+
+
+CONSULTAS = [
+    # generar_partidos_grupo: cruces ya existentes del grupo
+    ("ix_partido_grupo_id", select(p.jugador1_id, p.jugador2_id).where(p.grupo_id == 1, p.tipo == "individual")),
+    # llaves por torneo y categoría
+    ("ix_partido_torneo_id_categoria_id", select(p).where(p.torneo_id == 1, p.categoria_id == 2)),
+    # partidos que avanzan a un partido de la llave
+    ("ix_partido_partido_ganador_id", select(p.id).where(p.partido_ganador_id == 1)),
+    # partidos de un jugador o equipo (choques de horario y filtros del listado)
+    ("ix_partido_jugador1_id_horario", select(p.id).where(p.jugador1_id == 1)),
+    ("ix_partido_jugador2_id_horario", select(p.id).where(p.jugador2_id == 1)),
+    ("ix_partido_equipo1_id_horario", select(p.id).where(p.equipo1_id == 1)),
+    ("ix_partido_equipo2_id_horario", select(p.id).where(p.equipo2_id == 1)),
+    # get_resultados_set_by_partido
+    ("ix_resultado_set_partido_id_numero_set",
+     select(models.ResultadoSet).where(models.ResultadoSet.partido_id == 1).order_by(models.ResultadoSet.numero_set)),
+    # endpoints de llave: inscritos de una categoría del torneo
+    ("ix_inscripcion_torneo_id_categoria_id",
+     select(models.inscripcion).where(models.inscripcion.c.torneo_id == 1, models.inscripcion.c.categoria_id == 2)),
+    ("ix_inscripcion_dobles_torneo_id_categoria_id",
+     select(models.inscripcion_dobles).where(models.inscripcion_dobles.c.torneo_id == 1, models.inscripcion_dobles.c.categoria_id == 2)),
+    ("ix_grupo_torneo_id_categoria_id", select(models.Grupo).where(models.Grupo.torneo_id == 1, models.Grupo.categoria_id == 2)),
+    ("ix_grupo_participante_jugador_id",
+     select(models.grupo_participante).where(models.grupo_participante.c.jugador_id == 1)),
+    ("ix_equipo_dobles_jugador1_id", select(models.EquipoDobles).where(models.EquipoDobles.jugador1_id == 1)),
+    ("ix_equipo_dobles_jugador2_id", select(models.EquipoDobles).where(models.EquipoDobles.jugador2_id == 1)),
+    ("ix_jugador_asociacion_id", select(models.Jugador).where(models.Jugador.asociacion_id == 1)),
+]
+
+
+@pytest.mark.parametrize("indice, consulta", CONSULTAS, ids=[indice for indice, _ in CONSULTAS])
+def test_consulta_usa_indice(plan_consulta, indice, consulta):
+    plan = plan_consulta(consulta)
+    assert usa_indice(plan, indice), plan
+
+
+def test_set_duplicado_falla_por_indice_unico(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugador1, jugador2 = crear_jugadores(db, 2)
+    partido = crear_partido(db, torneo, categoria, jugador1, jugador2)
+    crud.create_resultado_set(db, schemas.ResultadoSetCreate(partido_id=partido.id, numero_set=1, puntos_jugador1=11, puntos_jugador2=5))
+
+    with pytest.raises(ValueError, match="ya ha sido registrado"):
+        crud.create_resultado_set(db, schemas.ResultadoSetCreate(partido_id=partido.id, numero_set=1, puntos_jugador1=11, puntos_jugador2=7))
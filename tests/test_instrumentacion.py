@@ -0,0 +1,73 @@
+import json
+import logging
+import re
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import instrumentacion, models
+from app.db import engine
+from app.db_async import async_engine
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_torneo
+
+LOGGER = "app.instrumentacion"
+
+
+def _eventos(caplog, nombre):
+    return [json.loads(r.getMessage()) for r in caplog.records if r.name == LOGGER and json.loads(r.getMessage())["evento"] == nombre]
+
+
+def test_server_timing_y_cantidad_de_consultas(db, caplog):
+    ruta = f"/jugadores/{crear_jugadores(db, 1)[0].id}"
+    ejecutadas = []
+    contar = lambda *args: ejecutadas.append(args[2])
+    for motor in (engine, async_engine.sync_engine):
+        event.listen(motor, "before_cursor_execute", contar)
+    try:
+        with caplog.at_level(logging.INFO, logger=LOGGER), TestClient(app) as cliente:
+            respuesta = cliente.get(ruta)
+    finally:
+        for motor in (engine, async_engine.sync_engine):
+            event.remove(motor, "before_cursor_execute", contar)
+
+    assert respuesta.status_code == 200
+    cabecera = respuesta.headers["Server-Timing"]
+    assert re.fullmatch(r'db;dur=[\d.]+;desc="\d+ consultas", db-max;dur=[\d.]+, total;dur=[\d.]+', cabecera)
+    consultas = int(re.search(r'"(\d+) consultas"', cabecera).group(1))
+    assert consultas == len(ejecutadas) >= 1
+    (peticion,) = _eventos(caplog, "peticion")
+    assert peticion["ruta"] == ruta
+    assert peticion["estado"] == 200
+    assert peticion["consultas"] == consultas
+    assert peticion["consulta_mas_lenta"] in ejecutadas
+
+
+def test_consulta_lenta_registra_el_plan(db, caplog, monkeypatch):
+    jugador, = crear_jugadores(db, 1)
+    monkeypatch.setattr(instrumentacion, "SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level(logging.WARNING, logger=LOGGER), TestClient(app) as cliente:
+        cliente.get(f"/jugadores/{jugador.id}")
+    lentas = [e for e in _eventos(caplog, "consulta_lenta") if "FROM jugador" in e["sql"]]
+    assert lentas
+    for lenta in lentas:
+        assert lenta["duracion_ms"] >= 0
+        assert lenta["plan"] and not lenta["plan"][0].startswith("no disponible")
+        assert any("jugador" in linea for linea in lenta["plan"])
+
+
+def test_executemany_no_ejecuta_explain(db, caplog, monkeypatch):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugadores = crear_jugadores(db, 2)
+    monkeypatch.setattr(instrumentacion, "SLOW_QUERY_MS", 0.000001)
+    explicadas = []
+    explain = instrumentacion._explain
+    monkeypatch.setattr(instrumentacion, "_explain", lambda conn, statement, parameters: explicadas.append(statement) or explain(conn, statement, parameters))
+    with caplog.at_level(logging.WARNING, logger=LOGGER):
+        db.execute(models.inscripcion.insert(), [
+            {"jugador_id": j.id, "torneo_id": torneo.id, "categoria_id": categoria.id} for j in jugadores
+        ])
+        db.commit()
+    (lenta,) = [e for e in _eventos(caplog, "consulta_lenta") if e["sql"].startswith("INSERT INTO inscripcion")]
+    assert "plan" not in lenta
+    assert not any(sql.startswith("INSERT INTO inscripcion") for sql in explicadas)
@@ -0,0 +1,108 @@
+# GET /torneos/{id}/llave (orden numérico de rondas, cantidad fija de consultas) y el árbol que deja generar_llave_eliminacion
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import crud, models
+from app.db_async import async_engine
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_torneo
+
+
+def _llave(db, num_jugadores: int):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugadores = crear_jugadores(db, num_jugadores)
+    crud.generar_llave_eliminacion(db, torneo.id, categoria.id, [j.id for j in jugadores], "individual")
+    return torneo
+
+def _selects(torneo):
+    sentencias = []
+    contar = lambda conn, cursor, sql, *args: sentencias.append(sql) if sql.lstrip().upper().startswith("SELECT") else None
+    event.listen(async_engine.sync_engine, "before_cursor_execute", contar)
+    try:
+        with TestClient(app) as cliente:
+            respuesta = cliente.get(f"/torneos/{torneo.id}/llave")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", contar)
+    assert respuesta.status_code == 200
+    return len(sentencias), respuesta.json()
+
+
+def test_rondas_en_orden_numerico(db):
+    # 1024 jugadores: 10 rondas, "Ronda 10" no debe quedar antes de "Ronda 2"
+    torneo = _llave(db, 1024)
+    with TestClient(app) as cliente:
+        partidos = cliente.get(f"/torneos/{torneo.id}/llave").json()
+    rondas = [int(p["ronda"].split()[1]) for p in partidos]
+    assert rondas == sorted(rondas)
+    assert rondas[0] == 1 and rondas[-1] == 10
+    primera = [p["posicion_llave"] for p in partidos if p["ronda"] == "Ronda 1"]
+    assert primera == list(range(1, 513))
+
+
+@pytest.mark.parametrize("num_jugadores", [4, 256])
+def test_consultas_fijas_por_tamano(db, num_jugadores):
+    torneo = _llave(db, num_jugadores)
+    consultas, partidos = _selects(torneo)
+    assert len(partidos) == num_jugadores - 1
+    # versiones (ETag), torneo, partidos + categoría, jugador1, jugador2, resultados;
+    # equipo1/equipo2 no consultan porque en individual no hay ids de equipo
+    assert consultas == 6
+
+
+# árbol completo de generar_llave_eliminacion: rondas, enlaces partido_ganador_id y byes
+def _rondas(db, torneo):
+    partidos = db.query(models.Partido).filter(models.Partido.torneo_id == torneo.id).all()
+    rondas = {}
+    for partido in partidos:
+        rondas.setdefault(int(partido.ronda.split()[1]), []).append(partido)
+    return [sorted(rondas[n], key=lambda p: p.posicion_llave) for n in sorted(rondas)]
+
+
+@pytest.mark.parametrize("num_jugadores, por_ronda", [
+    (2, [1]), (3, [2, 1]), (5, [4, 2, 1]), (256, [128, 64, 32, 16, 8, 4, 2, 1]),
+])
+def test_arbol_de_la_llave(db, num_jugadores, por_ronda):
+    torneo = _llave(db, num_jugadores)
+    rondas = _rondas(db, torneo)
+
+    assert [len(r) for r in rondas] == por_ronda
+    for ronda in rondas:
+        assert [p.posicion_llave for p in ronda] == list(range(1, len(ronda) + 1))
+
+    # cada partido que no es la final apunta al cruce (p + 1) // 2 de la ronda siguiente
+    for ronda, siguiente in zip(rondas, rondas[1:]):
+        for partido in ronda:
+            assert partido.partido_ganador_id == siguiente[(partido.posicion_llave + 1) // 2 - 1].id
+    assert rondas[-1][0].partido_ganador_id is None
+
+    # todos los inscritos están en la primera ronda, una sola vez
+    primera = [j for p in rondas[0] for j in (p.jugador1_id, p.jugador2_id) if j is not None]
+    assert len(primera) == len(set(primera)) == num_jugadores
+
+    # los byes ya dejaron a su jugador en la ronda 2, en el lado que marca la paridad de la posición
+    byes = [p for p in rondas[0] if p.bye]
+    assert len(byes) == 2 ** (len(por_ronda)) - num_jugadores
+    for partido in byes:
+        assert partido.jugador2_id is None
+        siguiente = rondas[1][(partido.posicion_llave + 1) // 2 - 1]
+        lado = siguiente.jugador1_id if partido.posicion_llave % 2 == 1 else siguiente.jugador2_id
+        assert lado == partido.jugador1_id
+
+
+def test_avanzar_ganador_por_paridad_de_posicion(db):
+    torneo = _llave(db, 4)
+    (semi1, semi2), (final,) = _rondas(db, torneo)
+
+    # la posición 2 (par) llega al lado 2 aunque el lado 1 esté libre
+    crud.avanzar_ganador(db, semi2.id, semi2.jugador1_id)
+    db.refresh(final)
+    assert (final.jugador1_id, final.jugador2_id) == (None, semi2.jugador1_id)
+
+    crud.avanzar_ganador(db, semi1.id, semi1.jugador2_id)
+    db.refresh(final)
+    assert (final.jugador1_id, final.jugador2_id) == (semi1.jugador2_id, semi2.jugador1_id)
+
+    # el lado ya tiene a otro jugador: no se pisa
+    with pytest.raises(ValueError, match="ya tiene un jugador asignado"):
+        crud.avanzar_ganador(db, semi1.id, semi1.jugador1_id)
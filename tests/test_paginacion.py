@@ -0,0 +1,39 @@
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, paginacion
+from app.main import app
+from tests.conftest import crear_jugadores
+
+
+def cursor(valores):
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode()
+
+
+@pytest.mark.parametrize("valores", [[{"a": 1}], [[1, 2]], [True], ["5"], [1, 2]])
+def test_cursor_invalido_devuelve_400(db, valores):
+    with TestClient(app) as cliente:
+        respuesta = cliente.get("/jugadores/", params={"cursor": cursor(valores)})
+    assert respuesta.status_code == 400
+
+
+def test_cursor_valido_pagina(db):
+    jugadores = crear_jugadores(db, 3)
+    with TestClient(app) as cliente:
+        primera = cliente.get("/jugadores/", params={"limit": 2})
+        segunda = cliente.get("/jugadores/", params={"limit": 2, "cursor": primera.headers[paginacion.CABECERA_CURSOR]})
+    assert [j["id"] for j in primera.json()] == [j.id for j in jugadores[:2]]
+    assert [j["id"] for j in segunda.json()] == [jugadores[2].id]
+
+
+def test_cursor_por_tipo_de_columna():
+    c = models.inscripcion.c
+    assert paginacion.decodificar_cursor(cursor([1, 2, 3]), [c.jugador_id, c.torneo_id, c.categoria_id]) == [1, 2, 3]
+    assert paginacion.decodificar_cursor(cursor(["ana"]), [models.Jugador.nombre]) == ["ana"]
+    with pytest.raises(ValueError):
+        paginacion.decodificar_cursor(cursor([1]), [models.Jugador.nombre])
+    with pytest.raises(ValueError):
+        paginacion.decodificar_cursor(cursor([1.5]), [models.Jugador.id])
@@ -0,0 +1,139 @@
+# ratings Elo: aplicación incremental al terminar un partido, reversión cuando cambia el ganador
+# y reconstrucción completa en lotes (ratings.reconstruir)
+import pytest
+
+from app import crud, models, ratings, schemas
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+
+@pytest.fixture
+def partido(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db, sets_por_partido=3)
+    jugador1, jugador2 = crear_jugadores(db, 2)
+    return crear_partido(db, torneo, categoria, jugador1, jugador2)
+
+def _registrar(db, partido, numero, p1, p2):
+    return crud.registrar_resultado_set(db, schemas.ResultadoSetCreate(
+        partido_id=partido.id, numero_set=numero, puntos_jugador1=p1, puntos_jugador2=p2))
+
+def _ratings(db, partido):
+    db.expire_all()
+    return [db.get(models.RatingJugador, j) for j in (partido.jugador1_id, partido.jugador2_id)]
+
+def _historial(db, partido_id):
+    return db.query(models.HistorialRating).filter(models.HistorialRating.partido_id == partido_id).order_by(
+        models.HistorialRating.participante_id).all()
+
+
+def test_aplica_al_terminar(db, partido):
+    _registrar(db, partido, 1, 11, 5)
+    assert _ratings(db, partido) == [None, None] # sin terminar no hay rating
+
+    _registrar(db, partido, 2, 11, 8)
+    rating1, rating2 = _ratings(db, partido)
+    esperado1, esperado2 = ratings.actualizar_par(ratings.RATING_INICIAL, ratings.RATING_INICIAL, True)
+    assert (rating1.rating, rating2.rating) == pytest.approx((esperado1, esperado2))
+    assert (rating1.partidos, rating2.partidos) == (1, 1)
+    historial = _historial(db, partido.id)
+    assert [(h.rating_antes, h.rating_despues) for h in historial] == pytest.approx(
+        [(ratings.RATING_INICIAL, esperado1), (ratings.RATING_INICIAL, esperado2)])
+
+
+def test_cambio_de_ganador_revierte_y_aplica(db, partido):
+    set1 = _registrar(db, partido, 1, 11, 5)
+    _registrar(db, partido, 2, 11, 8)
+    set3 = _registrar(db, partido, 3, 5, 11) # el partido ya estaba terminado, no cambia nada
+    crud.update_resultado_set(db, set1.id, schemas.ResultadoSetUpdate(puntos_jugador1=5, puntos_jugador2=11))
+
+    # ahora gana el jugador 2: se deshizo la victoria del 1 y se aplicó la del 2 sobre 1500
+    rating1, rating2 = _ratings(db, partido)
+    perdedor, ganador = ratings.actualizar_par(ratings.RATING_INICIAL, ratings.RATING_INICIAL, False)
+    assert (rating1.rating, rating2.rating) == pytest.approx((perdedor, ganador))
+    assert (rating1.partidos, rating2.partidos) == (1, 1)
+    assert len(_historial(db, partido.id)) == 2
+
+    # al borrar un set queda 1-1: el partido deja de tener ganador y el rating vuelve al inicial
+    crud.delete_resultado_set(db, set3.id)
+    rating1, rating2 = _ratings(db, partido)
+    assert (rating1.rating, rating2.rating) == pytest.approx((ratings.RATING_INICIAL, ratings.RATING_INICIAL))
+    assert (rating1.partidos, rating2.partidos) == (0, 0)
+    assert _historial(db, partido.id) == []
+
+
+def test_borrar_partido_revierte(db, partido):
+    _registrar(db, partido, 1, 11, 5)
+    _registrar(db, partido, 2, 11, 8)
+    partido_id = partido.id
+    jugadores = (partido.jugador1_id, partido.jugador2_id)
+
+    crud.delete_partido(db, partido_id)
+
+    db.expire_all()
+    for jugador_id in jugadores:
+        rating = db.get(models.RatingJugador, jugador_id)
+        assert (rating.rating, rating.partidos) == (pytest.approx(ratings.RATING_INICIAL), 0)
+    assert _historial(db, partido_id) == []
+    assert db.get(models.EstadoPartido, partido_id) is None
+
+
+def test_reversion_incremental_deriva_y_reconstruir_la_corrige(db):
+    # A le gana a B y después a C. Si luego el primer partido pasa a ganarlo B, la reversión
+    # incremental resta el delta guardado del primero, pero el segundo ya se calculó desde el
+    # rating viejo de A: su historial deja de encadenar. La suma total se mantiene (suma cero) y
+    # `python -m app.ratings reconstruir` deja los valores exactos.
+    torneo, categoria = crear_torneo(db), crear_categoria(db, sets_por_partido=1)
+    a, b, c = crear_jugadores(db, 3)
+    primero = crear_partido(db, torneo, categoria, a, b)
+    segundo = crear_partido(db, torneo, categoria, a, c, mesa=2, horario=primero.horario.replace(hour=12))
+    set_primero = _registrar(db, primero, 1, 11, 5)
+    _registrar(db, segundo, 1, 11, 5)
+    crud.update_resultado_set(db, set_primero.id, schemas.ResultadoSetUpdate(puntos_jugador1=5, puntos_jugador2=11))
+
+    db.expire_all()
+    incremental = {j.id: db.get(models.RatingJugador, j.id).rating for j in (a, b, c)}
+    assert sum(incremental.values()) == pytest.approx(3 * ratings.RATING_INICIAL)
+
+    b1, a1 = ratings.actualizar_par(ratings.RATING_INICIAL, ratings.RATING_INICIAL, True) # B gana a A
+    a2, c2 = ratings.actualizar_par(a1, ratings.RATING_INICIAL, True) # A gana a C
+    exacto = {a.id: a2, b.id: b1, c.id: c2}
+    assert incremental[a.id] != pytest.approx(exacto[a.id])
+
+    ratings.reconstruir_en_base(db)
+    db.expire_all()
+    assert {j: db.get(models.RatingJugador, j).rating for j in exacto} == pytest.approx(exacto)
+    historial_segundo = {h.participante_id: h for h in _historial(db, segundo.id)}
+    assert historial_segundo[a.id].rating_antes == pytest.approx(a1)
+
+
+def _secuencial(participantes1, participantes2, gana1):
+    actuales, jugados, filas = {}, {}, []
+    for a, b, g in zip(participantes1, participantes2, gana1):
+        ra, rb = actuales.get(a, ratings.RATING_INICIAL), actuales.get(b, ratings.RATING_INICIAL)
+        na, nb = ratings.actualizar_par(ra, rb, g == 1.0)
+        filas.append((ra, na, rb, nb))
+        actuales[a], actuales[b] = na, nb
+        jugados[a] = jugados.get(a, 0) + 1
+        jugados[b] = jugados.get(b, 0) + 1
+    return actuales, jugados, filas
+
+
+def test_reconstruir_igual_a_partido_por_partido():
+    # 7 se repite dentro de lo que sería un lote y en lotes consecutivos
+    participantes1 = [1, 3, 5, 7, 1, 7, 2, 9, 7, 4]
+    participantes2 = [2, 4, 6, 8, 3, 5, 7, 10, 1, 6]
+    gana1 = [1.0, 0.0, 1.0, 1.0, 0.0, 1.0, 0.0, 1.0, 1.0, 0.0]
+    lotes = ratings.lotes_sin_repetidos(participantes1, participantes2)
+    assert lotes == [(0, 4), (4, 6), (6, 8), (8, 10)]
+
+    ids, finales, jugados, antes1, despues1, antes2, despues2 = ratings.reconstruir(participantes1, participantes2, gana1)
+    actuales, jugados_esperados, filas = _secuencial(participantes1, participantes2, gana1)
+
+    assert dict(zip(ids.tolist(), finales.tolist())) == pytest.approx(actuales)
+    assert dict(zip(ids.tolist(), jugados.tolist())) == jugados_esperados
+    assert list(zip(antes1, despues1, antes2, despues2)) == pytest.approx(filas)
+
+
+def test_lotes_sin_repetidos_cortan_ante_cualquier_repeticion():
+    assert ratings.lotes_sin_repetidos([], []) == []
+    assert ratings.lotes_sin_repetidos([1, 2], [2, 3]) == [(0, 1), (1, 2)]
+    assert ratings.lotes_sin_repetidos([1, 3, 5], [2, 4, 6]) == [(0, 3)]
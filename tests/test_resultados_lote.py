@@ -0,0 +1,72 @@
+# registrar_resultados_set_lote con avanzar_ganadores: un avance imposible deja fuera solo ese partido
+from datetime import datetime
+
+from app import crud, models, schemas
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+
+def _llave(db):
+    # semifinales A (posición 1) y B (posición 2) que alimentan la final
+    torneo, categoria = crear_torneo(db), crear_categoria(db, sets_por_partido=3)
+    jugadores = crear_jugadores(db, 5)
+    # la final aún sin jugadores se inserta por Core, como en _insertar_llaves (el validador de tipo la rechazaría)
+    final_id = db.execute(models.Partido.__table__.insert().values(
+        torneo_id=torneo.id, categoria_id=categoria.id, ronda="Ronda 2", posicion_llave=1, tipo="individual",
+        horario=datetime(2030, 1, 1, 12), mesa=1,
+    )).inserted_primary_key[0]
+    db.commit()
+    final = db.get(models.Partido, final_id)
+    semi_a = crear_partido(db, torneo, categoria, jugadores[0], jugadores[1], ronda="Ronda 1", posicion_llave=1, partido_ganador_id=final.id)
+    semi_b = crear_partido(db, torneo, categoria, jugadores[2], jugadores[3], ronda="Ronda 1", posicion_llave=2, partido_ganador_id=final.id)
+    return final, semi_a, semi_b, jugadores
+
+def _sets(partido, cantidad):
+    return [schemas.ResultadoSetCreate(partido_id=partido.id, numero_set=n, puntos_jugador1=11, puntos_jugador2=5)
+            for n in range(1, cantidad + 1)]
+
+
+def test_lote_avanza_ganadores(db):
+    final, semi_a, semi_b, jugadores = _llave(db)
+    salida = crud.registrar_resultados_set_lote(db, _sets(semi_a, 2) + _sets(semi_b, 2), avanzar_ganadores=True)
+
+    assert salida.errores == []
+    assert len(salida.creados) == 4
+    assert {e.partido_id for e in salida.finalizados} == {semi_a.id, semi_b.id}
+    db.refresh(final)
+    assert (final.jugador1_id, final.jugador2_id) == (jugadores[0].id, jugadores[2].id)
+
+
+def test_avance_imposible_deshace_solo_ese_partido(db):
+    final, semi_a, semi_b, jugadores = _llave(db)
+    # el lado 1 de la final ya está ocupado por otro jugador: el ganador de A no puede avanzar
+    final.jugador1_id = jugadores[4].id
+    db.commit()
+
+    lote = _sets(semi_a, 2) + _sets(semi_b, 2)
+    salida = crud.registrar_resultados_set_lote(db, lote, avanzar_ganadores=True)
+
+    assert [e.indice for e in salida.errores] == [0, 1]
+    assert all("ya tiene un jugador asignado" in e.detalle for e in salida.errores)
+    assert [(r.partido_id, r.numero_set) for r in salida.creados] == [(semi_b.id, 1), (semi_b.id, 2)]
+    assert [e.partido_id for e in salida.finalizados] == [semi_b.id]
+
+    db.expire_all()
+    assert crud.get_resultados_set_by_partido(db, semi_a.id) == []
+    assert db.get(models.EstadoPartido, semi_a.id) is None
+    assert db.get(models.RatingJugador, jugadores[0].id) is None
+    assert len(crud.get_resultados_set_by_partido(db, semi_b.id)) == 2
+    final = db.get(models.Partido, final.id)
+    assert (final.jugador1_id, final.jugador2_id) == (jugadores[4].id, jugadores[2].id)
+
+
+def test_sin_avanzar_ganadores_el_lote_no_toca_la_llave(db):
+    final, semi_a, semi_b, jugadores = _llave(db)
+    final.jugador1_id = jugadores[4].id
+    db.commit()
+
+    salida = crud.registrar_resultados_set_lote(db, _sets(semi_a, 2), avanzar_ganadores=False)
+
+    assert salida.errores == []
+    assert len(salida.creados) == 2
+    db.refresh(final)
+    assert final.jugador1_id == jugadores[4].id
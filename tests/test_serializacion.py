@@ -0,0 +1,57 @@
+import json
+from datetime import date, datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import models, paginacion, schemas, serializacion
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_partido, crear_torneo
+
+
+def _partidos_y_sets(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugador1, jugador2, jugador3 = crear_jugadores(db, 3)
+    final = crear_partido(db, torneo, categoria, jugador1, jugador3, horario=datetime(2030, 1, 2, 18, 30, 15, 250000), ronda="Ronda 2", posicion_llave=1)
+    semifinal = crear_partido(db, torneo, categoria, jugador1, jugador2, ronda="Ronda 1", posicion_llave=1, partido_ganador_id=final.id)
+    # sin ronda, posición ni ganador: todos esos campos salen null
+    crear_partido(db, torneo, categoria, jugador2, jugador3, horario=datetime(2030, 1, 1, 9))
+    db.add_all([
+        models.ResultadoSet(partido_id=semifinal.id, numero_set=1, puntos_jugador1=11, puntos_jugador2=9),
+        models.ResultadoSet(partido_id=semifinal.id, numero_set=2, puntos_jugador1=13, puntos_jugador2=11),
+    ])
+    db.commit()
+
+
+@pytest.mark.parametrize("ruta,esquema_salida", [("/partidos/", schemas.PartidoOut), ("/resultados-set/", schemas.ResultadoSetOut)])
+def test_rapido_igual_a_response_model(db, ruta, esquema_salida):
+    _partidos_y_sets(db)
+    with TestClient(app) as cliente:
+        normal = cliente.get(ruta, params={"limit": 2})
+        rapido = cliente.get(ruta, params={"limit": 2, "rapido": True})
+    assert normal.status_code == rapido.status_code == 200
+    assert rapido.headers["content-type"] == normal.headers["content-type"] == "application/json"
+    # mismos bytes: mismas claves en el mismo orden, mismas fechas y nulls
+    assert rapido.content == normal.content
+    assert list(json.loads(rapido.content)[0]) == list(esquema_salida.model_fields)
+    assert rapido.headers[paginacion.CABECERA_CURSOR] == normal.headers[paginacion.CABECERA_CURSOR]
+    assert rapido.headers["etag"] == normal.headers["etag"]
+
+
+def test_rapido_codifica_fechas_y_nulls(db):
+    _partidos_y_sets(db)
+    with TestClient(app) as cliente:
+        partidos = cliente.get("/partidos/", params={"rapido": True}).json()
+    final, semifinal, sin_ronda = partidos
+    assert final["horario"] == "2030-01-02T18:30:15.250000"
+    assert semifinal["partido_ganador_id"] == final["id"]
+    assert sin_ronda["horario"] == "2030-01-01T09:00:00"
+    assert (sin_ronda["ronda"], sin_ronda["posicion_llave"], sin_ronda["partido_ganador_id"], sin_ronda["equipo1_id"]) == (None, None, None, None)
+
+
+def test_dumps_sin_orjson_igual_que_con_orjson(monkeypatch):
+    valor = [{"fecha": date(2030, 1, 1), "horario": datetime(2030, 1, 1, 9, 5, 0, 1), "nombre": "Peñalolén", "nulo": None, "bye": False}]
+    con_orjson = serializacion.dumps(valor)
+    monkeypatch.setattr(serializacion, "orjson", None)
+    assert serializacion.dumps(valor) == con_orjson
+    assert json.loads(con_orjson) == [{"fecha": "2030-01-01", "horario": "2030-01-01T09:05:00.000001", "nombre": "Peñalolén", "nulo": None, "bye": False}]
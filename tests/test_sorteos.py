@@ -0,0 +1,179 @@
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from app import crud, models, schemas, sorteos
+from app.main import app
+from tests.conftest import crear_categoria, crear_jugadores, crear_torneo
+
+
+def test_repartir_grupos_en_serpiente():
+    # ids 1..8 de mayor a menor rating: bombos (1,2) (3,4) (5,6) (7,8), el impar recorre al revés
+    participantes = [(i, 100 - i, None) for i in range(1, 9)]
+    assert sorteos.repartir_grupos(participantes, 2) == [[1, 4, 5, 8], [2, 3, 6, 7]]
+    # mismo rating: desempata el id
+    assert sorteos.repartir_grupos([(3, 50, None), (1, 50, None), (2, 50, None)], 3) == [[1], [2], [3]]
+    with pytest.raises(ValueError):
+        sorteos.repartir_grupos(participantes, 0)
+
+
+def test_repartir_grupos_separa_asociaciones():
+    participantes = [(1, 8, "A"), (2, 7, "A"), (3, 6, "B"), (4, 5, None), (5, 4, "A"), (6, 3, "B"), (7, 2, None), (8, 1, None)]
+    # el 6 (B) iría al grupo 2 por la serpiente, pero ahí ya está el 3 (B): pasa al siguiente libre
+    assert sorteos.repartir_grupos(participantes, 4) == [[1, 8], [2, 6], [3, 7], [4, 5]]
+    # si todos los grupos tienen a alguien de la asociación, va al que tenga menos (en orden de serpiente)
+    assert sorteos.repartir_grupos([(i, 10 - i, "A") for i in range(1, 5)], 2) == [[1, 4], [2, 3]]
+
+
+def _repartir_grupos_completo(participantes, num_grupos):
+    # versión anterior al corte temprano: recorre siempre todos los grupos del bombo
+    ordenados = sorted(participantes, key=lambda p: (-p[1], p[0]))
+    grupos = [[] for _ in range(num_grupos)]
+    asociaciones = [{} for _ in range(num_grupos)]
+    for numero_bombo, inicio in enumerate(range(0, len(ordenados), num_grupos)):
+        recorrido = list(range(num_grupos)) if numero_bombo % 2 == 0 else list(range(num_grupos - 1, -1, -1))
+        for participante_id, _, asociacion_id in ordenados[inicio:inicio + num_grupos]:
+            if asociacion_id is None:
+                destino = recorrido[0]
+            else:
+                destino = min(recorrido, key=lambda g: asociaciones[g].get(asociacion_id, 0))
+                asociaciones[destino][asociacion_id] = asociaciones[destino].get(asociacion_id, 0) + 1
+            recorrido.remove(destino)
+            grupos[destino].append(participante_id)
+    return grupos
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_repartir_grupos_igual_que_sin_corte_temprano(semilla):
+    azar = random.Random(semilla)
+    participantes = [(i, azar.randint(1000, 1100), azar.choice([None, 1, 2, 3, 4])) for i in range(azar.randint(2, 60))]
+    num_grupos = azar.randint(1, len(participantes) // 2)
+    assert sorteos.repartir_grupos(participantes, num_grupos) == _repartir_grupos_completo(participantes, num_grupos)
+
+
+def _tareas(semilla):
+    return [{
+        "categoria_id": c,
+        "individuales": [(c * 100 + i, 1000 + (i * 37) % 500, i % 3 or None) for i in range(12)],
+        "dobles": list(range(c * 100, c * 100 + 5)),
+        "formato_individual": formato,
+        "jugadores_por_grupo": 4,
+        "semilla": semilla,
+    } for c, formato in enumerate(["grupos", "llave", "grupos", "llave"])]
+
+
+def _sin_tiempos(resultados):
+    return [{k: v for k, v in r.items() if k != "segundos"} for r in resultados]
+
+
+def test_sorteo_en_procesos_igual_al_sorteo_en_linea():
+    en_linea = sorteos.sortear_categorias(_tareas(7), 1)
+    assert _sin_tiempos(sorteos.sortear_categorias(_tareas(7), 2)) == _sin_tiempos(en_linea)
+    # la semilla fija las llaves: otra semilla las cambia, la siembra de grupos no depende del azar
+    otra = sorteos.sortear_categorias(_tareas(8), 1)
+    assert [r["llave_individual"] for r in otra] != [r["llave_individual"] for r in en_linea]
+    assert [r["grupos"] for r in otra] == [r["grupos"] for r in en_linea]
+
+
+def _inscribir(db, torneo, categoria, jugadores, equipos=()):
+    db.execute(models.inscripcion.insert(), [
+        {"jugador_id": j.id, "torneo_id": torneo.id, "categoria_id": categoria.id} for j in jugadores
+    ])
+    if equipos:
+        db.execute(models.inscripcion_dobles.insert(), [
+            {"equipo_id": e.id, "torneo_id": torneo.id, "categoria_id": categoria.id} for e in equipos
+        ])
+    db.commit()
+
+
+def _torneo_inscrito(db):
+    torneo = crear_torneo(db)
+    categoria = crear_categoria(db)
+    jugadores = crear_jugadores(db, 8)
+    equipos = [models.EquipoDobles(jugador1_id=jugadores[i].id, jugador2_id=jugadores[i + 1].id) for i in (0, 2, 4)]
+    db.add_all(equipos)
+    db.commit()
+    _inscribir(db, torneo, categoria, jugadores, equipos)
+    return torneo, categoria, jugadores, equipos
+
+
+def test_construir_torneo_crea_grupos_partidos_y_llaves(db):
+    torneo, categoria, jugadores, equipos = _torneo_inscrito(db)
+    salida = crud.construir_torneo(db, torneo.id, schemas.ConstruccionTorneoCreate(semilla=1, procesos=1))
+
+    (construida,) = salida.categorias
+    assert construida.categoria_id == categoria.id
+    # 8 inscritos en grupos de 4: dos grupos de todos contra todos (6 partidos cada uno)
+    assert [g.nombre for g in construida.grupos] == ["Grupo A", "Grupo B"]
+    assert sorted(j for g in construida.grupos for j in g.jugadores_ids) == sorted(j.id for j in jugadores)
+    for grupo in construida.grupos:
+        cruces = db.execute(
+            select(models.Partido.jugador1_id, models.Partido.jugador2_id).where(models.Partido.grupo_id == grupo.id)
+        ).all()
+        assert sorted(map(tuple, cruces)) == sorted(sorteos.todos_contra_todos(grupo.jugadores_ids))
+
+    # 3 equipos de dobles: llave de 4 con un bye, enlazada a la final
+    llave = db.execute(
+        select(models.Partido).where(models.Partido.tipo == "dobles").order_by(models.Partido.ronda, models.Partido.posicion_llave)
+    ).scalars().all()
+    primera, final = [p for p in llave if p.ronda == "Ronda 1"], [p for p in llave if p.ronda == "Ronda 2"]
+    assert len(primera) == 2 and len(final) == 1
+    assert all(p.partido_ganador_id == final[0].id for p in primera)
+    assert final[0].partido_ganador_id is None
+    assert sum(p.bye for p in primera) == 1
+    assert sorted(e for p in primera for e in (p.equipo1_id, p.equipo2_id) if e) == sorted(e.id for e in equipos)
+    assert construida.partidos_creados == 12 + 3
+
+
+def test_construir_torneo_escribe_todo_en_una_transaccion(db, monkeypatch):
+    torneo, *_ = _torneo_inscrito(db)
+
+    def falla(*args, **kwargs):
+        raise IntegrityError("insert", {}, Exception("falla simulada"))
+    # los grupos ya se insertaron cuando fallan las llaves: el rollback debe deshacerlos
+    monkeypatch.setattr(crud, "_insertar_llaves", falla)
+    with pytest.raises(ValueError):
+        crud.construir_torneo(db, torneo.id, schemas.ConstruccionTorneoCreate(procesos=1))
+    assert db.query(models.Grupo).count() == 0
+    assert db.query(models.Partido).count() == 0
+    assert db.execute(select(models.grupo_participante)).first() is None
+
+
+@pytest.mark.parametrize("generar_partidos", [False, True])
+def test_endpoint_sortear_grupos(db, generar_partidos):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    jugadores = crear_jugadores(db, 7)
+    _inscribir(db, torneo, categoria, jugadores)
+    ruta = f"/torneos/{torneo.id}/categorias/{categoria.id}/sortear-grupos/"
+
+    with TestClient(app) as cliente:
+        respuesta = cliente.post(ruta, json={"num_grupos": 2, "generar_partidos": generar_partidos})
+        assert respuesta.status_code == 201
+        salida = respuesta.json()
+        # una categoría se sortea una sola vez
+        assert cliente.post(ruta, json={"num_grupos": 2}).status_code == 400
+
+    grupos = {g["id"]: g["jugadores_ids"] for g in salida["grupos"]}
+    assert [g["nombre"] for g in salida["grupos"]] == ["Grupo A", "Grupo B"]
+    assert sorted(len(ids) for ids in grupos.values()) == [3, 4]
+    assert sorted(j for ids in grupos.values() for j in ids) == sorted(j.id for j in jugadores)
+    cruces = db.execute(select(models.Partido.grupo_id, models.Partido.jugador1_id, models.Partido.jugador2_id)).all()
+    if generar_partidos:
+        # todos contra todos: 3 + 6 partidos
+        assert salida["partidos_creados"] == len(cruces) == 9
+        for grupo_id, ids in grupos.items():
+            assert sorted((j1, j2) for g, j1, j2 in cruces if g == grupo_id) == sorted(sorteos.todos_contra_todos(ids))
+    else:
+        assert salida["partidos_creados"] == 0 and cruces == []
+
+
+def test_endpoint_sortear_grupos_sin_inscritos_suficientes(db):
+    torneo, categoria = crear_torneo(db), crear_categoria(db)
+    _inscribir(db, torneo, categoria, crear_jugadores(db, 3))
+    with TestClient(app) as cliente:
+        respuesta = cliente.post(f"/torneos/{torneo.id}/categorias/{categoria.id}/sortear-grupos/", json={"num_grupos": 2})
+    assert respuesta.status_code == 400
+    assert db.query(models.Grupo).count() == 0
@@ -0,0 +1,45 @@
+# version_tabla se incrementa después del commit de los datos, en una transacción aparte
+from sqlalchemy import event, select
+
+from app import crud, models, schemas
+from app.db import SessionLocal, engine
+from tests.conftest import crear_jugadores
+
+TABLA = models.VersionTabla.__table__
+
+
+def _version(tabla: str):
+    with engine.connect() as conexion:
+        return conexion.execute(select(TABLA.c.version).where(TABLA.c.tabla == tabla)).scalar() or 0
+
+
+def test_commit_incrementa_en_transaccion_aparte(db):
+    jugador, = crear_jugadores(db, 1)
+    antes = _version("jugador")
+
+    transacciones = []
+    vistas = []
+    al_confirmar = lambda conexion: transacciones.append(conexion)
+    # dentro de la transacción de datos la versión todavía no cambia
+    antes_de_confirmar = lambda sesion: vistas.append(_version("jugador"))
+    event.listen(engine, "commit", al_confirmar)
+    event.listen(SessionLocal, "before_commit", antes_de_confirmar)
+    try:
+        crud.update_jugador(db, jugador.id, schemas.JugadorUpdate(ciudad="Valparaíso"))
+    finally:
+        event.remove(engine, "commit", al_confirmar)
+        event.remove(SessionLocal, "before_commit", antes_de_confirmar)
+
+    assert vistas == [antes]
+    assert len(transacciones) == 2 # datos, y luego versiones
+    assert _version("jugador") == antes + 1
+
+
+def test_rollback_no_incrementa(db):
+    jugador, = crear_jugadores(db, 1)
+    antes = _version("jugador")
+    jugador.ciudad = "Talca"
+    db.flush()
+    db.rollback()
+    db.commit()
+    assert _version("jugador") == antes